@@ -0,0 +1,61 @@
+# ==========================================
+# DIELLA AI - BUILD SCRIPT (SERVING ARTIFACTS)
+# ==========================================
+# Run: python build_artifacts.py
+# Runs the enrichment pipeline (utils/pipeline.py) and publishes what the app
+# serves; once cache/serving.json exists the app loads only these files
+# (SERVING_READ_ONLY=0 lets it enrich stale data itself).
+# - Albanian text: statements without Speech_SQ are machine-translated with
+#   TRANSLATION_BACKEND (cache/translations.sqlite; --no-translate skips).
+# - Corpus: enriched frame (WordCount, TTR, sentiment, topics) written to
+#   cache/corpus.parquet with the source hash (CSV bytes or SQLite store
+#   version) and config in its metadata.
+#   Only new/changed rows are enriched, in checkpointed batches
+#   (--batch-size); --refit-topics refits NMF.
+# - Passages: long Speech_SQ statements are split into overlapping passages
+#   (cache/passages.parquet); both indexes below are keyed by passage id.
+# - Vector index: encodes the passages (embedding cache, written after every
+#   --embed-batch-size new passages) and writes the FAISS index to
+#   cache/vector_index/, named by the corpus/model fingerprint.
+# - Lexical index: BM25 postings over the passages in cache/lexical_index/.
+# - Manifest: cache/serving.json names the published set; written last.
+
+import argparse
+import sys
+from pathlib import Path
+
+from config import DATA_PATH, PIPELINE_BATCH_SIZE, PIPELINE_EMBED_BATCH_SIZE
+
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build DIELLA AI serving artifacts.")
+    parser.add_argument("--data", default=str(BASE_DIR / DATA_PATH), help="Path to the corpus CSV or SQLite store (data/corpus.sqlite)")
+    parser.add_argument("--force", action="store_true", help="Rebuild everything from scratch")
+    parser.add_argument("--refit-topics", action="store_true", help="Refit the NMF topic model")
+    parser.add_argument("--no-translate", action="store_true", help="Do not machine-translate missing Speech_SQ")
+    parser.add_argument("--batch-size", type=int, default=PIPELINE_BATCH_SIZE, help="Rows per text-feature batch")
+    parser.add_argument("--embed-batch-size", type=int, default=PIPELINE_EMBED_BATCH_SIZE, help="New passages per embedding batch")
+    args = parser.parse_args()
+
+    # Imported here: spawned sentiment workers re-import this module
+    from utils.pipeline import run_pipeline
+
+    manifest, err = run_pipeline(
+        args.data,
+        force=args.force,
+        refit_topics=args.refit_topics,
+        translate=not args.no_translate,
+        batch_size=args.batch_size,
+        embed_batch_size=args.embed_batch_size,
+    )
+    if err:
+        print(f"Pipeline failed: {err}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -10,31 +10,151 @@ from dotenv import load_dotenv
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
 
-# Data
-DATA_PATH = "diella_speeches_clean.csv"
+# Data: corpus CSV, or the append-only SQLite store written by ingest_articles.py
+DATA_PATH = os.getenv("DATA_PATH", "diella_speeches_clean.csv")
+CORPUS_DB_PATH = BASE_DIR / "data" / "corpus.sqlite"
+
+# Raw fetched article HTML (content-addressed, gzip) for offline re-extraction
+HTML_ARCHIVE_DIR = BASE_DIR / "data" / "html_archive"
+
+# Cache (embeddings, indexes, precomputed artifacts)
+CACHE_DIR = BASE_DIR / "cache"
+EMBEDDING_CACHE_DIR = CACHE_DIR / "embeddings"
+VECTOR_INDEX_DIR = CACHE_DIR / "vector_index"
+LEXICAL_INDEX_DIR = CACHE_DIR / "lexical_index"
+CORPUS_ARTIFACT_PATH = CACHE_DIR / "corpus.parquet"
+TOPIC_MODEL_PATH = CACHE_DIR / "topic_model.joblib"
+ANSWER_CACHE_PATH = CACHE_DIR / "answers.sqlite"
+CRAWL_STATE_PATH = CACHE_DIR / "crawl_state.json"
+PASSAGES_ARTIFACT_PATH = CACHE_DIR / "passages.parquet"
+SERVING_MANIFEST_PATH = CACHE_DIR / "serving.json"
+PIPELINE_CHECKPOINT_DIR = CACHE_DIR / "pipeline"
+
+# Serving: when read-only the app only loads the artifacts published by the
+# enrichment pipeline (build_artifacts.py) and never enriches or indexes.
+# "auto" (default): read-only whenever a serving manifest exists; "1" always;
+# "0" never (the app enriches stale data itself)
+SERVING_READ_ONLY = os.getenv("SERVING_READ_ONLY", "auto").lower()
+
+# Enrichment pipeline: rows per text-feature batch and new passages per
+# embedding batch (each batch is checkpointed)
+PIPELINE_BATCH_SIZE = 5000
+PIPELINE_EMBED_BATCH_SIZE = 10000
 
 # Models
 VECTOR_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
 
+# Vector index: "auto" (by corpus size), "flat", "ivf_flat", "ivf_pq" or "hnsw"
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+INDEX_AUTO_HNSW_MIN = 50_000      # auto: exact flat index below this size
+INDEX_AUTO_IVF_PQ_MIN = 2_000_000  # auto: IVF-PQ (about a third of flat size) from this size
+IVF_NLIST = 0                     # 0 = 4 * sqrt(n)
+IVF_NPROBE = 16
+PQ_M = 48                         # sub-quantizers (must divide the embedding dim)
+PQ_NBITS = 8
+PQ_REFINE_K_FACTOR = 32          # IVF-PQ: re-score k * this candidates on 8-bit vectors
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+# LLM backend for Q&A answers: "groq" (cloud API) or "ollama" (local,
+# Ollama-compatible HTTP API)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_STREAM = True          # render Q&A answers token by token
+LLM_QUEUE_TIMEOUT = 15.0   # seconds to wait for a free backend slot
 
 USE_GROQ = True
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # None = Groq API (set for a local stand-in)
+GROQ_CONNECT_TIMEOUT = 5.0   # seconds
+GROQ_READ_TIMEOUT = 30.0     # seconds between bytes of a response
+GROQ_MAX_CONNECTIONS = 10    # keep-alive pool of the shared client
+GROQ_MAX_RETRIES = 2         # retries after 429/5xx/connection errors
+GROQ_RETRY_BASE_DELAY = 0.5  # seconds; full-jitter exponential backoff
+GROQ_RETRY_MAX_DELAY = 4.0
+# Circuit breaker: fail fast after consecutive transient failures
+GROQ_BREAKER_FAILURES = 5
+GROQ_BREAKER_RESET = 30.0    # seconds before a trial request is let through
+GROQ_MAX_CONCURRENCY = 8     # simultaneous requests from this process
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
+OLLAMA_CONNECT_TIMEOUT = 3.0
+OLLAMA_READ_TIMEOUT = 120.0  # local models can be slow to produce the first token
+OLLAMA_MAX_RETRIES = 1
+OLLAMA_RETRY_BASE_DELAY = 1.0   # seconds; full-jitter exponential backoff
+OLLAMA_RETRY_MAX_DELAY = 8.0
+OLLAMA_BREAKER_FAILURES = 3     # a local server that keeps failing is likely down
+OLLAMA_BREAKER_RESET = 15.0
+OLLAMA_MAX_CONCURRENCY = 1   # a local model serves one request at a time
+
+# Machine translation of missing Speech_SQ (enrichment pipeline stage):
+# several statements per request, cached by content hash
+TRANSLATION_ENABLED = os.getenv("TRANSLATION_ENABLED", "1").lower() in ("1", "true", "yes")
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", LLM_BACKEND).lower()
+TRANSLATION_CACHE_PATH = CACHE_DIR / "translations.sqlite"
+TRANSLATION_BATCH_SIZE = 16           # statements per request
+TRANSLATION_BATCH_CHARS = 4000        # English characters per request
+TRANSLATION_MAX_TOKENS = 4096
+TRANSLATION_WORKERS = 4               # concurrent requests (capped by the backend)
+TRANSLATION_REQUESTS_PER_MINUTE = 30
+# Failed texts are retried after this delay, doubling per failure up to the max
+TRANSLATION_RETRY_AFTER = 3600.0
+TRANSLATION_RETRY_MAX = 7 * 24 * 3600.0
 
 
 # Q&A Settings
 MAX_QA_DOCS = 8
 MAX_CHARS_CONTEXT = 3500
+QA_MIN_SIMILARITY = 0.35  # cosine similarity below which a statement is not used as context
+QA_SCORE_MARGIN = 0.15    # adaptive k: keep statements within this margin of the best match
+# Passages: long statements are split into overlapping, sentence-aligned chunks
+PASSAGE_MAX_CHARS = 500
+PASSAGE_OVERLAP = 120
+# Hybrid retrieval: BM25 over Speech_SQ fused with dense results (reciprocal-rank fusion)
+QA_HYBRID = True
+QA_CANDIDATES = 20        # candidates per retriever before fusion
+BM25_K1 = 1.2
+BM25_B = 0.75
+QA_MIN_BM25 = 2.0         # lexical matches below this BM25 score are ignored
+RRF_K = 60
+# Query embedding cache (entries, seconds)
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 3600
+# Q&A answer cache (SQLite): entries expire after the TTL (seconds); least
+# recently used answers are evicted beyond the size limit
+ANSWER_CACHE_TTL = 7 * 24 * 3600
+ANSWER_CACHE_MAX_ENTRIES = 5000
+# Semantic question cache: reuse an answer when a new question's embedding is
+# at least this cosine-similar to a past one (same corpus and filters)
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 2000
+SEMANTIC_CACHE_TTL = 24 * 3600
 
 # Sentiment Thresholds
 SENTIMENT_POSITIVE_THRESHOLD = 0.05
 SENTIMENT_NEGATIVE_THRESHOLD = -0.05
+# Batch sentiment: worker processes (0 = all cores) and texts per chunk
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0"))
+SENTIMENT_CHUNK_SIZE = 2000
+
+# Article ingestion (ingest_articles.py)
+CRAWL_WORKERS = 8            # concurrent fetches
+CRAWL_PER_HOST = 2           # concurrent fetches per host
+CRAWL_HOST_INTERVAL = 1.0    # seconds between request starts to the same host
+CRAWL_CONNECT_TIMEOUT = 5.0
+CRAWL_READ_TIMEOUT = 20.0
+CRAWL_EXTRACT_WORKERS = 0    # trafilatura worker processes (0 = all cores)
 
 # Topic Modeling
 NUM_TOPICS = 5
 NUM_TOP_WORDS = 10
 TFIDF_MAX_FEATURES = 5000
 TFIDF_MIN_DF = 1
+# Refit NMF when this share of speeches was not seen at fit time
+TOPIC_REFIT_DRIFT = 0.25
 
 # Page Config
 PAGE_TITLE = "DIELLA AI"
@@ -4,7 +4,8 @@ import streamlit as st
 import pandas as pd
 from config import *
 from utils.data_loader import load_data
-from utils.vector_store import build_vector_store
+from utils.retrieval_service import start_warmup
+from utils.serving import load_serving_corpus, load_serving_passages, read_serving_manifest, serving_read_only
 from utils.visualization import *
 from tabs import (
     render_dashboard,
@@ -95,7 +96,11 @@ st.markdown(header_html, unsafe_allow_html=True)
 
 @st.cache_data
 def init_data():
-    df, err = load_data(DATA_PATH)
+    if serving_read_only():
+        # Vetëm lexim: artefaktet e publikuara nga build_artifacts.py
+        df, _, err = load_serving_corpus()
+    else:
+        df, err = load_data(DATA_PATH)
     if err:
         st.error(f"Error loading data: {err}")
         st.stop()
@@ -103,19 +108,18 @@ def init_data():
 
 
 @st.cache_resource
-def init_vector_store(df):
-    model, index = build_vector_store(df)
-    if model is None or index is None:
-        st.warning(
-            "Vector store could not be initialized. Q&A feature may not work."
-        )
-    return model, index
+def init_qa_service():
+    # Një shërbim Q&A për proces: modeli dhe indeksi ngrohen në sfond
+    # ndërsa përdoruesi sheh Dashboard-in; kthen fingerprint-in e korpusit
+    if serving_read_only():
+        manifest = read_serving_manifest()
+        passages = load_serving_passages(manifest) if manifest else None
+        return start_warmup(init_data(), passages, manifest)
+    return start_warmup(init_data())
 
 
 df = init_data()
-# Vector store ngarkohet vetëm kur përdoruesi përdor Q&A (lazy load), që faqja të ngarkojë shpejt
-model = st.session_state.get("qa_model")
-index = st.session_state.get("qa_index")
+qa_fingerprint = init_qa_service()
 
 # Pjesa nën header: titull + përshkrim (në linjë me dark theme)
 st.markdown(
@@ -175,6 +179,11 @@ date_to = st.sidebar.date_input(
     ),
 )
 
+# Filtrat e njëjtë kufizojnë edhe kërkimin vektorial te Q&A
+qa_filters = {"speaker": None if speaker == "Të gjithë" else speaker}
+if pd.api.types.is_datetime64_any_dtype(df["Date"]):
+    qa_filters.update(date_from=date_from, date_to=date_to)
+
 # Apply filters
 if not df.empty:
     df_filtered = df.copy()
@@ -213,7 +222,7 @@ with tab3:
 with tab4:
     render_speaker_comparison(df, speaker_list_raw)
 with tab5:
-    render_qa(df, init_vector_store)
+    render_qa(df, qa_fingerprint, qa_filters)
 with tab_eval:
     base_dir = Path(__file__).resolve().parent
     render_evaluation(base_dir, base_dir / DATA_PATH)
@@ -1,16 +1,26 @@
-import os
-import re
+# Run: python ingest_articles.py                   (fetch ARTICLES, archive HTML, append new rows)
+#      python ingest_articles.py --reextract       (rebuild rows from the HTML archive, no network)
+#      python ingest_articles.py --import-csv PATH (append the rows of an existing CSV)
+#      add --enrich to any of these to run the enrichment pipeline and publish serving artifacts
+# Rows go to the append-only store data/corpus.sqlite (DATA_PATH=data/corpus.sqlite to serve it).
+import argparse
 import datetime as dt
+import sys
 import requests
 import pandas as pd
 import trafilatura
-from collections import Counter
+from config import CORPUS_DB_PATH
+from utils.corpus_store import append_rows
+from utils.crawler import crawl, load_crawl_state, save_crawl_state
+from utils.html_archive import reextract
+from utils.tokenization import tokenize, top_keywords
 
 ARTICLES = [
     "https://apnews.com/article/albania-new-cabinet-program-ai-minister-diella-corruption-3aa58c801d69b5b295975cc68079a2d3",
     "https://www.abc.net.au/news/2025-09-19/ai-generated-minister-addresses-albanian-parliament/105791708",
 ]
-OUT_CSV = "data/diella_speeches.csv"
+OUT_DB = CORPUS_DB_PATH
+MIN_ARTICLE_CHARS = 400  # shorter extractions are treated as failed
 
 STOPWORDS = {
     "the","a","an","and","or","but","for","with","of","to","in","on","at","by","from","as","is","are","was","were","be","been","being",
@@ -20,10 +30,7 @@ STOPWORDS = {
 }
 
 def keywords_from_text(text: str, top_n: int = 8) -> str:
-    tokens = re.findall(r"[A-Za-zËëÇçÀ-ÖØ-öø-ÿ']+", text.lower())
-    words = [w for w in tokens if len(w) >= 3 and w not in STOPWORDS]
-    common = [w for w, _ in Counter(words).most_common(30)]
-    return ", ".join(common[:top_n])
+    return ", ".join(top_keywords(tokenize(text), top_n=top_n, stopwords=STOPWORDS))
 
 def fetch_html(url: str):
     html = trafilatura.fetch_url(url)  # some versions don't support timeout kwarg
@@ -41,9 +48,12 @@ def extract_article(url: str):
     downloaded = fetch_html(url)
     if not downloaded:
         return None
+    return extract_from_html(downloaded, url)
 
+def extract_from_html(downloaded: str, url: str, fetched_at: float = None):
+    """Row for an article page, or None if it has too little text (runs in worker processes)."""
     text = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
-    if not text or len(text) < 400:
+    if not text or len(text) < MIN_ARTICLE_CHARS:
         return None
 
     # Metadata (robust to trafilatura version differences)
@@ -66,35 +76,68 @@ def extract_article(url: str):
         pass
 
     if not date_iso:
-        date_iso = dt.date.today().isoformat()
+        fetched = dt.date.fromtimestamp(fetched_at) if fetched_at else dt.date.today()
+        date_iso = fetched.isoformat()
 
     kw = keywords_from_text(text)
     return {"Date": date_iso, "Speech": text, "Keywords": kw, "Source": url, "Title": title}
 
-def main():
+def save_rows(rows, by_source=True):
+    """Append rows to OUT_DB; by default a newer row for the same Source supersedes the old one."""
+    added = append_rows(rows, OUT_DB, by_source=by_source)
+    print(f"Stored {added} new rows in {OUT_DB} ({len(rows) - added} unchanged)")
+
+def report(results):
     rows = []
-    for url in ARTICLES:
-        art = extract_article(url)
-        if art:
-            rows.append(art)
+    for result in results:
+        if result["row"]:
+            rows.append(result["row"])
+        elif result["status"] == "unchanged":
+            print(f"Unchanged, skipped: {result['url']}")
         else:
-            print(f"Failed to extract: {url}")
+            print(f"Failed to extract: {result['url']}" + (f" ({result['error']})" if result["error"] else ""))
+    return rows
+
+def main():
+    state = load_crawl_state()
+    rows = report(crawl(ARTICLES, extract_from_html, state))
 
     if not rows:
-        print("No articles extracted.")
+        save_crawl_state(state)
+        print("No new articles extracted.")
         return
 
-    df_new = pd.DataFrame(rows)
-    if os.path.exists(OUT_CSV):
-        df_old = pd.read_csv(OUT_CSV)
-        df_all = pd.concat([df_old, df_new], ignore_index=True)
-        df_all.drop_duplicates(subset=["Source"], inplace=True)
-    else:
-        os.makedirs(os.path.dirname(OUT_CSV), exist_ok=True)
-        df_all = df_new
+    save_rows(rows)
+    save_crawl_state(state)
 
-    df_all.to_csv(OUT_CSV, index=False)
-    print(f"Saved {len(df_all)} rows to {OUT_CSV}")
+def main_reextract(workers: int = 0):
+    rows = report(reextract(extract_from_html, workers=workers))
+    if not rows:
+        print("No archived articles extracted.")
+        return
+    save_rows(rows)
+
+def main_import_csv(path: str):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    save_rows(df.to_dict("records"), by_source=False)  # a source can hold many statements
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=f"Ingest articles into {OUT_DB}")
+    parser.add_argument("--reextract", action="store_true", help="Rebuild rows from the HTML archive without fetching")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes for --reextract (0 = all cores)")
+    parser.add_argument("--import-csv", metavar="PATH", help="Append the rows of a corpus CSV (e.g. diella_speeches_clean.csv)")
+    parser.add_argument("--enrich", action="store_true", help="Then enrich the store and publish serving artifacts")
+    args = parser.parse_args()
+    if args.import_csv:
+        main_import_csv(args.import_csv)
+    elif args.reextract:
+        main_reextract(args.workers)
+    else:
+        main()
+    if args.enrich:
+        # Imported here: spawned extraction workers re-import this module
+        from utils.pipeline import run_pipeline
+        _, err = run_pipeline(str(OUT_DB))
+        if err:
+            print(f"Pipeline failed: {err}")
+            sys.exit(1)
@@ -0,0 +1,198 @@
+# ==========================================
+# DIELLA AI - BENCHMARK SCRIPT
+# ==========================================
+# Run: python run_benchmarks.py sentiment [--rows 20000] [--workers 1 2 4 8]
+#      python run_benchmarks.py faiss [--n 100000] [--types flat hnsw ivf_flat ivf_pq]
+#      python run_benchmarks.py bm25 [--repeat 1000]
+# - Sentiment: batch VADER throughput vs. number of worker processes
+#   (synthetic corpus built by repeating the statements of the main corpus)
+# - FAISS: build time, index size, recall@k against exact search and
+#   p50/p95 query latency per index type and nprobe/efSearch setting
+#   (synthetic clustered vectors with the embedding dimension)
+# - BM25: lexical index build time and p50/p95 query latency on the corpus
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_PATH
+from utils.chunking import build_passages
+from utils.data_loader import read_corpus
+from utils.lexical_index import bm25_search, build_lexical_index
+from utils.nlp_analysis import score_sentiment
+from utils.vector_store import configure_search, create_index, normalize_embeddings
+
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def _synthetic_corpus(n_rows: int) -> list:
+    """Repeat the English statements of the main corpus (CSV or store) up to n_rows texts."""
+    df, err = read_corpus(str(BASE_DIR / DATA_PATH))
+    if err:
+        raise SystemExit(f"Could not load data: {err}")
+    texts = df["Speech"].tolist() or ["Diella supports transparent public procurement."]
+    reps = -(-n_rows // len(texts))
+    return (texts * reps)[:n_rows]
+
+
+def benchmark_sentiment(n_rows: int, workers: list, chunk_size: int) -> pd.DataFrame:
+    """Time score_sentiment for each worker count; check results are identical."""
+    texts = _synthetic_corpus(n_rows)
+    rows = []
+    reference = None
+    for n_workers in workers:
+        start = time.perf_counter()
+        scores = score_sentiment(texts, n_workers=n_workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = scores
+        rows.append({
+            "workers": n_workers,
+            "seconds": round(elapsed, 3),
+            "texts_per_s": round(n_rows / elapsed, 1),
+            "identical": bool(np.array_equal(scores, reference)),
+        })
+    result = pd.DataFrame(rows)
+    result["speedup"] = (result["seconds"].iloc[0] / result["seconds"]).round(2)
+    return result
+
+
+def _synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit-length float32 vectors (sentence embeddings are far from uniform)."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(8, int(np.sqrt(n) / 4))
+    centers = rng.normal(size=(n_clusters, dim)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+    return normalize_embeddings(centers[labels] + 0.35 * rng.normal(size=(n, dim)))
+
+
+def benchmark_faiss(n: int, dim: int, n_queries: int, k: int, index_types: list,
+                    nprobes: list, ef_searches: list) -> pd.DataFrame:
+    """Compare index types against exact search on the same synthetic vectors."""
+    import faiss
+
+    data = _synthetic_vectors(n + n_queries, dim)
+    vectors, queries = data[:n], data[n:]
+    ids = np.arange(n, dtype="int64")
+
+    exact = faiss.IndexFlatIP(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = create_index(vectors, ids, index_type=index_type)
+        build_s = time.perf_counter() - start
+        size_mb = len(faiss.serialize_index(index)) / 2**20
+
+        base = faiss.downcast_index(index.index)
+        if faiss.try_extract_index_ivf(base) is not None:
+            settings = [("nprobe", p, {"nprobe": p}) for p in nprobes]
+        elif hasattr(base, "hnsw"):
+            settings = [("efSearch", e, {"ef_search": e}) for e in ef_searches]
+        else:
+            settings = [("-", "", {})]
+
+        for param, value, kwargs in settings:
+            configure_search(index, **kwargs)
+            latencies = np.empty(n_queries)
+            found = np.empty((n_queries, k), dtype="int64")
+            for i in range(n_queries):
+                t0 = time.perf_counter()
+                _, found[i] = index.search(queries[i:i + 1], k)
+                latencies[i] = time.perf_counter() - t0
+            hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+            rows.append({
+                "type": type(base).__name__,
+                "param": param,
+                "value": value,
+                "build_s": round(build_s, 2),
+                "size_mb": round(size_mb, 1),
+                f"recall@{k}": round(hits / (n_queries * k), 3),
+                "p50_ms": round(np.percentile(latencies, 50) * 1e3, 3),
+                "p95_ms": round(np.percentile(latencies, 95) * 1e3, 3),
+            })
+    return pd.DataFrame(rows)
+
+
+def benchmark_bm25(repeat: int) -> pd.DataFrame:
+    """Time BM25 index build and per-query search on the main corpus."""
+    df, err = read_corpus(str(BASE_DIR / DATA_PATH))
+    if err:
+        raise SystemExit(f"Could not load data: {err}")
+    passages = build_passages(df)
+    start = time.perf_counter()
+    index = build_lexical_index(passages)
+    build_s = time.perf_counter() - start
+
+    queries = [
+        "Cfare tha Diella per prokurimet publike?",
+        "tenderi i prokurimit",
+        "Edi Rama korrupsioni",
+        "transparenca 2025",
+    ]
+    rows = []
+    for query in queries:
+        latencies = np.empty(repeat)
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            positions, _ = bm25_search(index, query, k=20)
+            latencies[i] = time.perf_counter() - t0
+        rows.append({
+            "query": query,
+            "hits": len(positions),
+            "p50_ms": round(np.percentile(latencies, 50) * 1e3, 4),
+            "p95_ms": round(np.percentile(latencies, 95) * 1e3, 4),
+        })
+    print(f"BM25 index: {len(passages)} passages, {len(index['terms'])} terms, "
+          f"{len(index['doc_ids'])} postings, built in {build_s * 1e3:.1f} ms")
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DIELLA AI benchmarks.")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p_sent = sub.add_parser("sentiment", help="Batch sentiment scaling with cores")
+    p_sent.add_argument("--rows", type=int, default=20000)
+    p_sent.add_argument("--workers", type=int, nargs="+", default=None)
+    p_sent.add_argument("--chunk-size", type=int, default=500)
+
+    p_faiss = sub.add_parser("faiss", help="Vector index types: recall, latency, size")
+    p_faiss.add_argument("--n", type=int, default=100000)
+    p_faiss.add_argument("--dim", type=int, default=384)
+    p_faiss.add_argument("--queries", type=int, default=200)
+    p_faiss.add_argument("--k", type=int, default=10)
+    p_faiss.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivf_flat", "ivf_pq"])
+    p_faiss.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    p_faiss.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+
+    p_bm25 = sub.add_parser("bm25", help="Lexical (BM25) query latency")
+    p_bm25.add_argument("--repeat", type=int, default=1000)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "sentiment":
+        cores = os.cpu_count() or 1
+        workers = args.workers or sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+        print(f"Sentiment benchmark: {args.rows} texts, chunk size {args.chunk_size}, {cores} cores")
+        print(benchmark_sentiment(args.rows, workers, args.chunk_size).to_string(index=False))
+
+    elif args.benchmark == "faiss":
+        print(f"FAISS benchmark: {args.n} vectors x {args.dim} dims, "
+              f"{args.queries} queries, k={args.k}")
+        print(benchmark_faiss(args.n, args.dim, args.queries, args.k, args.types,
+                              args.nprobe, args.ef_search).to_string(index=False))
+
+    elif args.benchmark == "bm25":
+        print(benchmark_bm25(args.repeat).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,16 @@
 # ==========================================
 # Run: python run_evaluation.py
 # - Sentiment: accuracy, F1, confusion matrix (requires evaluation_sentiment_gold.csv)
-# - Topic coherence: NPMI on NMF topics (uses main data CSV)
+# - Topic coherence: NPMI on NMF topics (uses main data CSV; --window N for
+#   sliding-window co-occurrence instead of document-level)
 
+import argparse
 import json
-import re
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.metrics import (
     accuracy_score,
     f1_score,
@@ -20,7 +22,9 @@ from sklearn.metrics import (
 
 from config import DATA_PATH
 from utils.data_loader import load_data
+from utils.serving import load_serving_corpus, serving_read_only
 from utils.nlp_analysis import add_sentiment, get_nmf_artifacts_and_top_words
+from utils.tokenization import doc_term_matrix, token_ids, tokenize_corpus
 
 
 # ---------- Paths ----------
@@ -41,13 +45,6 @@ def _normalize_label(s: str) -> str:
     return "Neutral"
 
 
-def _tokenize_for_coherence(text: str) -> set:
-    """Tokenize like TF-IDF (word chars only, lower)."""
-    if pd.isna(text) or not text:
-        return set()
-    return set(re.findall(r"\b[a-z]+\b", str(text).lower()))
-
-
 def evaluate_sentiment(gold_path: Path) -> dict | None:
     """
     Load gold CSV (columns: Speech, GoldLabel), run VADER, compute metrics.
@@ -94,74 +91,174 @@ def evaluate_sentiment(gold_path: Path) -> dict | None:
     return results
 
 
-def compute_topic_coherence_npmi(df: pd.DataFrame, speech_col: str = "Speech") -> float | None:
+def _window_term_matrix(ids: np.ndarray, offsets: np.ndarray, columns: np.ndarray, window: int) -> sparse.csr_matrix:
     """
-    Document-level NPMI coherence for NMF topics.
-    Returns mean coherence over topics (higher = more coherent).
+    Binary window-term matrix: one row per sliding window of `window` tokens.
+    Documents shorter than the window count as a single window.
+    """
+    lookup = np.full(int(max(ids.max(initial=0), columns.max(initial=0))) + 1, -1, dtype=np.int64)
+    valid = columns >= 0
+    lookup[columns[valid]] = np.flatnonzero(valid)
+
+    rows, cols = [], []
+    n_windows = 0
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        if end == start:
+            continue
+        doc = lookup[ids[start:end]]
+        if len(doc) <= window:
+            windows = doc[None, :]
+        else:
+            windows = np.lib.stride_tricks.sliding_window_view(doc, window)
+        r, c = np.nonzero(windows >= 0)
+        rows.append(r + n_windows)
+        cols.append(windows[r, c])
+        n_windows += len(windows)
+
+    if not rows:
+        return sparse.csr_matrix((n_windows, len(columns)), dtype=np.int32)
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(n_windows, len(columns)),
+    )
+    matrix.data[:] = 1  # a word repeated inside a window counts once
+    return matrix
+
+
+def compute_topic_coherence_scores(
+    df: pd.DataFrame,
+    speech_col: str = "Speech",
+    top_words_per_topic: list | None = None,
+    window: int | None = None,
+) -> dict | None:
+    """
+    NPMI coherence for NMF topics, per topic and averaged.
+    Co-occurrence is counted over documents (window=None) or over sliding
+    windows of `window` tokens. All pairwise counts come from one sparse
+    product of a binary unit-term matrix restricted to the topics' top words.
     """
-    vec, nmf, top_words_per_topic = get_nmf_artifacts_and_top_words(df, speech_col)
-    if vec is None or not top_words_per_topic:
+    if top_words_per_topic is None:
+        _, _, top_words_per_topic = get_nmf_artifacts_and_top_words(df, speech_col)
+    if not top_words_per_topic:
         return None
 
-    # Tokenized corpus: one set of words per document
-    corpus = [
-        _tokenize_for_coherence(text)
-        for text in df[speech_col].fillna("").astype(str)
-    ]
-    D = len(corpus)
-    if D == 0:
+    texts = df[speech_col].fillna("").astype(str).tolist()
+    if len(texts) == 0:
         return None
 
-    def doc_count(word: str) -> int:
-        return sum(1 for doc in corpus if word in doc)
+    topics = [[w for w in words if w] for words in top_words_per_topic]
+    vocabulary = sorted({w for words in topics for w in words})
+    word_index = {w: i for i, w in enumerate(vocabulary)}
+
+    # Shared tokenizer (cached token ids); columns = topic words
+    ids, offsets = tokenize_corpus(texts, lang="en")
+    columns = token_ids(vocabulary)
+    if window:
+        units = _window_term_matrix(ids, offsets, columns, int(window))
+    else:
+        units = doc_term_matrix(ids, offsets, columns=columns, binary=True)
+    D = units.shape[0]
+    if D == 0:
+        return None
 
-    def doc_count_pair(w1: str, w2: str) -> int:
-        return sum(1 for doc in corpus if w1 in doc and w2 in doc)
+    # Joint counts for every pair of topic words (diagonal = single counts)
+    units = units.tocsc().astype(np.float64)
+    joint = (units.T @ units).toarray() / D
+    single = np.diag(joint)
 
     eps = 1e-10
-    npmi_scores = []
-    for words in top_words_per_topic:
-        words = [w for w in words if w]
+    per_topic = []
+    scores = []
+    for topic_id, words in enumerate(topics):
         if len(words) < 2:
+            per_topic.append({"topic": topic_id, "npmi": None, "top_words": ", ".join(words)})
             continue
-        pair_npmi = []
-        for i in range(len(words)):
-            for j in range(i + 1, len(words)):
-                wi, wj = words[i], words[j]
-                c_i = doc_count(wi) / D
-                c_j = doc_count(wj) / D
-                c_ij = doc_count_pair(wi, wj) / D
-                c_i = max(c_i, eps)
-                c_j = max(c_j, eps)
-                c_ij = max(c_ij, eps)
-                pmi = np.log(c_ij) - np.log(c_i) - np.log(c_j)
-                npmi = pmi / (-np.log(c_ij)) if c_ij < 1 else 0.0
-                pair_npmi.append(npmi)
-        if pair_npmi:
-            npmi_scores.append(np.mean(pair_npmi))
-
-    if not npmi_scores:
+        idx = np.array([word_index[w] for w in words])
+        i, j = np.triu_indices(len(idx), k=1)
+        c_i = np.maximum(single[idx[i]], eps)
+        c_j = np.maximum(single[idx[j]], eps)
+        c_ij = np.maximum(joint[idx[i], idx[j]], eps)
+        pmi = np.log(c_ij) - np.log(c_i) - np.log(c_j)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            npmi = np.where(c_ij < 1, pmi / -np.log(c_ij), 0.0)
+        scores.append(float(np.mean(npmi)))
+        per_topic.append({
+            "topic": topic_id,
+            "npmi": round(scores[-1], 4),
+            "top_words": ", ".join(words),
+        })
+
+    if not scores:
         return None
-    return float(np.mean(npmi_scores))
+    return {
+        "npmi_mean": float(np.mean(scores)),
+        "npmi_per_topic": per_topic,
+        "n_units": D,
+        "window": int(window) if window else "document",
+    }
 
 
-def run_topic_coherence(data_path: Path) -> dict | None:
-    """Load main data via app's load_data (same CSV parsing), fit NMF, return coherence."""
-    if not data_path.exists():
+def compute_topic_coherence_npmi(
+    df: pd.DataFrame,
+    speech_col: str = "Speech",
+    top_words_per_topic: list | None = None,
+    window: int | None = None,
+) -> float | None:
+    """
+    NPMI coherence for NMF topics (document-level unless a window is given).
+    Uses the shared topic model's top words unless they are passed in.
+    Returns mean coherence over topics (higher = more coherent).
+    """
+    scores = compute_topic_coherence_scores(df, speech_col, top_words_per_topic, window)
+    if scores is None:
+        return None
+    return scores["npmi_mean"]
+
+
+def run_topic_coherence(data_path: Path, window: int | None = None) -> dict | None:
+    """
+    Load main data the way the app does (published serving artifacts when
+    read-only, otherwise load_data), reuse the shared NMF topic model,
+    return coherence over the full corpus.
+    """
+    if serving_read_only():
+        df, _, err = load_serving_corpus()
+    elif not data_path.exists():
         print(f"Data file not found: {data_path}")
         return None
-    df, err = load_data(str(data_path))
+    else:
+        df, err = load_data(str(data_path))
     if err or df is None or df.empty:
         print(f"Could not load data: {err or 'empty'}")
         return None
-    df = df.head(500)
-    coherence = compute_topic_coherence_npmi(df)
-    if coherence is None:
+    _, _, top_words_per_topic = get_nmf_artifacts_and_top_words(df)
+    scores = compute_topic_coherence_scores(
+        df, top_words_per_topic=top_words_per_topic, window=window
+    )
+    if scores is None:
         return None
-    return {"topic_coherence": {"npmi_mean": round(coherence, 4), "n_docs_used": len(df)}}
+    return {
+        "topic_coherence": {
+            "npmi_mean": round(scores["npmi_mean"], 4),
+            "npmi_per_topic": scores["npmi_per_topic"],
+            "window": scores["window"],
+            "n_docs_used": len(df),
+        }
+    }
 
 
 def main():
+    parser = argparse.ArgumentParser(description="DIELLA AI evaluation.")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help="Sliding-window size (tokens) for NPMI; default is document-level",
+    )
+    args = parser.parse_args()
+
     results = {}
 
     # ----- Sentiment -----
@@ -180,10 +277,12 @@ def main():
     # ----- Topic coherence -----
     print("\nRunning topic coherence (NPMI)...")
     data_path = BASE_DIR / DATA_PATH
-    coh = run_topic_coherence(data_path)
+    coh = run_topic_coherence(data_path, window=args.window)
     if coh:
         results.setdefault("topic_coherence", {}).update(coh["topic_coherence"])
-        print(f"NPMI coherence: {coh['topic_coherence']['npmi_mean']}")
+        print(f"NPMI coherence ({coh['topic_coherence']['window']}): {coh['topic_coherence']['npmi_mean']}")
+        for t in coh["topic_coherence"]["npmi_per_topic"]:
+            print(f"  Topic {t['topic']}: {t['npmi']}  ({t['top_words']})")
 
     if results:
         with open(RESULTS_FILE, "w", encoding="utf-8") as f:
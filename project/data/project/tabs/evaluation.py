@@ -68,3 +68,11 @@ def render(base_dir, data_path=None):
             st.metric("NPMI (mesatare)", f"{tc.get('npmi_mean', 0):.4f}")
             if "n_docs_used" in tc:
                 st.caption(f"Dokumente të përdorura: {tc['n_docs_used']}")
+            if tc.get("npmi_per_topic"):
+                st.dataframe(
+                    pd.DataFrame(tc["npmi_per_topic"]).rename(
+                        columns={"topic": "ID Temë", "npmi": "NPMI", "top_words": "Fjalëkyçe"}
+                    ),
+                    use_container_width=True,
+                    hide_index=True,
+                )
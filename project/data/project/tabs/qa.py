@@ -1,11 +1,17 @@
 # Q&A tab
 import html
+import time
 import streamlit as st
-from config import GROQ_API_KEY, GROQ_MODEL, MAX_QA_DOCS, MAX_CHARS_CONTEXT
+from config import LLM_STREAM, MAX_QA_DOCS, MAX_CHARS_CONTEXT, QA_HYBRID
+from utils.answer_cache import answer_cache_key, get_answer_cache
+from utils.llm_backends import PROMPT_VERSION, get_llm_backend
+from utils.metadata_filter import bitmap_count
 from utils.ollama_integration import build_qa_context
+from utils.retrieval_service import get_filter_bitmap, get_lexical, get_passages, get_retrieval, is_ready
+from utils.semantic_cache import cache_scope, get_semantic_cache
 
 
-def render(df, init_vector_store):
+def render(df, qa_fingerprint, filters=None):
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
     if "selected_query" not in st.session_state:
@@ -24,24 +30,49 @@ def render(df, init_vector_store):
         })
         st.session_state.chat_initialized = True
 
-    _render_chat_ui()
-    _handle_chat_actions(df, init_vector_store)
+    id_bitmap = get_filter_bitmap(qa_fingerprint, **(filters or {}))
+    if id_bitmap is not None and bitmap_count(id_bitmap) == len(df):
+        id_bitmap = None  # filters keep every statement: plain search
+    stream_slot = _render_chat_ui(df, id_bitmap)
+    _handle_chat_actions(df, qa_fingerprint, id_bitmap, stream_slot)
 
 
-def _render_chat_ui():
+def _bubble_html(role, content, cached=False):
+    escaped = html.escape(str(content)).replace("\n", "<br>")
+    role_class = "user" if role == "user" else "ai"
+    label = "Ti" if role == "user" else "DIELLA AI"
+    if cached == "semantic":
+        label += " · nga cache (pyetje e ngjashme)"
+    elif cached:
+        label += " · nga cache"
+    return f"<div class=\"chat-message {role_class}\"><div><div class=\"chat-label\">{label}</div><div class=\"chat-bubble {role_class}\">{escaped}</div></div></div>"
+
+
+def _render_chat_ui(df, id_bitmap):
     st.markdown(_CHAT_CSS, unsafe_allow_html=True)
     st.subheader("Bisedo me DIELLA AI")
     with st.expander("Si funksionon?", expanded=False):
-        st.markdown("Pyetja kërkohet në korpusin e deklaratave përmes kërkimit vektorial (SentenceTransformer, FAISS). Deklaratat më të ngjashme dërgohen te Groq për përgjigje (RAG).")
-    if not GROQ_API_KEY or not str(GROQ_API_KEY).strip():
-        st.warning("Q&A nuk është i konfiguruar. Vendosni GROQ_API_KEY në .env.")
-        return
+        st.markdown("Deklaratat e gjata ndahen në pasazhe që mbivendosen; pyetja kërkohet në pasazhe përmes kërkimit vektorial (SentenceTransformer, FAISS) dhe kërkimit me fjalë kyçe (BM25), të kombinuara me reciprocal-rank fusion. Vetëm pasazhet mjaftueshëm të ngjashme (ngjashmëri kosinus mbi pragun) dërgohen te modeli gjuhësor (Groq ose një model lokal përmes Ollama) për përgjigje (RAG).")
+    _, backend_err = get_llm_backend()
+    if backend_err:
+        st.warning(backend_err)
+        return None
+    if id_bitmap is not None:
+        st.caption(f"Kërkimi kufizohet te {bitmap_count(id_bitmap)} nga {len(df)} deklarata sipas filtrave (folës/datë).")
     st.markdown("<div class=\"chat-container\">", unsafe_allow_html=True)
-    for msg in st.session_state.chat_history:
-        escaped = html.escape(str(msg["content"])).replace("\n", "<br>")
-        role_class = "user" if msg["role"] == "user" else "ai"
-        label = "Ti" if msg["role"] == "user" else "DIELLA AI"
-        st.markdown(f"<div class=\"chat-message {role_class}\"><div><div class=\"chat-label\">{label}</div><div class=\"chat-bubble {role_class}\">{escaped}</div></div></div>", unsafe_allow_html=True)
+    # The pending answer's bubble is an st.empty() slot so it can be streamed into
+    stream_slot = None
+    history = st.session_state.chat_history
+    for idx, msg in enumerate(history):
+        if idx == len(history) - 1 and msg["role"] == "assistant" and st.session_state.get("pending_in_progress", False):
+            stream_slot = st.empty()
+            stream_slot.markdown(_bubble_html(msg["role"], msg["content"]), unsafe_allow_html=True)
+            continue
+        st.markdown(_bubble_html(msg["role"], msg["content"], msg.get("cached", False)), unsafe_allow_html=True)
+        if msg.get("sources"):
+            with st.expander("Burimet e gjetura", expanded=False):
+                for s in msg["sources"]:
+                    st.markdown(f"**{s['speaker']}** ({s['date']}) · {_match_label(s)}\n\n{s['text']}\n\n---")
     show_sugg = (len(st.session_state.chat_history) == 1 or (st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant")) and not st.session_state.get("pending_in_progress", False)
     if show_sugg:
         st.markdown("<div class=\"chat-suggestions-container\">", unsafe_allow_html=True)
@@ -69,9 +100,55 @@ def _render_chat_ui():
         st.session_state.pending_query = query_shqip
         st.session_state.pending_in_progress = False
         st.rerun()
+    return stream_slot
+
+
+def _set_answer(content, sources=None, cached=False):
+    message = {"role": "assistant", "content": content, "sources": sources or [], "cached": cached}
+    if st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant":
+        st.session_state.chat_history[-1].update(message)
+    else:
+        st.session_state.chat_history.append(message)
+
 
+def _generate_answer(query, context_text, sources, backend, stream_slot):
+    """
+    LLM answer; streamed into the pending bubble when possible.
 
-def _handle_chat_actions(df, init_vector_store):
+    Returns:
+        tuple: (text to show, sources, error_message or None). When a
+        stream fails partway the text is the partial answer plus the error
+    """
+    from utils.llm_backends import generate_qa_response, stream_qa_response
+    if not LLM_STREAM or stream_slot is None:
+        with st.spinner("DIELLA AI po arsyeton..."):
+            return generate_qa_response(query, context_text, sources, backend)
+
+    with st.spinner("DIELLA AI po arsyeton..."):
+        chunks, sources, err = stream_qa_response(query, context_text, sources, backend)
+    if err:
+        return err, [], err
+    text = ""
+    last_refresh = 0.0
+    try:
+        for chunk in chunks:
+            text += chunk
+            now = time.monotonic()
+            if now - last_refresh >= _STREAM_REFRESH_S:
+                stream_slot.markdown(_bubble_html("assistant", text + " ▌"), unsafe_allow_html=True)
+                last_refresh = now
+    except Exception as e:
+        error_msg = f"Gabim gjatë komunikimit me {backend.label}: {str(e)}"
+        if not text.strip():
+            return error_msg, [], error_msg
+        text += f"\n\n({error_msg})"
+        stream_slot.markdown(_bubble_html("assistant", text), unsafe_allow_html=True)
+        return text.strip(), sources, error_msg
+    stream_slot.markdown(_bubble_html("assistant", text), unsafe_allow_html=True)
+    return text.strip(), sources, None
+
+
+def _handle_chat_actions(df, qa_fingerprint, id_bitmap=None, stream_slot=None):
     if st.session_state.get("pending_query") and not st.session_state.get("pending_in_progress", False):
         q = st.session_state.pending_query
         if not any(m.get("role") == "user" and m.get("content") == q for m in st.session_state.chat_history):
@@ -82,53 +159,80 @@ def _handle_chat_actions(df, init_vector_store):
     if not st.session_state.get("pending_query") or not st.session_state.get("pending_in_progress", False):
         return
     query_to_process = st.session_state.pending_query
-    _model, _index = st.session_state.get("qa_model"), st.session_state.get("qa_index")
-    if _model is None or _index is None:
+    if is_ready(qa_fingerprint):
+        model, index, load_err = get_retrieval(qa_fingerprint)
+    else:
         with st.spinner("Duke ngarkuar Q&A..."):
-            _model, _index = init_vector_store(df)
-            st.session_state["qa_model"] = _model
-            st.session_state["qa_index"] = _index
-    model, index = _model, _index
-    with st.spinner("Po kerkoj..."):
-        if model is None or index is None:
-            err = "Baza vektoriale nuk eshte gati."
-            if st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant":
-                st.session_state.chat_history[-1]["content"] = err
-            else:
-                st.session_state.chat_history.append({"role": "assistant", "content": err})
-            st.error(err)
-        else:
-            context_text, sources = build_qa_context(query_to_process, model, index, df, max_docs=MAX_QA_DOCS, max_chars=MAX_CHARS_CONTEXT)
-            if not sources:
-                w = "Nuk u gjeten burime."
-                if st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant":
-                    st.session_state.chat_history[-1]["content"] = w
-                else:
-                    st.session_state.chat_history.append({"role": "assistant", "content": w})
-                st.warning(w)
-            else:
-                with st.spinner("DIELLA AI po arsyeton..."):
-                    from utils.groq_integration import generate_qa_response_groq
-                    response_text, sources = generate_qa_response_groq(query_to_process, context_text, sources, GROQ_API_KEY, GROQ_MODEL)
-                    if response_text.startswith("Gabim"):
-                        if st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant":
-                            st.session_state.chat_history[-1]["content"] = response_text
-                        else:
-                            st.session_state.chat_history.append({"role": "assistant", "content": response_text})
-                        st.error(response_text)
-                    else:
-                        if st.session_state.chat_history and st.session_state.chat_history[-1]["role"] == "assistant":
-                            st.session_state.chat_history[-1]["content"] = response_text
-                        else:
-                            st.session_state.chat_history.append({"role": "assistant", "content": response_text})
-                        with st.expander("Burimet e gjetura", expanded=False):
-                            for s in sources:
-                                st.markdown(f"**{s['speaker']}** ({s['date']})\n\n{s['text']}\n\n---")
+            model, index, load_err = get_retrieval(qa_fingerprint)
+    if model is None or index is None:
+        err = "Baza vektoriale nuk eshte gati."
+        if load_err:
+            print(f"Q&A service error: {load_err}")
+        _set_answer(err)
+        st.error(err)
+    else:
+        _answer_query(query_to_process, model, index, df, qa_fingerprint, id_bitmap, stream_slot)
     st.session_state.pending_query = None
     st.session_state.pending_in_progress = False
     st.rerun()
 
 
+def _answer_query(query, model, index, df, qa_fingerprint, id_bitmap, stream_slot):
+    """Answer from the semantic cache, the answer cache, or retrieval + LLM."""
+    backend, backend_err = get_llm_backend()
+    if backend_err:
+        _set_answer(backend_err)
+        st.error(backend_err)
+        return
+    semantic_cache = get_semantic_cache(qa_fingerprint)
+    scope = cache_scope(id_bitmap, backend.cache_id, PROMPT_VERSION)
+    similar = semantic_cache.lookup(model, query, scope)
+    if similar is not None:
+        _set_answer(similar["answer"], similar["sources"], cached="semantic")
+        return
+
+    with st.spinner("Po kerkoj..."):
+        lexical_index = get_lexical(qa_fingerprint) if QA_HYBRID else None
+        context_text, sources = build_qa_context(query, model, index, df, max_docs=MAX_QA_DOCS, max_chars=MAX_CHARS_CONTEXT, id_bitmap=id_bitmap, lexical_index=lexical_index, passages=get_passages(qa_fingerprint))
+    if not sources:
+        w = "Nuk u gjeten burime."
+        _set_answer(w)
+        st.warning(w)
+        return
+
+    answer_cache = get_answer_cache(qa_fingerprint)
+    cache_key = answer_cache_key(query, sources, backend.cache_id, PROMPT_VERSION)
+    cached = answer_cache.get(cache_key) if answer_cache else None
+    if cached is not None:
+        _set_answer(cached[0], cached[1], cached=True)
+        semantic_cache.add(model, query, cached[0], cached[1], scope)
+        return
+
+    response_text, sources, err = _generate_answer(query, context_text, sources, backend, stream_slot)
+    if err:
+        # Failed or cut short: shown (with any partial answer) but never cached
+        _set_answer(response_text, sources)
+        st.error(err)
+        return
+    _set_answer(response_text, sources)
+    if sources:
+        semantic_cache.add(model, query, response_text, sources, scope)
+        if answer_cache:
+            answer_cache.put(cache_key, response_text, sources)
+
+
+def _match_label(source):
+    parts = []
+    if source.get("score") is not None:
+        parts.append(f"ngjashmëria {source['score']:.2f}")
+    if source.get("bm25") is not None:
+        parts.append(f"BM25 {source['bm25']:.1f}")
+    return " · ".join(parts)
+
+
+# Minimum seconds between re-renders of a streaming answer
+_STREAM_REFRESH_S = 0.05
+
 _SUGGESTIONS = [
     "Cfare tha Diella per prokurimet publike?",
     "Cili eshte toni i deklaratave te Dielles?",
@@ -0,0 +1,6 @@
+# Tests run from the project folder: python -m pytest tests
+# (modules import config and utils as top-level packages, like the app)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,34 @@
+# Append-only corpus store: per-document dedup and latest-row reads
+from utils.corpus_store import append_rows, read_store, store_version
+
+URL = "https://example.com/a"
+
+
+def _article(speech, source=URL):
+    return {"Date": "2025-10-01", "Speech": speech, "Source": source, "Title": "Titulli"}
+
+
+def test_unchanged_rows_are_skipped(tmp_path):
+    path = tmp_path / "corpus.sqlite"
+    assert append_rows([_article("A"), _article("A")], path, by_source=True) == 1
+    version = store_version(path)
+    assert append_rows([_article("A")], path, by_source=True) == 0
+    assert store_version(path) == version
+
+
+def test_change_back_to_earlier_content(tmp_path):
+    path = tmp_path / "corpus.sqlite"
+    for speech in ["A", "B", "A"]:
+        assert append_rows([_article(speech)], path, by_source=True) == 1
+    df = read_store(path)
+    assert df["Speech"].tolist() == ["A"]
+    assert df["DocKey"].tolist() == [URL]
+
+
+def test_same_content_in_other_documents(tmp_path):
+    path = tmp_path / "corpus.sqlite"
+    rows = [_article("A"), _article("A", "https://example.com/b")]
+    # Rows without a document key are keyed by content, so repeats dedup
+    assert append_rows(rows + [{"Speech": "C"}, {"Speech": "C"}], path, by_source=True) == 3
+    assert read_store(path)["Speech"].tolist() == ["A", "A", "C"]
+
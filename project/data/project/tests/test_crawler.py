@@ -0,0 +1,164 @@
+# Crawler against a local HTTP server, and the frontier with a fake clock
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.crawler import Frontier, crawl
+
+ETAG = '"v1"'
+
+
+def extract_title(html, url):
+    """Extraction runs in spawned processes, so it lives at module level."""
+    title = html.split("<h1>")[1].split("</h1>")[0] if "<h1>" in html else ""
+    return {"url": url, "title": title} if title else None
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """
+    /etag/<name>:  page with an ETag; If-None-Match with it gets a 304
+    /plain/<name>: same body every time, no validators
+    /slow/<name>:  page sent after a delay
+    /empty:        page without a title
+    anything else: 404
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body="", headers=None):
+        data = body.encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+        kind, _, name = self.path.strip("/").partition("/")
+        page = f"<html><h1>{name}</h1></html>"
+        if kind == "etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                return self._send(304)
+            return self._send(200, page, {"ETag": ETAG})
+        if kind == "plain":
+            return self._send(200, page)
+        if kind == "slow":
+            time.sleep(0.3)
+            return self._send(200, page)
+        if kind == "empty":
+            return self._send(200, "<html></html>")
+        return self._send(404, "not found")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    httpd.requests, httpd.lock = [], threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _crawl(urls, state=None, **kwargs):
+    options = dict(workers=4, per_host=4, host_interval=0.0, extract_workers=1, archive_dir=None)
+    options.update(kwargs)
+    return crawl(urls, extract_title, state, **options)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_frontier_per_host_cap():
+    frontier = Frontier(per_host=1, host_interval=0.0)
+    for url in ["http://a/1", "http://a/2", "http://b/1"]:
+        frontier.add(url)
+    assert frontier.get() == "http://a/1"
+    # a is at its cap, so b goes next
+    assert frontier.get() == "http://b/1"
+
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(frontier.get()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive() and not got
+    frontier.done("http://a/1")
+    waiter.join(2)
+    assert got == ["http://a/2"]
+
+    frontier.done("http://b/1")
+    frontier.done("http://a/2")
+    assert frontier.get() is None
+
+
+def test_frontier_host_spacing():
+    clock = _Clock()
+    frontier = Frontier(per_host=2, host_interval=10.0, clock=clock)
+    for url in ["http://a/1", "http://a/2", "http://b/1"]:
+        frontier.add(url)
+    assert frontier.get() == "http://a/1"
+    # a is under its cap but started a request less than 10 s ago
+    assert frontier.get() == "http://b/1"
+    clock.now = 10.0
+    assert frontier.get() == "http://a/2"
+
+
+def test_frontier_drops_fragments_and_repeats():
+    frontier = Frontier()
+    assert frontier.add("http://a/1#top")
+    assert not frontier.add("http://a/1")
+    assert not frontier.add(" http://a/1#other ")
+    assert frontier.add("http://a/2")
+    assert [frontier.get(), frontier.get()] == ["http://a/1", "http://a/2"]
+
+
+def test_crawl_extracts_and_reports(server):
+    urls = [f"{server.url}/etag/a", f"{server.url}/empty", f"{server.url}/missing"]
+    results = _crawl(urls, state={})
+    assert [r["status"] for r in results] == ["extracted", "empty", "failed"]
+    assert results[0]["row"] == {"url": urls[0], "title": "a"}
+    assert results[2]["error"] == "HTTP 404"
+
+
+def test_unchanged_pages_are_skipped(server):
+    urls = [f"{server.url}/etag/a", f"{server.url}/plain/b"]
+    state = {}
+    assert [r["status"] for r in _crawl(urls, state)] == ["extracted", "extracted"]
+    assert state[urls[0]]["etag"] == ETAG
+    assert state[urls[1]]["etag"] is None
+
+    # The ETag page answers 304; the page without validators has the same hash
+    results = _crawl(urls, state)
+    assert [r["status"] for r in results] == ["unchanged", "unchanged"]
+    assert all(r["row"] is None for r in results)
+    assert len(server.requests) == 4
+
+
+def test_fragments_are_fetched_once(server):
+    urls = [f"{server.url}/plain/a", f"{server.url}/plain/a#part", f"{server.url}/plain/b#x"]
+    results = _crawl(urls)
+    assert [r["url"] for r in results] == [f"{server.url}/plain/a", f"{server.url}/plain/b"]
+    assert sorted(server.requests) == ["/plain/a", "/plain/b"]
+
+
+def test_results_keep_input_order(server):
+    # The slow page finishes last but was asked for first
+    urls = [f"{server.url}/slow/a", f"{server.url}/plain/b", f"{server.url}/plain/c"]
+    results = _crawl(urls)
+    assert [r["url"] for r in results] == urls
+    assert [r["row"]["title"] for r in results] == ["a", "b", "c"]
@@ -0,0 +1,165 @@
+# Groq client against a local stand-in of the OpenAI-compatible API
+# (reached through GROQ_BASE_URL; the real API is never called)
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from groq import APIStatusError
+
+from utils import groq_integration
+from utils.llm_backends import GroqBackend
+from utils.resilience import CircuitBreaker, CircuitOpenError
+
+WORDS = ["Përgjigje ", "nga ", "Groq"]
+
+
+class _CompletionsHandler(BaseHTTPRequestHandler):
+    """
+    /openai/v1/chat/completions: replies follow server.plan ("ok", "400",
+    "503" or "429:<seconds>" with a Retry-After header; default "ok").
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, delta):
+        return {
+            "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "test-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append(body)
+            self.server.ports.add(self.client_address[1])
+            reply = self.server.plan.pop(0) if self.server.plan else "ok"
+        if reply == "400":
+            return self._send_json(400, {"error": {"message": "bad request", "type": "invalid_request_error"}})
+        if reply == "503":
+            return self._send_json(503, {"error": {"message": "overloaded"}})
+        if reply.startswith("429"):
+            return self._send_json(429, {"error": {"message": "rate limited"}},
+                                   {"Retry-After": reply.split(":")[1]})
+        if not body.get("stream"):
+            return self._send_json(200, {
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "test-model",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(WORDS)},
+                             "finish_reason": "stop"}],
+            })
+
+        events = [self._chunk({"role": "assistant", "content": ""})]
+        events += [self._chunk({"content": word}) for word in WORDS]
+        data = b"".join(f"data: {json.dumps(e)}\n\n".encode() for e in events) + b"data: [DONE]\n\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionsHandler)
+    httpd.plan, httpd.requests, httpd.ports, httpd.lock = [], [], set(), threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(groq_integration, "GROQ_BASE_URL", f"http://127.0.0.1:{httpd.server_port}")
+    monkeypatch.setattr(groq_integration, "GROQ_MAX_RETRIES", 2)
+    monkeypatch.setattr(groq_integration, "GROQ_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(groq_integration, "GROQ_RETRY_MAX_DELAY", 5.0)
+    httpd.clock = _Clock()
+    monkeypatch.setattr(groq_integration, "groq_breaker", CircuitBreaker("groq", 3, 10.0, clock=httpd.clock))
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _backend():
+    return GroqBackend(api_key="test-key", model="test-model")
+
+
+def _messages():
+    return [{"role": "user", "content": "Pyetje"}]
+
+
+def test_generate_and_pooled_client(server):
+    backend = _backend()
+    for _ in range(3):
+        assert backend.generate(_messages(), temperature=0.2, max_tokens=50) == "".join(WORDS)
+    request = server.requests[0]
+    assert request["model"] == "test-model"
+    assert request["max_tokens"] == 50
+    # One long-lived client per key and base URL, reusing its connection
+    client = groq_integration.get_groq_client("test-key", groq_integration.GROQ_BASE_URL)
+    assert client is groq_integration.get_groq_client("test-key", groq_integration.GROQ_BASE_URL)
+    assert client is not groq_integration.get_groq_client("other-key", groq_integration.GROQ_BASE_URL)
+    assert len(server.ports) == 1
+
+
+def test_stream(server):
+    assert list(_backend().stream(_messages())) == WORDS
+    assert server.requests[0]["stream"] is True
+
+
+def test_5xx_is_retried(server):
+    server.plan = ["503", "503"]
+    assert _backend().generate(_messages()) == "".join(WORDS)
+    assert len(server.requests) == 3
+
+
+def test_429_waits_for_retry_after(server):
+    server.plan = ["429:1"]
+    started = time.monotonic()
+    assert _backend().generate(_messages()) == "".join(WORDS)
+    assert time.monotonic() - started >= 1.0
+    assert len(server.requests) == 2
+
+
+def test_400_is_not_retried(server):
+    server.plan = ["400"]
+    with pytest.raises(APIStatusError) as error:
+        _backend().generate(_messages())
+    assert error.value.status_code == 400
+    assert len(server.requests) == 1
+    assert groq_integration.groq_breaker.state == "closed"
+
+
+def test_breaker_opens_and_half_opens(server, monkeypatch):
+    monkeypatch.setattr(groq_integration, "GROQ_MAX_RETRIES", 0)
+    backend = _backend()
+    server.plan = ["503"] * 3
+    for _ in range(3):
+        with pytest.raises(APIStatusError):
+            backend.generate(_messages())
+    with pytest.raises(CircuitOpenError):
+        backend.generate(_messages())
+    assert len(server.requests) == 3
+
+    # After the cool-down a trial request goes through and closes the circuit
+    server.clock.now = 10.0
+    assert groq_integration.groq_breaker.state == "half-open"
+    assert backend.generate(_messages()) == "".join(WORDS)
+    assert groq_integration.groq_breaker.state == "closed"
@@ -0,0 +1,37 @@
+# HTML archive: content-addressed snapshots and offline re-extraction
+from utils.html_archive import archive_html, latest_snapshots, read_html, reextract
+
+
+def extract_title(html, url, fetched_at):
+    """Extraction runs in spawned processes, so it lives at module level."""
+    if "<h1>" not in html:
+        return None
+    if "<h1>error" in html:
+        raise ValueError("broken page")
+    return {"url": url, "title": html.split("<h1>")[1].split("</h1>")[0]}
+
+
+def test_snapshots_are_stored_once_and_latest_wins(tmp_path):
+    first = archive_html("<h1>a</h1>", "http://x/1", archive_dir=tmp_path)
+    assert archive_html("<h1>a</h1>", "http://x/2", archive_dir=tmp_path) == first
+    second = archive_html("<h1>b</h1>", "http://x/1", {"etag": '"v2"'}, archive_dir=tmp_path)
+    assert len(list((tmp_path / "objects").glob("*/*.html.gz"))) == 2
+
+    snapshots = latest_snapshots(tmp_path)
+    assert list(snapshots) == ["http://x/1", "http://x/2"]
+    assert snapshots["http://x/1"]["digest"] == second
+    assert snapshots["http://x/1"]["etag"] == '"v2"'
+    assert read_html(second, tmp_path) == "<h1>b</h1>"
+
+
+def test_reextract_in_worker_processes(tmp_path):
+    pages = ["<h1>a</h1>", "<p>no title</p>", "<h1>error</h1>", "<h1>d</h1>"]
+    for i, html in enumerate(pages):
+        archive_html(html, f"http://x/{i}", archive_dir=tmp_path)
+
+    serial = reextract(extract_title, tmp_path, workers=1)
+    parallel = reextract(extract_title, tmp_path, workers=2)
+    assert parallel == serial
+    assert [r["status"] for r in parallel] == ["extracted", "empty", "failed", "extracted"]
+    assert [r["row"]["title"] for r in parallel if r["row"]] == ["a", "d"]
+    assert "broken page" in parallel[2]["error"]
@@ -0,0 +1,22 @@
+# BM25 index over a tiny passage table
+import pandas as pd
+
+from utils import tokenization
+from utils.lexical_index import bm25_search, build_lexical_index
+
+
+def test_search_finds_folded_words_without_growing_the_vocabulary():
+    passages = pd.DataFrame({"Text": [
+        "Transparenca në prokurimin publik.",
+        "Tenderi u shpall sot.",
+        "Raporti vjetor i ministrisë.",
+    ]})
+    index = build_lexical_index(passages)
+    vocabulary = len(tokenization._id_to_token)
+
+    ids, _ = bm25_search(index, "TRANSPARENCË prokurimin", k=3)
+    assert list(ids) == [0]
+    # Unknown query words (typos, new terms) are not added to the vocabulary
+    ids, _ = bm25_search(index, "xqzvtender fjalëeRe123", k=3)
+    assert len(ids) == 0
+    assert len(tokenization._id_to_token) == vocabulary
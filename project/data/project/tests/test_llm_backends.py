@@ -0,0 +1,133 @@
+# Ollama backend against a local stand-in of /api/chat (no model needed)
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.llm_backends import LLMBusyError, OllamaBackend, OllamaError
+
+WORDS = ["Përgjigje ", "nga ", "modeli ", "lokal"]
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    """/api/chat: replies follow server.plan ("ok", "404", "503"; default "ok")."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        reply = self.server.plan.pop(0) if self.server.plan else "ok"
+        if reply == "404":
+            return self._send_json(404, {"error": f"model '{body['model']}' not found"})
+        if reply == "503":
+            return self._send_json(503, {"error": "overloaded"})
+        if not body["stream"]:
+            return self._send_json(200, {"message": {"role": "assistant", "content": "".join(WORDS)}, "done": True})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(WORDS + [""]):
+            line = (json.dumps({"message": {"role": "assistant", "content": word}, "done": i == len(WORDS)}) + "\n").encode()
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    httpd.plan, httpd.requests = [], []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _backend(server, **kwargs):
+    options = dict(model="test-model", retries=1, retry_base_delay=0.0, retry_max_delay=0.0, queue_timeout=0.2)
+    options.update(kwargs)
+    return OllamaBackend(base_url=f"http://127.0.0.1:{server.server_port}", **options)
+
+
+def _messages():
+    return [{"role": "user", "content": "Pyetje"}]
+
+
+def test_generate(server):
+    backend = _backend(server)
+    assert backend.generate(_messages(), temperature=0.2, max_tokens=50) == "".join(WORDS).strip()
+    request = server.requests[0]
+    assert request["model"] == "test-model"
+    assert request["stream"] is False
+    assert request["options"] == {"temperature": 0.2, "num_predict": 50}
+    assert backend.cache_id == "ollama:test-model"
+
+
+def test_stream_ndjson(server):
+    chunks = list(_backend(server).stream(_messages()))
+    assert chunks == WORDS
+    assert server.requests[0]["stream"] is True
+
+
+def test_404_is_not_retried(server):
+    server.plan = ["404"]
+    with pytest.raises(OllamaError) as error:
+        _backend(server).generate(_messages())
+    assert error.value.status_code == 404
+    assert "not found" in str(error.value)
+    assert len(server.requests) == 1
+
+
+def test_503_is_retried(server):
+    server.plan = ["503"]
+    assert _backend(server).generate(_messages()) == "".join(WORDS).strip()
+    assert len(server.requests) == 2
+
+    server.plan = ["503", "503"]
+    with pytest.raises(OllamaError) as error:
+        _backend(server).stream(_messages())
+    assert error.value.status_code == 503
+
+
+def test_stream_error_releases_slot(server):
+    backend = _backend(server, max_concurrency=1, retries=0)
+    server.plan = ["503"]
+    with pytest.raises(OllamaError):
+        backend.stream(_messages())
+    assert backend.generate(_messages())
+
+
+def test_closed_stream_releases_slot(server):
+    backend = _backend(server, max_concurrency=1)
+    stream = backend.stream(_messages())
+    assert next(stream) == WORDS[0]
+    stream.close()
+    assert backend.generate(_messages())
+
+
+def test_busy_at_concurrency_cap(server):
+    backend = _backend(server, max_concurrency=1, queue_timeout=0.1)
+    stream = backend.stream(_messages())
+    started = time.monotonic()
+    with pytest.raises(LLMBusyError):
+        backend.generate(_messages())
+    assert time.monotonic() - started >= 0.1
+    assert list(stream) == WORDS
+    assert backend.generate(_messages())
@@ -0,0 +1,135 @@
+# Enrichment pipeline: checkpoint resume, up-to-date short-circuit and
+# translation retries (artifacts in tmp_path; no embedding model or LLM)
+import pandas as pd
+import pytest
+
+from utils import pipeline
+from utils.data_loader import read_corpus_artifact, write_corpus_artifact
+from utils.serving import save_passages, write_serving_manifest
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def _rows(n, start=0):
+    return [
+        {
+            "Date": "2025-10-01",
+            "Speech": f"Statement number {i} about public procurement.",
+            "Speech_SQ": f"Deklarata numër {i} për prokurimin publik.",
+            "Speaker": "Diella",
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def _stub_topics(df, previous=None, previous_topic_model_id=None, refit_topics=False):
+    df["Topic"] = 0
+    df["TopKeywords"] = ""
+    return df, "topics", {}
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """run_pipeline writing to tmp_path; returns (manifest, rows featurized)."""
+    artifact = tmp_path / "corpus.parquet"
+    monkeypatch.setattr(pipeline, "read_corpus_artifact", lambda: read_corpus_artifact(artifact))
+    monkeypatch.setattr(pipeline, "write_corpus_artifact", lambda df, fp: write_corpus_artifact(df, fp, artifact))
+    monkeypatch.setattr(pipeline, "save_passages", lambda p: save_passages(p, tmp_path / "passages.parquet"))
+    monkeypatch.setattr(pipeline, "write_serving_manifest",
+                        lambda *args: write_serving_manifest(*args, path=tmp_path / "serving.json"))
+    monkeypatch.setattr(pipeline, "topics_stage", _stub_topics)
+    monkeypatch.setattr(pipeline, "embeddings_stage", lambda df, passages, *args: ("vectors", {}))
+    monkeypatch.setattr(pipeline, "lexical_stage", lambda passages, *args: ("lexical", {}))
+
+    featurized = []
+    add_text_features = pipeline.add_text_features
+
+    def counting(df):
+        if run.fail_after is not None and len(featurized) >= run.fail_after:
+            raise _Interrupted()
+        featurized.append(len(df))
+        return add_text_features(df)
+
+    monkeypatch.setattr(pipeline, "add_text_features", counting)
+
+    def run(data_path, **kwargs):
+        featurized.clear()
+        kwargs.setdefault("translate", False)
+        kwargs.setdefault("checkpoint_dir", tmp_path / "checkpoints")
+        manifest, err = pipeline.run_pipeline(data_path, **kwargs)
+        assert err is None
+        return manifest, sum(featurized)
+
+    run.fail_after = None
+    return run
+
+
+def test_interrupted_run_resumes_from_checkpoints(tmp_path, run):
+    data = _write_csv(tmp_path / "corpus.csv", _rows(10))
+    checkpoints = tmp_path / "checkpoints"
+
+    run.fail_after = 1
+    with pytest.raises(_Interrupted):
+        run(data, batch_size=4)
+    assert len(list((checkpoints / "features").glob("*/part-*.parquet"))) == 1
+
+    run.fail_after = None
+    manifest, featurized = run(data, batch_size=4)
+    assert featurized == 6
+    assert manifest["stages"]["features"]["computed"] == 6
+    assert manifest["rows"] == 10
+    assert not (checkpoints / "features").exists()
+
+    df, _ = read_corpus_artifact(tmp_path / "corpus.parquet")
+    assert df["WordCount"].gt(0).all()
+
+
+def test_up_to_date_corpus_is_not_reenriched(tmp_path, run):
+    data = _write_csv(tmp_path / "corpus.csv", _rows(5))
+    assert run(data)[1] == 5
+
+    manifest, featurized = run(data)
+    assert featurized == 0
+    assert "features" not in manifest["stages"]
+
+    # Only the new row is computed when the source changes
+    data = _write_csv(tmp_path / "corpus.csv", _rows(6))
+    manifest, featurized = run(data)
+    assert featurized == 1
+    assert manifest["rows"] == 6
+
+
+class _Backend:
+    cache_id = "stub"
+
+
+def test_failed_translations_are_retried(tmp_path, run, monkeypatch):
+    rows = _rows(3)
+    rows[0]["Speech_SQ"] = ""
+    data = _write_csv(tmp_path / "corpus.csv", rows)
+    backend = {"result": (None, "no backend")}
+    translations = {"value": None}
+    monkeypatch.setattr(pipeline, "get_llm_backend", lambda name: backend["result"])
+    monkeypatch.setattr(pipeline, "translate_texts",
+                        lambda texts, b: ([translations["value"]] * len(texts), {}))
+
+    # No backend: the corpus is published without the translation
+    run(data, translate=True)
+    assert run(data, translate=True)[1] == 0
+
+    # Translation still failing: stays up to date
+    backend["result"] = (_Backend(), None)
+    assert run(data, translate=True)[1] == 0
+
+    # Translation succeeds: the corpus is re-enriched with it
+    translations["value"] = "Përkthimi."
+    assert run(data, translate=True)[1] == 1
+    df, _ = read_corpus_artifact(tmp_path / "corpus.parquet")
+    assert df["Speech_SQ"].iloc[0] == "Përkthimi."
@@ -0,0 +1,125 @@
+# Retries, circuit breaker and rate limiter with a fake clock (no sleeping)
+import random
+
+import pytest
+
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, RateLimiter, backoff_delay, call_with_retries,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _Transient(Exception):
+    pass
+
+
+def _failing(errors, result="ok"):
+    """Callable that raises the given errors in turn, then returns result."""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def _is_transient(error):
+    return isinstance(error, _Transient)
+
+
+def test_backoff_delay_is_capped():
+    rng = random.Random(0)
+    for attempt in range(10):
+        delay = backoff_delay(attempt, 0.5, 4.0, rng)
+        assert 0.0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_transient_errors_are_retried():
+    sleeps = []
+    fn = _failing([_Transient(), _Transient()])
+    assert call_with_retries(fn, _is_transient, retries=2, sleep=sleeps.append) == "ok"
+    assert len(fn.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_retries_are_bounded():
+    fn = _failing([_Transient()] * 5)
+    with pytest.raises(_Transient):
+        call_with_retries(fn, _is_transient, retries=2, sleep=lambda s: None)
+    assert len(fn.calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    fn = _failing([ValueError("400")])
+    with pytest.raises(ValueError):
+        call_with_retries(fn, _is_transient, retries=2, sleep=lambda s: None)
+    assert len(fn.calls) == 1
+
+
+def test_retry_after_is_honoured_up_to_max_delay():
+    sleeps = []
+    fn = _failing([_Transient(), _Transient()])
+    requested = iter([2.0, 30.0])
+    call_with_retries(fn, _is_transient, retries=2, base_delay=0.01, max_delay=5.0,
+                      retry_after=lambda e: next(requested), sleep=sleeps.append)
+    assert sleeps == [2.0, 5.0]
+
+
+def test_breaker_opens_and_half_opens():
+    clock = _Clock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10.0, clock=clock)
+    for _ in range(2):
+        with pytest.raises(_Transient):
+            call_with_retries(_failing([_Transient()]), _is_transient, retries=0, breaker=breaker)
+    assert breaker.state == "open"
+
+    fn = _failing([])
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(fn, _is_transient, breaker=breaker)
+    assert not fn.calls
+
+    # After the cool-down one trial call goes through; a failure reopens
+    clock.now = 10.0
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20.0
+    assert call_with_retries(fn, _is_transient, breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_non_transient_errors_do_not_open_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    with pytest.raises(ValueError):
+        call_with_retries(_failing([ValueError()]), _is_transient, breaker=breaker)
+    assert breaker.state == "closed"
+
+
+def test_rate_limiter_spaces_requests():
+    clock = _Clock()
+    limiter = RateLimiter(60, clock=clock, sleep=clock.sleep)
+    starts = []
+    for _ in range(3):
+        limiter.acquire()
+        starts.append(clock.now)
+    assert starts == [0.0, 1.0, 2.0]
+    assert RateLimiter(0).interval == 0.0
@@ -0,0 +1,53 @@
+# Semantic question cache with a stub encoder (no embedding model needed)
+import numpy as np
+import pytest
+
+from utils import semantic_cache
+from utils.semantic_cache import SemanticQuestionCache
+
+
+@pytest.fixture(autouse=True)
+def encoder(monkeypatch):
+    """Same unit vector for the same question, unrelated ones otherwise."""
+    vectors = {}
+
+    def encode_queries(model, questions):
+        question = questions[0]
+        if question not in vectors:
+            vector = np.random.default_rng(len(vectors)).normal(size=32).astype("float32")
+            vectors[question] = vector / np.linalg.norm(vector)
+        return vectors[question][None, :]
+
+    monkeypatch.setattr(semantic_cache, "encode_queries", encode_queries)
+
+
+def test_match_is_found_behind_other_scopes():
+    cache = SemanticQuestionCache("corpus", threshold=0.9, max_entries=100, ttl=60)
+    # More same-question answers under other filters than any fixed top-k
+    for i in range(20):
+        cache.add(None, "Pyetja", f"answer {i}", [], scope=f"filters-{i}")
+    cache.add(None, "Pyetja", "mine", [], scope="mine")
+
+    assert cache.lookup(None, "Pyetja", "mine")["answer"] == "mine"
+    assert cache.lookup(None, "Pyetja", "unseen") is None
+    assert cache.lookup(None, "Pyetje tjetër", "mine") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_oldest_and_expired_entries_are_evicted(monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock["now"])
+    cache = SemanticQuestionCache("corpus", threshold=0.9, max_entries=2, ttl=60)
+    cache.add(None, "a", "A", [], scope="s")
+    cache.add(None, "b", "B", [], scope="s")
+    cache.add(None, "c", "C", [], scope="t")
+    assert len(cache) == 2
+    assert cache.lookup(None, "a", "s") is None
+    assert cache.lookup(None, "b", "s")["answer"] == "B"
+
+    # Expired entries are never served, then dropped on the next add
+    clock["now"] = 61.0
+    assert cache.lookup(None, "c", "t") is None
+    cache.add(None, "d", "D", [], scope="t")
+    assert len(cache) == 1
+    assert cache.lookup(None, "d", "t")["answer"] == "D"
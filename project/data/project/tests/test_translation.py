@@ -0,0 +1,121 @@
+# Batched translation with a stub backend (no LLM needed)
+import json
+import time
+
+import pytest
+
+from utils.translation import (
+    TranslationCache, parse_translations, split_segments, translate_texts, translation_key,
+)
+
+
+class _StubBackend:
+    """Translates "x" to "sq:x"; a batch with a "BAD" text gets a reply one item short."""
+
+    cache_id = "stub:test"
+    max_concurrency = 4
+
+    def __init__(self):
+        self.batches = []
+
+    def generate(self, messages, temperature=0.0, max_tokens=None):
+        batch = json.loads(messages[-1]["content"])
+        self.batches.append(batch)
+        translated = [f"sq:{text}" for text in batch]
+        if any("BAD" in text for text in batch):
+            translated = translated[:-1]
+        return "```json\n" + json.dumps(translated, ensure_ascii=False) + "\n```"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranslationCache(tmp_path / "translations.sqlite", retry_after=60.0, retry_max=600.0)
+
+
+def _translate(texts, backend, cache, **kwargs):
+    options = dict(batch_size=8, workers=1, per_minute=0)
+    options.update(kwargs)
+    return translate_texts(texts, backend, cache, **options)
+
+
+def test_split_segments_round_trip():
+    text = "Fjalia e parë. Fjalia e dytë!\n\nParagrafi tjetër? Po.  Fund i tekstit pa pikë"
+    for max_chars in (10, 20, 40, len(text)):
+        segments = split_segments(text, max_chars)
+        assert "".join(s + sep for s, sep in segments) == text
+        assert all(s.strip() for s, _ in segments)
+    assert split_segments("Shkurt.", 100) == [("Shkurt.", "")]
+    # One sentence longer than the limit stays whole
+    assert split_segments("a" * 50 + ". b.", 20) == [("a" * 50 + ".", " "), ("b.", "")]
+
+
+def test_parse_translations():
+    assert parse_translations('Ja: ["a", " b "] sipas kërkesës', 2) == ["a", "b"]
+    assert parse_translations('["a"]', 2) is None
+    assert parse_translations('["a", 1]', 2) is None
+    assert parse_translations("  përkthim i thjeshtë ", 1) == ["përkthim i thjeshtë"]
+    assert parse_translations("[nuk është json", 1) is None
+
+
+def test_only_the_bad_text_fails(cache):
+    backend = _StubBackend()
+    texts = [f"text {i}" for i in range(7)] + ["BAD text"]
+    translations, report = _translate(texts, backend, cache)
+    assert translations[:7] == [f"sq:text {i}" for i in range(7)]
+    assert translations[7] is None
+    assert report["translated"] == 7 and report["failed"] == 1
+    # Halving: 8 -> 4 + 4 -> 2 + 2 -> 1 + 1
+    assert [len(b) for b in backend.batches] == [8, 4, 4, 2, 2, 1, 1]
+
+
+def test_cached_texts_cost_no_requests(cache):
+    backend = _StubBackend()
+    texts = ["një", "dy", "një"]
+    _translate(texts, backend, cache)
+    assert len(backend.batches) == 1 and backend.batches[0] == ["një", "dy"]
+
+    backend = _StubBackend()
+    translations, report = _translate(texts, backend, cache)
+    assert translations == ["sq:një", "sq:dy", "sq:një"]
+    assert report["cached"] == 2 and report["requests"] == 0
+    assert not backend.batches
+
+
+def test_long_texts_are_split_and_joined(cache):
+    text = "Fjalia e parë.\nFjalia e dytë."
+    translations, report = _translate([text], _StubBackend(), cache, batch_chars=16)
+    assert report["segments"] == 2
+    assert translations == ["sq:Fjalia e parë.\nsq:Fjalia e dytë."]
+
+
+def test_failures_back_off(cache):
+    backend = _StubBackend()
+    _translate(["BAD"], backend, cache)
+    key = translation_key("BAD", backend)
+
+    # Skipped (no request) until retry_after has passed
+    translations, report = _translate(["BAD"], backend, cache)
+    assert translations == [None]
+    assert report["backing_off"] == 1 and report["requests"] == 0
+
+    now = time.time()
+    assert cache.backing_off([key], now) == {key}
+    assert cache.backing_off([key], now + 60.0) == set()
+
+    # A second failure doubles the delay
+    cache.record_failures({key: "still failing"})
+    assert cache.backing_off([key], time.time() + 60.0) == {key}
+    assert cache.backing_off([key], time.time() + 120.0) == set()
+
+
+def test_failures_are_retried_after_the_delay(tmp_path):
+    cache = TranslationCache(tmp_path / "translations.sqlite", retry_after=0.05, retry_max=0.05)
+    backend = _StubBackend()
+    _translate(["BAD"], backend, cache)
+    time.sleep(0.1)
+    _, report = _translate(["BAD"], backend, cache)
+    assert report["backing_off"] == 0 and report["requests"] == 1
+
+    # A success clears the failure record
+    cache.put_many({translation_key("BAD", backend): "përkthim"})
+    assert cache.backing_off([translation_key("BAD", backend)]) == set()
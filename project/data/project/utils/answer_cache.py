@@ -0,0 +1,173 @@
+# ==========================================
+# ANSWER CACHE MODULE - DIELLA AI
+# ==========================================
+# Persistent cache of generated Q&A answers (local SQLite file). An answer
+# is reused only for the same normalized question, the same ordered sources
+# (statement hashes + passage spans), the same LLM model and prompt version,
+# and the same corpus fingerprint. Entries expire after a TTL; the least
+# recently used ones are evicted beyond a size limit.
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import ANSWER_CACHE_PATH, ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ENTRIES
+from .hashing import text_hash
+from .vector_store import normalize_query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    corpus TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+"""
+
+
+def answer_cache_key(query, sources, model, prompt_version):
+    """
+    Cache key for an answer.
+
+    Args:
+        query (str): User question
+        sources (list): Sources from build_qa_context, in prompt order
+        model (str): LLM model name
+        prompt_version (str): Version of the prompt template
+
+    Returns:
+        str: Hex digest
+    """
+    source_ids = [
+        [s.get("row_hash") or text_hash(s.get("text", "")), [list(span) for span in s.get("spans", [])]]
+        for s in sources
+    ]
+    payload = json.dumps(
+        [normalize_query(query), source_ids, model, prompt_version],
+        ensure_ascii=False,
+    )
+    return text_hash(payload, "qa-answer")
+
+
+class AnswerCache:
+    """
+    SQLite-backed answer store for one corpus fingerprint.
+    Entries written for any other corpus are deleted when the cache is
+    opened, so a changed corpus never serves stale answers.
+    """
+
+    def __init__(self, corpus_fingerprint, path=ANSWER_CACHE_PATH,
+                 ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.corpus = corpus_fingerprint
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("DELETE FROM answers WHERE corpus != ?", (self.corpus,))
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection; commits on success, always closed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=5.0)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """
+        Cached answer for a key.
+
+        Args:
+            key (str): Result of answer_cache_key
+
+        Returns:
+            tuple or None: (answer_text, sources) or None on a miss
+        """
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT answer, sources FROM answers "
+                    "WHERE key = ? AND corpus = ? AND created >= ?",
+                    (key, self.corpus, now - self.ttl),
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    (now, key),
+                )
+            return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Answer cache read failed: {e}")
+            return None
+
+    def put(self, key, answer, sources):
+        """
+        Store an answer, then drop expired and least recently used entries.
+
+        Args:
+            key (str): Result of answer_cache_key
+            answer (str): Generated answer
+            sources (list): Sources shown with the answer
+        """
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers "
+                    "(key, corpus, answer, sources, created, last_used, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, self.corpus, answer, json.dumps(sources, default=str), now, now),
+                )
+                conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM answers WHERE key IN ("
+                    "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            print(f"Answer cache write failed: {e}")
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM answers")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_answer_cache(corpus_fingerprint):
+    """
+    Process-wide answer cache for a corpus (one per fingerprint).
+
+    Args:
+        corpus_fingerprint (str): Corpus fingerprint (retrieval_service)
+
+    Returns:
+        AnswerCache or None: Cache, or None if the SQLite file is unusable
+    """
+    with _caches_lock:
+        cache = _caches.get(corpus_fingerprint)
+        if cache is None:
+            try:
+                cache = AnswerCache(corpus_fingerprint)
+            except sqlite3.Error as e:
+                print(f"Answer cache unavailable: {e}")
+                return None
+            _caches.clear()
+            _caches[corpus_fingerprint] = cache
+        return cache
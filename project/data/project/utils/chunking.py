@@ -0,0 +1,137 @@
+# ==========================================
+# CHUNKING MODULE - DIELLA AI
+# ==========================================
+# Splits Speech_SQ into overlapping passages (sentence-aligned, with
+# character offsets into the statement). Retrieval indexes passages;
+# each passage maps back to its statement's row position.
+
+import re
+
+import numpy as np
+import pandas as pd
+from config import PASSAGE_MAX_CHARS, PASSAGE_OVERLAP
+
+# Bump when the splitting rules change so passage indexes are rebuilt
+CHUNKING_FORMAT = "sentences-v1"
+
+PASSAGE_COLUMNS = ["Row", "Start", "End", "Text"]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _sentence_spans(text, max_chars):
+    """Sentence spans; sentences longer than max_chars are cut at whitespace."""
+    spans = []
+    start = 0
+    bounds = [(m.start(), m.end()) for m in _SENTENCE_END.finditer(text)]
+    for end, next_start in bounds + [(len(text), len(text))]:
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + 1, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            spans.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        if end > start:
+            spans.append((start, end))
+        start = next_start
+    return spans
+
+
+def chunk_text(text, max_chars=PASSAGE_MAX_CHARS, overlap=PASSAGE_OVERLAP):
+    """
+    Split a text into sentence-aligned passages of at most max_chars.
+    Consecutive passages share their boundary sentences (up to overlap
+    characters, at least one sentence when it is short enough).
+
+    Args:
+        text (str): Statement text
+        max_chars (int): Maximum passage length
+        overlap (int): Target overlap between consecutive passages
+
+    Returns:
+        list: (start, end) character offsets into text
+    """
+    text = str(text or "")
+    lo = len(text) - len(text.lstrip())
+    hi = len(text.rstrip())
+    if hi <= lo:
+        return []
+    if hi - lo <= max_chars:
+        return [(lo, hi)]
+
+    spans = [(s + lo, e + lo) for s, e in _sentence_spans(text[lo:hi], max_chars)]
+    passages = []
+    i = 0
+    while i < len(spans):
+        start = spans[i][0]
+        j = i
+        while j + 1 < len(spans) and spans[j + 1][1] - start <= max_chars:
+            j += 1
+        passages.append((start, spans[j][1]))
+        if j + 1 >= len(spans):
+            break
+        # Next passage starts with the trailing sentences of this one
+        k = j + 1
+        while k - 1 > i and spans[j][1] - spans[k - 1][0] <= overlap:
+            k -= 1
+        if k == j + 1 and j > i and spans[j][1] - spans[j][0] <= max_chars // 2:
+            k = j
+        i = k
+    return passages
+
+
+def build_passages(df, max_chars=PASSAGE_MAX_CHARS, overlap=PASSAGE_OVERLAP):
+    """
+    Passage table for the Albanian statements of a corpus.
+
+    Args:
+        df (pd.DataFrame): Dataframe with 'Speech_SQ' column
+        max_chars (int): Maximum passage length
+        overlap (int): Target overlap between consecutive passages
+
+    Returns:
+        pd.DataFrame: One row per passage (index = passage id) with the
+        statement's row position ('Row'), offsets ('Start', 'End') and 'Text'
+    """
+    rows, starts, ends, texts = [], [], [], []
+    for position, text in enumerate(df["Speech_SQ"].fillna("").astype(str)):
+        for start, end in chunk_text(text, max_chars, overlap):
+            rows.append(position)
+            starts.append(start)
+            ends.append(end)
+            texts.append(text[start:end])
+    return pd.DataFrame({
+        "Row": np.array(rows, dtype=np.int64),
+        "Start": np.array(starts, dtype=np.int64),
+        "End": np.array(ends, dtype=np.int64),
+        "Text": pd.Series(texts, dtype=object),
+    }, columns=PASSAGE_COLUMNS)
+
+
+def chunking_settings():
+    """Chunking parameters that change passage ids (part of index fingerprints)."""
+    return f"{CHUNKING_FORMAT}:{PASSAGE_MAX_CHARS}:{PASSAGE_OVERLAP}"
+
+
+def merge_spans(spans, text=None):
+    """
+    Merge overlapping or touching (start, end) spans.
+
+    Args:
+        spans (iterable): Character spans
+        text (str): If given, spans separated only by whitespace are merged too
+
+    Returns:
+        list: Sorted, non-overlapping spans
+    """
+    merged = []
+    for start, end in sorted(spans):
+        if merged and (
+            start <= merged[-1][1]
+            or (text is not None and not text[merged[-1][1]:start].strip())
+        ):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
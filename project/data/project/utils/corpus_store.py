@@ -0,0 +1,194 @@
+# ==========================================
+# CORPUS STORE MODULE - DIELLA AI
+# ==========================================
+# Append-only SQLite store for ingested statements. Rows are never updated
+# or deleted: a new version of a document is a new row with the same
+# document key (an article's source URL; otherwise the row's own content)
+# and readers take the latest row per key. A row identical to its
+# document's latest row is skipped (one indexed lookup per document, so each
+# ingest costs O(new rows)); a document that changes back to earlier content
+# gets a new row. Every batch is one transaction, so an interrupted run
+# leaves the store unchanged.
+
+import datetime as dt
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+from config import CORPUS_DB_PATH
+from .hashing import text_hash
+
+STORE_SUFFIXES = (".sqlite", ".db")
+
+# Bump when the schema changes
+STORE_FORMAT = "statements-v1"
+
+STORE_COLUMNS = ["Date", "Speech", "Keywords", "Source", "Title", "Speaker", "Speech_SQ", "DocKey"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    date TEXT,
+    speech TEXT NOT NULL DEFAULT '',
+    keywords TEXT,
+    source TEXT,
+    title TEXT,
+    speaker TEXT,
+    speech_sq TEXT NOT NULL DEFAULT '',
+    ingested_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS statements_source ON statements (source);
+CREATE INDEX IF NOT EXISTS statements_doc ON statements (doc_key, id);
+"""
+
+
+def is_store_path(path):
+    """True if a corpus path points to a SQLite store rather than a CSV."""
+    return Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+@contextmanager
+def _connect(path):
+    """Connection with the schema in place; commits on success, always closed."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30.0)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.executescript(_SCHEMA)
+            yield conn
+    finally:
+        conn.close()
+
+
+def _text(value):
+    return "" if value is None or (isinstance(value, float) and pd.isna(value)) else str(value)
+
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _date(value):
+    """ISO date text (YYYY-MM-DD) or None."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str) and _ISO_DATE.match(value):
+        return value[:10]
+    if isinstance(value, (dt.date, pd.Timestamp)) and not pd.isna(value):
+        return value.isoformat()[:10]
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else ts.date().isoformat()
+
+
+def statement_keys(row, by_source=False):
+    """
+    Document key and content hash of a row.
+
+    Args:
+        row (dict): Row with STORE_COLUMNS keys (missing keys allowed)
+        by_source (bool): Key by Source (one document per URL, e.g. articles)
+
+    Returns:
+        tuple: (doc_key, content_hash). An explicit 'DocKey' wins; otherwise
+        the Source (by_source) or the content hash identifies the document
+    """
+    content_hash = text_hash(
+        "\x1f".join([_date(row.get("Date")) or ""] + [
+            _text(row.get(c)) for c in ("Source", "Speech", "Speech_SQ", "Speaker", "Title", "Keywords")
+        ]),
+        "statement",
+    )
+    source = _text(row.get("Source"))
+    doc_key = _text(row.get("DocKey")) or (source if by_source and source else "row:" + content_hash)
+    return doc_key, content_hash
+
+
+def append_rows(rows, path=CORPUS_DB_PATH, by_source=False):
+    """
+    Append rows in one transaction; a row whose content equals the latest
+    row of its document (stored or earlier in the batch) is skipped.
+
+    Args:
+        rows (iterable): Dicts with STORE_COLUMNS keys (missing keys allowed)
+        path (Path): Store path
+        by_source (bool): A row supersedes earlier rows with the same Source
+
+    Returns:
+        int: Number of rows added
+    """
+    now = time.time()
+    records = []
+    for row in rows:
+        doc_key, content_hash = statement_keys(row, by_source)
+        records.append((
+            doc_key, content_hash, _date(row.get("Date")), _text(row.get("Speech")),
+            _text(row.get("Keywords")) or None, _text(row.get("Source")) or None,
+            _text(row.get("Title")) or None, _text(row.get("Speaker")) or None,
+            _text(row.get("Speech_SQ")), now,
+        ))
+    with _connect(path) as conn:
+        latest = {}  # doc_key -> content hash of its latest row
+        added = []
+        for record in records:
+            doc_key, content_hash = record[0], record[1]
+            if doc_key not in latest:
+                row = conn.execute(
+                    "SELECT content_hash FROM statements WHERE doc_key = ? ORDER BY id DESC LIMIT 1",
+                    (doc_key,),
+                ).fetchone()
+                latest[doc_key] = row[0] if row else None
+            if latest[doc_key] == content_hash:
+                continue
+            latest[doc_key] = content_hash
+            added.append(record)
+        conn.executemany(
+            "INSERT INTO statements "
+            "(doc_key, content_hash, date, speech, keywords, source, title, speaker, speech_sq, ingested_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            added,
+        )
+        return len(added)
+
+
+def store_version(path=CORPUS_DB_PATH):
+    """
+    Cheap content version of an append-only store (format + last row id).
+
+    Args:
+        path (Path): Store path
+
+    Returns:
+        str: Version string; changes whenever a row is added
+    """
+    with _connect(path) as conn:
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM statements").fetchone()[0]
+    return f"{STORE_FORMAT}:{last_id}"
+
+
+def read_store(path=CORPUS_DB_PATH):
+    """
+    Latest row of every document, in the order documents were first stored.
+
+    Args:
+        path (Path): Store path
+
+    Returns:
+        pd.DataFrame: Columns STORE_COLUMNS ('Date' as text)
+    """
+    with _connect(path) as conn:
+        df = pd.read_sql_query(
+            "SELECT s.date AS Date, s.speech AS Speech, s.keywords AS Keywords, "
+            "s.source AS Source, s.title AS Title, s.speaker AS Speaker, s.speech_sq AS Speech_SQ, "
+            "s.doc_key AS DocKey "
+            "FROM (SELECT doc_key, MIN(id) AS first_id, MAX(id) AS last_id "
+            "      FROM statements GROUP BY doc_key) g "
+            "JOIN statements s ON s.id = g.last_id "
+            "ORDER BY g.first_id",
+            conn,
+        )
+    return df[STORE_COLUMNS]
@@ -0,0 +1,269 @@
+# ==========================================
+# CRAWLER MODULE - DIELLA AI
+# ==========================================
+# Concurrent article fetching for ingestion. A URL frontier hands out URLs
+# to fetcher threads while keeping per-host politeness (a cap on
+# concurrent requests and a minimum spacing between request starts).
+# Requests are conditional (ETag / Last-Modified from the previous run),
+# so unchanged pages are skipped; changed pages go to the HTML archive and
+# are parsed in a process pool so parsing never blocks the fetchers.
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urldefrag, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    HTML_ARCHIVE_DIR, CRAWL_STATE_PATH, CRAWL_WORKERS, CRAWL_PER_HOST, CRAWL_HOST_INTERVAL,
+    CRAWL_CONNECT_TIMEOUT, CRAWL_READ_TIMEOUT, CRAWL_EXTRACT_WORKERS,
+)
+from .html_archive import archive_html, html_digest
+
+USER_AGENT = "Mozilla/5.0"
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+class Frontier:
+    """
+    Thread-safe URL queue with per-host politeness.
+
+    get() blocks until some host has a queued URL, fewer than `per_host`
+    requests in flight and `host_interval` seconds since its last request
+    start; it returns None once nothing is queued or in flight.
+    """
+
+    def __init__(self, per_host=CRAWL_PER_HOST, host_interval=CRAWL_HOST_INTERVAL, clock=time.monotonic):
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self._clock = clock
+        self._queues = OrderedDict()  # host -> deque of URLs (round-robin order)
+        self._active = {}
+        self._next_start = {}
+        self._seen = set()
+        self._pending = 0  # queued + in flight
+        self._cond = threading.Condition()
+
+    def add(self, url):
+        """Queue a URL (fragment dropped); returns False if it was seen before."""
+        url = urldefrag(url.strip())[0]
+        with self._cond:
+            if not url or url in self._seen:
+                return False
+            self._seen.add(url)
+            self._queues.setdefault(_host(url), deque()).append(url)
+            self._pending += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        with self._cond:
+            while True:
+                if self._pending == 0:
+                    return None
+                now = self._clock()
+                wait = None
+                for host, queue in self._queues.items():
+                    if not queue or self._active.get(host, 0) >= self.per_host:
+                        continue
+                    ready = self._next_start.get(host, 0.0)
+                    if ready > now:
+                        wait = ready - now if wait is None else min(wait, ready - now)
+                        continue
+                    url = queue.popleft()
+                    self._active[host] = self._active.get(host, 0) + 1
+                    self._next_start[host] = now + self.host_interval
+                    self._queues.move_to_end(host)
+                    return url
+                self._cond.wait(wait)
+
+    def done(self, url):
+        """Mark a URL from get() as finished."""
+        host = _host(url)
+        with self._cond:
+            self._active[host] -= 1
+            self._pending -= 1
+            self._cond.notify_all()
+
+
+def load_crawl_state(path=CRAWL_STATE_PATH):
+    """
+    Validators from previous runs.
+
+    Args:
+        path (Path): JSON state file
+
+    Returns:
+        dict: url -> {etag, last_modified, content_hash}
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Crawl state unreadable, fetching everything: {e}")
+        return {}
+
+
+def save_crawl_state(state, path=CRAWL_STATE_PATH):
+    """Write the crawl state atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def make_session(pool_size=CRAWL_WORKERS):
+    """requests session with a keep-alive pool sized for the fetchers."""
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch(session, url, validators=None, timeout=(CRAWL_CONNECT_TIMEOUT, CRAWL_READ_TIMEOUT)):
+    """
+    Conditional GET.
+
+    Args:
+        session (requests.Session): Session from make_session
+        url (str): Page URL
+        validators (dict): Previous etag / last_modified, if any
+        timeout (tuple): (connect, read) timeouts in seconds
+
+    Returns:
+        dict: url, status ('fetched', 'unchanged' or 'failed'), html,
+        etag, last_modified, content_hash, error
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    result = {"url": url, "status": "failed", "html": None, "error": None}
+    try:
+        r = session.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        result["error"] = str(e)
+        return result
+    if r.status_code == 304:
+        result["status"] = "unchanged"
+        return result
+    if not r.ok:
+        result["error"] = f"HTTP {r.status_code}"
+        return result
+    result.update(
+        html=r.text,
+        etag=r.headers.get("ETag"),
+        last_modified=r.headers.get("Last-Modified"),
+        content_hash=html_digest(r.text),
+    )
+    # Servers without validators: identical content counts as unchanged too
+    result["status"] = "unchanged" if result["content_hash"] == validators.get("content_hash") else "fetched"
+    return result
+
+
+def crawl(urls, extract, state=None, workers=CRAWL_WORKERS, per_host=CRAWL_PER_HOST,
+          host_interval=CRAWL_HOST_INTERVAL, extract_workers=CRAWL_EXTRACT_WORKERS, session=None,
+          archive_dir=HTML_ARCHIVE_DIR):
+    """
+    Fetch URLs concurrently and extract rows from changed pages.
+
+    `state` is updated in place for every page that was fetched and
+    extracted; save it with save_crawl_state once the rows are stored.
+
+    Args:
+        urls (list): Seed URLs
+        extract (callable): Module-level function (html, url) -> row dict or
+            None; runs in worker processes
+        state (dict): Result of load_crawl_state (None = fetch everything)
+        workers (int): Fetcher threads
+        per_host (int): Concurrent requests per host
+        host_interval (float): Seconds between request starts to one host
+        extract_workers (int): Extraction processes (0 = all cores)
+        session (requests.Session): Optional session (default: make_session)
+        archive_dir (Path): HTML archive for changed pages (None = no archive)
+
+    Returns:
+        list: One dict per URL: url, status ('extracted', 'empty',
+        'unchanged' or 'failed'), row, error
+    """
+    state = {} if state is None else state
+    frontier = Frontier(per_host, host_interval)
+    for url in urls:
+        frontier.add(url)
+    order = {urldefrag(url.strip())[0]: i for i, url in reversed(list(enumerate(urls)))}
+    session = session or make_session(workers)
+    extract_workers = extract_workers if extract_workers > 0 else (os.cpu_count() or 1)
+
+    fetched = []
+    lock = threading.Lock()
+
+    # Spawned workers do not inherit the fetcher threads' state
+    with ProcessPoolExecutor(
+        max_workers=extract_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        def fetcher():
+            while True:
+                url = frontier.get()
+                if url is None:
+                    return
+                try:
+                    result = fetch(session, url, state.get(url))
+                    if result["status"] == "fetched":
+                        if archive_dir is not None:
+                            try:
+                                archive_html(result["html"], url, {
+                                    "etag": result["etag"],
+                                    "last_modified": result["last_modified"],
+                                }, archive_dir)
+                            except OSError as e:
+                                print(f"Could not archive {url}: {e}")
+                        result["future"] = pool.submit(extract, result["html"], url)
+                    result["html"] = None
+                    with lock:
+                        fetched.append(result)
+                finally:
+                    frontier.done(url)
+
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            for future in [threads.submit(fetcher) for _ in range(workers)]:
+                future.result()
+
+        results = []
+        for result in fetched:
+            future = result.pop("future", None)
+            if future is not None:
+                try:
+                    result["row"] = future.result()
+                    result["status"] = "extracted" if result["row"] else "empty"
+                    state[result["url"]] = {
+                        "etag": result.get("etag"),
+                        "last_modified": result.get("last_modified"),
+                        "content_hash": result["content_hash"],
+                    }
+                except Exception as e:
+                    result["status"] = "failed"
+                    result["error"] = f"extraction failed: {e}"
+            results.append({
+                "url": result["url"],
+                "status": result["status"],
+                "row": result.get("row"),
+                "error": result.get("error"),
+            })
+    results.sort(key=lambda r: order.get(r["url"], len(order)))
+    return results
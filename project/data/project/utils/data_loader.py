@@ -2,17 +2,94 @@
 # DATA LOADER MODULE - DIELLA AI
 # ==========================================
 
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from .nlp_analysis import calculate_ttr, add_sentiment, add_topics
+from config import (
+    CORPUS_ARTIFACT_PATH,
+    SENTIMENT_POSITIVE_THRESHOLD,
+    SENTIMENT_NEGATIVE_THRESHOLD,
+    NUM_TOPICS,
+    NUM_TOP_WORDS,
+    TFIDF_MAX_FEATURES,
+    TFIDF_MIN_DF,
+)
+from .corpus_store import is_store_path, read_store, store_version
+from .hashing import text_hash
+from .tokenization import tokenize_corpus, type_token_ratios, word_counts
+from .nlp_analysis import (
+    add_sentiment,
+    assign_topics,
+    get_topic_model,
+)
 
+# Bump when the enrichment pipeline changes so old artifacts are rebuilt
+ARTIFACT_VERSION = 3
+ARTIFACT_METADATA_KEY = b"diella_artifact"
 
-def load_data(path):
+# Per-row features that only depend on the row's own text
+TEXT_FEATURE_COLUMNS = ["WordCount", "TTR", "SentimentScore", "SentimentLabel"]
+
+
+def _file_hash(path):
+    """BLAKE2 hash of a file's bytes."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_hash(path):
+    """Content version of a corpus source; O(1) for the append-only store."""
+    if is_store_path(path):
+        return text_hash(store_version(path), "store")
+    return _file_hash(path)
+
+
+def artifact_fingerprint(path):
+    """
+    Fingerprint of a corpus source and the settings that shape enrichment.
+
+    Args:
+        path (str): Path to the corpus CSV or SQLite store
+
+    Returns:
+        dict: Source hash, artifact version and relevant config values
+    """
+    return {
+        "version": ARTIFACT_VERSION,
+        "source_hash": _source_hash(path),
+        "settings": {
+            "SENTIMENT_POSITIVE_THRESHOLD": SENTIMENT_POSITIVE_THRESHOLD,
+            "SENTIMENT_NEGATIVE_THRESHOLD": SENTIMENT_NEGATIVE_THRESHOLD,
+            "NUM_TOPICS": NUM_TOPICS,
+            "NUM_TOP_WORDS": NUM_TOP_WORDS,
+            "TFIDF_MAX_FEATURES": TFIDF_MAX_FEATURES,
+            "TFIDF_MIN_DF": TFIDF_MIN_DF,
+        },
+    }
+
+
+def _same_settings(stored, current):
+    """True if a stored fingerprint was produced with the current pipeline/config."""
+    return (
+        stored.get("version") == current["version"]
+        and stored.get("settings") == current["settings"]
+    )
+
+
+def read_corpus_csv(path):
     """
-    Load and preprocess CSV data.
-    
+    Read the corpus CSV and normalize the required columns.
+
     Args:
         path (str): Path to CSV file
-        
+
     Returns:
         tuple: (pd.DataFrame, error_message) or (None, error_message) if failed
     """
@@ -22,7 +99,33 @@ def load_data(path):
         return None, f"CSV file not found: {path}"
     except Exception as e:
         return None, f"Error loading CSV: {str(e)}"
+    return _normalize_columns(df), None
+
+
+def read_corpus(path):
+    """
+    Read the corpus from a CSV file or the SQLite store (by file suffix).
+
+    Args:
+        path (str): Path to the corpus CSV or store
+
+    Returns:
+        tuple: (pd.DataFrame, error_message) or (None, error_message) if failed
+    """
+    if not is_store_path(path):
+        return read_corpus_csv(path)
+    if not os.path.exists(path):
+        return None, f"Corpus store not found: {path}"
+    try:
+        df = read_store(path)
+    except Exception as e:
+        return None, f"Error loading corpus store: {str(e)}"
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    return _normalize_columns(df), None
+
 
+def _normalize_columns(df):
+    """Ensure the required columns exist with clean types."""
     # Ensure required columns exist
     required_columns = ["Speech", "Speech_SQ", "Speaker", "Date"]
     for col in required_columns:
@@ -36,13 +139,287 @@ def load_data(path):
     df["Speech"] = df["Speech"].fillna("").astype(str)
     df["Speech_SQ"] = df["Speech_SQ"].fillna("").astype(str)
     df["Speaker"] = df["Speaker"].fillna("Unknown").astype(str)
+    return df
 
-    # Calculate basic metrics
-    df["WordCount"] = df["Speech"].apply(lambda x: len(str(x).split()))
-    df["TTR"] = df["Speech_SQ"].apply(calculate_ttr)
+
+def add_row_hashes(df):
+    """Add 'RowHash', a content hash of a row's English and Albanian text."""
+    df["RowHash"] = [
+        text_hash(f"{en}\x1f{sq}") for en, sq in zip(df["Speech"], df["Speech_SQ"])
+    ]
+    return df
+
+
+def add_text_features(df):
+    """
+    Add WordCount, TTR and sentiment columns.
+
+    Args:
+        df (pd.DataFrame): Dataframe with 'Speech' and 'Speech_SQ' columns
+
+    Returns:
+        pd.DataFrame: Dataframe with TEXT_FEATURE_COLUMNS
+    """
+    # Calculate basic metrics (shared tokenizer, one pass per language)
+    _, en_offsets = tokenize_corpus(df["Speech"], lang="en")
+    sq_ids, sq_offsets = tokenize_corpus(df["Speech_SQ"], lang="sq")
+    df["WordCount"] = word_counts(en_offsets).astype("int64")
+    df["TTR"] = type_token_ratios(sq_ids, sq_offsets)
 
     # Add NLP features
-    df = add_sentiment(df)
-    df = add_topics(df)
+    return add_sentiment(df)
+
+
+def _add_topic_columns(df, known, reuse, previous_topic_model_id, refit_topics):
+    """Assign topics, transforming only new rows with the persisted model."""
+    try:
+        topic_model = get_topic_model(df["Speech"], refit=refit_topics)
+    except Exception as e:
+        print(f"Topic modeling error: {e}")
+        topic_model = None
+
+    if topic_model is None:
+        df["Topic"] = -1
+        df["TopKeywords"] = ""
+        return df, None
+
+    # Rows from the previous artifact keep their topics if it used this model
+    if reuse is None or previous_topic_model_id != topic_model["model_id"]:
+        known = pd.Series(False, index=df.index)
+
+    topics = np.full(len(df), -1, dtype="int64")
+    keywords = np.full(len(df), "", dtype=object)
+    known_mask = known.to_numpy()
+    if known_mask.any():
+        hashes = df.loc[known, "RowHash"]
+        topics[known_mask] = reuse.loc[hashes, "Topic"].to_numpy()
+        keywords[known_mask] = reuse.loc[hashes, "TopKeywords"].to_numpy()
+    if (~known_mask).any():
+        new_topics, new_keywords = assign_topics(df.loc[~known, "Speech"], topic_model)
+        topics[~known_mask] = new_topics
+        keywords[~known_mask] = new_keywords
+
+    df["Topic"] = topics
+    df["TopKeywords"] = keywords
+    return df, topic_model["model_id"]
+
+
+def _reuse_table(previous):
+    """Previously enriched rows indexed by RowHash, or None."""
+    if previous is None or "RowHash" not in previous.columns:
+        return None
+    return previous.drop_duplicates(subset=["RowHash"]).set_index("RowHash")
+
+
+def add_topics(df, previous=None, previous_topic_model_id=None, refit_topics=False):
+    """
+    Add Topic and TopKeywords; rows already in `previous` keep their topics
+    when it was produced by the current topic model.
+
+    Args:
+        df (pd.DataFrame): Corpus with 'Speech' and 'RowHash' columns
+        previous (pd.DataFrame): Previously enriched corpus (optional)
+        previous_topic_model_id (str): Topic model that produced `previous`
+        refit_topics (bool): Force a full NMF refit
+
+    Returns:
+        tuple: (pd.DataFrame, topic model id or None)
+    """
+    reuse = _reuse_table(previous)
+    known = (
+        df["RowHash"].isin(reuse.index)
+        if reuse is not None
+        else pd.Series(False, index=df.index)
+    )
+    return _add_topic_columns(df, known, reuse, previous_topic_model_id, refit_topics)
+
+
+def enrich_corpus(df, previous=None, previous_topic_model_id=None, refit_topics=False):
+    """
+    Add WordCount, TTR, sentiment and topic columns.
+    Rows whose content hash already appears in `previous` reuse its
+    features; only new or changed rows are computed. New rows get topics
+    from the persisted TF-IDF/NMF model via transform; NMF is refit on
+    demand or when the share of unseen speeches exceeds TOPIC_REFIT_DRIFT.
+
+    Args:
+        df (pd.DataFrame): Normalized corpus from read_corpus
+        previous (pd.DataFrame): Previously enriched corpus (optional)
+        previous_topic_model_id (str): Topic model that produced `previous`
+        refit_topics (bool): Force a full NMF refit
+
+    Returns:
+        tuple: (enriched pd.DataFrame, topic model id or None)
+    """
+    df = add_row_hashes(df)
+
+    reuse = _reuse_table(previous)
+    known = (
+        df["RowHash"].isin(reuse.index)
+        if reuse is not None
+        else pd.Series(False, index=df.index)
+    )
+
+    parts = []
+    if known.any():
+        parts.append(df.loc[known].join(reuse[TEXT_FEATURE_COLUMNS], on="RowHash"))
+    if (~known).any() or not parts:
+        parts.append(add_text_features(df.loc[~known].copy()))
+    df = pd.concat(parts).loc[df.index] if len(parts) > 1 else parts[0]
+    if reuse is not None:
+        print(f"Enrichment: {int((~known).sum())} new rows computed, {int(known.sum())} reused")
+
+    df, topic_model_id = _add_topic_columns(
+        df, known, reuse, previous_topic_model_id, refit_topics
+    )
+    return df, topic_model_id
+
+
+def read_corpus_artifact(artifact_path=CORPUS_ARTIFACT_PATH):
+    """
+    Read the enriched corpus artifact and its stored fingerprint.
+
+    Args:
+        artifact_path (Path): Path to the Parquet artifact
+
+    Returns:
+        tuple: (pd.DataFrame, dict fingerprint) or (None, {}) if unavailable
+    """
+    artifact_path = Path(artifact_path)
+    if not artifact_path.exists():
+        return None, {}
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None, {}
+
+    try:
+        table = pq.read_table(artifact_path)
+        metadata = table.schema.metadata or {}
+        stored = json.loads(metadata.get(ARTIFACT_METADATA_KEY, b"{}"))
+        return table.to_pandas(), stored
+    except Exception as e:
+        print(f"Corpus artifact unreadable, ignoring it: {e}")
+        return None, {}
+
+
+def load_corpus_artifact(path, artifact_path=CORPUS_ARTIFACT_PATH):
+    """
+    Read the precomputed enriched corpus if it matches the corpus source.
+
+    Args:
+        path (str): Path to the corpus CSV or SQLite store
+        artifact_path (Path): Path to the Parquet artifact
+
+    Returns:
+        pd.DataFrame or None: Enriched dataframe, or None if missing/stale
+    """
+    artifact_path = Path(artifact_path)
+    if not artifact_path.exists() or not os.path.exists(path):
+        return None
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+
+    try:
+        metadata = pq.read_schema(artifact_path).metadata or {}
+        stored = json.loads(metadata.get(ARTIFACT_METADATA_KEY, b"{}"))
+        current = artifact_fingerprint(path)
+        if not _same_settings(stored, current) or stored.get("source_hash") != current["source_hash"]:
+            return None
+        return pq.read_table(artifact_path).to_pandas()
+    except Exception as e:
+        print(f"Corpus artifact unreadable, ignoring it: {e}")
+        return None
+
+
+def _enrich_from_source(path, refit_topics=False, incremental=True):
+    """Read the corpus and enrich it, reusing the previous artifact when compatible."""
+    df, err = read_corpus(path)
+    if err:
+        return None, None, err
+
+    previous, stored = read_corpus_artifact() if incremental else (None, {})
+    current = artifact_fingerprint(path)
+    if previous is not None and not _same_settings(stored, current):
+        previous, stored = None, {}
+
+    df, topic_model_id = enrich_corpus(
+        df,
+        previous=previous,
+        previous_topic_model_id=stored.get("topic_model_id"),
+        refit_topics=refit_topics,
+    )
+    current["topic_model_id"] = topic_model_id
+    return df, current, None
+
+
+def build_corpus_artifact(path, artifact_path=CORPUS_ARTIFACT_PATH, refit_topics=False, incremental=True):
+    """
+    Enrich the corpus and write it as a compressed Parquet file.
+    The source hash (CSV bytes or store version), relevant config settings and topic model id are
+    stored in the file's schema metadata so load_data can tell whether
+    it is current. With incremental=True only new rows are computed.
+
+    Args:
+        path (str): Path to the corpus CSV or SQLite store
+        artifact_path (Path): Path to the Parquet artifact
+        refit_topics (bool): Force a full NMF refit
+        incremental (bool): Reuse features from the existing artifact
+
+    Returns:
+        tuple: (pd.DataFrame, error_message) or (None, error_message) if failed
+    """
+    df, fingerprint, err = _enrich_from_source(path, refit_topics, incremental)
+    if err:
+        return None, err
+    write_corpus_artifact(df, fingerprint, artifact_path)
+    return df, None
+
+
+def write_corpus_artifact(df, fingerprint, artifact_path=CORPUS_ARTIFACT_PATH):
+    """
+    Write an enriched corpus atomically as zstd Parquet with its fingerprint.
+
+    Args:
+        df (pd.DataFrame): Enriched corpus
+        fingerprint (dict): artifact_fingerprint of the source plus topic_model_id
+        artifact_path (Path): Path to the Parquet artifact
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[ARTIFACT_METADATA_KEY] = json.dumps(fingerprint).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    artifact_path = Path(artifact_path)
+    artifact_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = artifact_path.with_suffix(f".{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, artifact_path)
+
+
+def load_data(path):
+    """
+    Load and preprocess the corpus (CSV file or SQLite store).
+    Uses the precomputed corpus artifact when it matches the source and
+    config; otherwise enriches the source, computing only rows that are
+    not already in the artifact.
+
+    Args:
+        path (str): Path to the corpus CSV or SQLite store
+
+    Returns:
+        tuple: (pd.DataFrame, error_message) or (None, error_message) if failed
+    """
+    df = load_corpus_artifact(path)
+    if df is not None:
+        return df, None
 
-    return df, None
\ No newline at end of file
+    df, _, err = _enrich_from_source(path)
+    if err:
+        return None, err
+    return df, None
@@ -0,0 +1,132 @@
+# ==========================================
+# EMBEDDING CACHE MODULE - DIELLA AI
+# ==========================================
+
+import os
+import re
+
+import numpy as np
+from config import EMBEDDING_CACHE_DIR, VECTOR_MODEL
+from .hashing import text_hash
+
+
+def _cache_path(model_name):
+    """On-disk store for one embedding model (one .npz file per model)."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(model_name))
+    return EMBEDDING_CACHE_DIR / f"{slug}.npz"
+
+
+def load_embedding_cache(model_name=VECTOR_MODEL):
+    """
+    Load the content-addressed embedding store for a model.
+
+    Args:
+        model_name (str): SentenceTransformer model name
+
+    Returns:
+        tuple: (dict key -> row, np.ndarray of float32 vectors or None)
+    """
+    path = _cache_path(model_name)
+    if not path.exists():
+        return {}, None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            keys = data["keys"]
+            vectors = np.asarray(data["vectors"], dtype="float32")
+    except Exception as e:
+        print(f"Embedding cache unreadable, ignoring it: {e}")
+        return {}, None
+    lookup = {k.decode("ascii"): i for i, k in enumerate(keys)}
+    return lookup, vectors
+
+
+def save_embedding_cache(lookup, vectors, model_name=VECTOR_MODEL):
+    """
+    Write the embedding store atomically (temp file + rename).
+
+    Args:
+        lookup (dict): key -> row in vectors
+        vectors (np.ndarray): float32 matrix
+        model_name (str): SentenceTransformer model name
+    """
+    path = _cache_path(model_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    keys = np.empty(len(lookup), dtype="S32")
+    for key, row in lookup.items():
+        keys[row] = key.encode("ascii")
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, keys=keys, vectors=vectors)
+    os.replace(tmp_path, path)
+
+
+def encode_with_cache(model, texts, model_name=VECTOR_MODEL, batch_size=None):
+    """
+    Encode texts, reusing cached embeddings for texts seen before.
+    Only new or changed texts are sent to the model; the store is keyed
+    by a hash of each text plus the model name. With batch_size the new
+    texts are encoded in batches and the store is written after each one,
+    so an interrupted run keeps the batches it finished.
+
+    Args:
+        model: SentenceTransformer model
+        texts (list): Texts to encode
+        model_name (str): Model name used in the cache key
+        batch_size (int): New texts per checkpointed batch (None = one batch)
+
+    Returns:
+        tuple: (np.ndarray float32 embeddings, dict hit/miss report)
+    """
+    keys = [text_hash(t, model_name) for t in texts]
+    lookup, vectors = load_embedding_cache(model_name)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in lookup and key not in missing:
+            missing[key] = text
+
+    missing_keys = list(missing)
+    step = batch_size or len(missing_keys) or 1
+    for batch_start in range(0, len(missing_keys), step):
+        batch_keys = missing_keys[batch_start:batch_start + step]
+        new_vectors = model.encode(
+            [missing[k] for k in batch_keys],
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+        new_vectors = np.asarray(new_vectors, dtype="float32")
+        if new_vectors.ndim == 1:
+            new_vectors = new_vectors.reshape(1, -1)
+        if vectors is None or vectors.shape[1] != new_vectors.shape[1]:
+            lookup, vectors = {}, np.empty((0, new_vectors.shape[1]), dtype="float32")
+        start = len(vectors)
+        for offset, key in enumerate(batch_keys):
+            lookup[key] = start + offset
+        vectors = np.vstack([vectors, new_vectors])
+        try:
+            save_embedding_cache(lookup, vectors, model_name)
+        except OSError as e:
+            print(f"Could not write embedding cache: {e}")
+        if batch_size and len(missing_keys) > step:
+            done = min(batch_start + step, len(missing_keys))
+            print(f"Embeddings: {done}/{len(missing_keys)} new texts encoded")
+
+    embeddings = vectors[[lookup[k] for k in keys]] if keys else np.empty((0, 0), dtype="float32")
+
+    unique = len(set(keys))
+    report = {
+        "total": len(keys),
+        "unique": unique,
+        "hits": unique - len(missing),
+        "misses": len(missing),
+        "skipped_pct": round(100.0 * (unique - len(missing)) / unique, 1) if unique else 0.0,
+    }
+    return embeddings, report
+
+
+def format_cache_report(report):
+    """Human-readable one-line hit/miss summary."""
+    return (
+        f"Embedding cache: {report['hits']} hits, {report['misses']} misses "
+        f"({report['skipped_pct']}% of {report['unique']} unique texts skipped encoding)"
+    )
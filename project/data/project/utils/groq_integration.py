@@ -1,59 +1,99 @@
 # ==========================================
 # GROQ INTEGRATION MODULE - DIELLA AI
 # ==========================================
+# Pooled Groq client and its retrying request helper. Answers (and the
+# Q&A prompt) live in utils/llm_backends (GroqBackend).
 
-from groq import Groq
-import pandas as pd
+import threading
 
+import httpx
+from groq import APIConnectionError, Groq
+from config import (
+    GROQ_BASE_URL, GROQ_CONNECT_TIMEOUT, GROQ_READ_TIMEOUT, GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_RETRIES, GROQ_RETRY_BASE_DELAY, GROQ_RETRY_MAX_DELAY,
+    GROQ_BREAKER_FAILURES, GROQ_BREAKER_RESET,
+)
+from .resilience import CircuitBreaker, call_with_retries
 
-def generate_qa_response_groq(query, context_text, sources, api_key, model):
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Shared by every Groq call in the process
+groq_breaker = CircuitBreaker("groq", GROQ_BREAKER_FAILURES, GROQ_BREAKER_RESET)
+
+
+def get_groq_client(api_key, base_url=GROQ_BASE_URL):
     """
-    Generate Q&A response using Groq API.
-    
+    Long-lived Groq client (one per key and base URL) with a keep-alive
+    connection pool and explicit timeouts. The SDK's own retries are
+    disabled; _create retries with jitter behind the circuit breaker.
+
     Args:
-        query (str): User query in Albanian
-        context_text (str): Context from documents
-        sources (list): List of source documents
         api_key (str): Groq API key
-        model (str): Model name
-        
+        base_url (str): API base URL, or None for the Groq default
+
     Returns:
-        tuple: (response_text, sources)
+        Groq: Client
     """
-    if not sources or not context_text:
-        return "Nuk u gjetën burime të përshtatshme.", []
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = Groq(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=httpx.Timeout(GROQ_READ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT),
+                max_retries=0,
+                http_client=httpx.Client(limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                )),
+            )
+            _clients[(api_key, base_url)] = client
+        return client
+
 
+def _is_transient(error):
+    """Connection errors, timeouts, 408/409/429 and 5xx are worth retrying."""
+    if isinstance(error, (APIConnectionError, httpx.TransportError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header, if the response has one."""
+    response = getattr(error, "response", None)
     try:
-        client = Groq(api_key=api_key)
-
-        system_msg = (
-            "Ti je DIELLA AI — asistent ekspert që përgjigjet vetëm në shqip. "
-            "Përdor VETËM informacionin që ndodhet në KONTEKSTIN e dhënë më poshtë. "
-            "Përgjigju shkurt, qartë dhe jep referencat në formatin [n] ku n është numri i burimit. "
-            "Nëse informacioni nuk është i mjaftueshëm në burime, thuaj qartë se 'Nuk ka informacion të mjaftueshëm në burimet e dhëna'. "
-            "Mos imagjino informacion të ri jashtë kontekstit. Jep një përmbledhje 2-4 rreshtash."
-        )
-
-        user_msg = (
-            f"Pyetja e përdoruesit: \"{query}\"\n\n"
-            "KONTEKSTI (Burimet e Deklaratave të numëruara):\n"
-            f"{context_text}\n\n"
-            "Përgjigju në shqip, përdor vetëm këtë kontekst dhe cito burimin(ët) në tekst me [n]."
-        )
-
-        message = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-            model=model,
-            temperature=0.7,
-            max_tokens=500,
-        )
-
-        response_text = message.choices[0].message.content.strip()
-        return response_text, sources
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
 
+def _create(api_key, **kwargs):
+    """Chat completion with retries and the circuit breaker."""
+    client = get_groq_client(api_key, GROQ_BASE_URL)
+    return call_with_retries(
+        lambda: client.chat.completions.create(**kwargs),
+        _is_transient,
+        retries=GROQ_MAX_RETRIES,
+        base_delay=GROQ_RETRY_BASE_DELAY,
+        max_delay=GROQ_RETRY_MAX_DELAY,
+        breaker=groq_breaker,
+        retry_after=_retry_after,
+    )
+
+
+def _iter_text(stream):
+    """Text deltas of a streamed chat completion (empty deltas skipped)."""
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
     except Exception as e:
-        error_msg = f"Gabim gjatë komunikimit me Groq: {str(e)}"
-        return error_msg, []
\ No newline at end of file
+        if _is_transient(e):
+            groq_breaker.record_failure()
+        raise
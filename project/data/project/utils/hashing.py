@@ -0,0 +1,46 @@
+# ==========================================
+# HASHING MODULE - DIELLA AI
+# ==========================================
+
+import hashlib
+
+
+def text_hash(text, salt=""):
+    """
+    Content hash for a single text.
+
+    Args:
+        text (str): Input text
+        salt (str): Optional namespace mixed into the hash (e.g. model name)
+
+    Returns:
+        str: 32-character hex digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if salt:
+        h.update(str(salt).encode("utf-8"))
+        h.update(b"\x00")
+    h.update(str(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+
+def texts_fingerprint(texts, *parts):
+    """
+    Order-sensitive fingerprint of a list of texts plus extra settings.
+
+    Args:
+        texts (iterable): Texts (or per-text hashes) in corpus order
+        *parts: Extra values that change the result (model name, config, ...)
+
+    Returns:
+        str: 32-character hex digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    for text in texts:
+        h.update(str(text).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
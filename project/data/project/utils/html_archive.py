@@ -0,0 +1,139 @@
+# ==========================================
+# HTML ARCHIVE MODULE - DIELLA AI
+# ==========================================
+# Content-addressed store of fetched article HTML. Each distinct page body
+# is written once, gzip-compressed, under objects/<2 hex>/<digest>.html.gz;
+# fetch metadata (URL, time, validators) is appended to index.jsonl. Rows
+# can then be re-extracted offline, in parallel, without refetching.
+
+import gzip
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import HTML_ARCHIVE_DIR
+from .hashing import text_hash
+
+_index_lock = threading.Lock()
+
+
+def html_digest(html):
+    """Content address of a page body (same hash the crawler compares)."""
+    return text_hash(html, "html")
+
+
+def _object_path(digest, archive_dir):
+    return archive_dir / "objects" / digest[:2] / f"{digest}.html.gz"
+
+
+def archive_html(html, url, meta=None, archive_dir=HTML_ARCHIVE_DIR):
+    """
+    Store a fetched page and record the fetch.
+
+    Args:
+        html (str): Page body
+        url (str): Page URL
+        meta (dict): Extra fetch metadata (etag, last_modified, ...)
+        archive_dir (Path): Archive root
+
+    Returns:
+        str: Content digest
+    """
+    digest = html_digest(html)
+    path = _object_path(digest, archive_dir)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+    record = {"url": url, "digest": digest, "fetched_at": time.time(), **(meta or {})}
+    with _index_lock, open(archive_dir / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return digest
+
+
+def read_html(digest, archive_dir=HTML_ARCHIVE_DIR):
+    """Archived page body for a digest."""
+    with gzip.open(_object_path(digest, archive_dir), "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def latest_snapshots(archive_dir=HTML_ARCHIVE_DIR):
+    """
+    Most recent archived fetch of every URL.
+
+    Args:
+        archive_dir (Path): Archive root
+
+    Returns:
+        dict: url -> index record (url, digest, fetched_at, ...), in first-seen URL order
+    """
+    snapshots = {}
+    try:
+        with open(archive_dir / "index.jsonl", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # partial line from an interrupted write
+                snapshots[record["url"]] = record
+    except FileNotFoundError:
+        pass
+    return snapshots
+
+
+def _extract_snapshot(extract, record, archive_dir):
+    """Worker: read one archived page and run the extractor on it."""
+    try:
+        html = read_html(record["digest"], archive_dir)
+    except OSError as e:
+        return None, f"archive read failed: {e}"
+    try:
+        return extract(html, record["url"], record.get("fetched_at")), None
+    except Exception as e:
+        return None, f"extraction failed: {e}"
+
+
+def reextract(extract, archive_dir=HTML_ARCHIVE_DIR, workers=0):
+    """
+    Rebuild rows from the latest archived snapshot of every URL (no network).
+
+    Args:
+        extract (callable): Module-level function (html, url, fetched_at) ->
+            row dict or None
+        archive_dir (Path): Archive root
+        workers (int): Worker processes (0 = all cores, 1 = in-process)
+
+    Returns:
+        list: One dict per URL: url, status ('extracted', 'empty' or
+        'failed'), row, error
+    """
+    records = list(latest_snapshots(archive_dir).values())
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    n = len(records)
+    if workers <= 1 or n <= 1:
+        outputs = [_extract_snapshot(extract, r, archive_dir) for r in records]
+    else:
+        # Spawned workers: forking a process that runs threads (the app,
+        # the crawler's fetchers) can deadlock the children on held locks
+        with ProcessPoolExecutor(
+            max_workers=min(workers, n),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            outputs = list(pool.map(
+                _extract_snapshot, [extract] * n, records, [archive_dir] * n,
+                chunksize=max(1, n // (workers * 4)),
+            ))
+    return [
+        {
+            "url": record["url"],
+            "status": "failed" if error else ("extracted" if row else "empty"),
+            "row": row,
+            "error": error,
+        }
+        for record, (row, error) in zip(records, outputs)
+    ]
@@ -0,0 +1,235 @@
+# ==========================================
+# LEXICAL INDEX MODULE - DIELLA AI
+# ==========================================
+# BM25 inverted index over Speech_SQ passages for exact terms (names,
+# places, procurement codes) that dense embeddings miss. Postings are flat
+# arrays (CSR by term: passage ids + precomputed BM25 weights), so a query
+# is a few array slices and one bincount. Persisted per corpus fingerprint.
+
+import os
+
+import numpy as np
+from config import LEXICAL_INDEX_DIR, BM25_K1, BM25_B, RRF_K
+from .chunking import chunking_settings
+from .hashing import texts_fingerprint
+from .tokenization import search_terms, token_ids, token_strings, tokenize_corpus
+
+# Bump when tokenization or the file layout changes
+LEXICAL_FORMAT = "bm25-csr-v1"
+
+# Albanian function and question words (diacritics folded). With a small
+# corpus their IDF is high enough to match off-topic questions.
+SEARCH_STOPWORDS = frozenset({
+    "a", "ai", "ajo", "ata", "ato", "cfare", "cila", "cilat", "cilet", "cili",
+    "deri", "do", "dhe", "duhet", "e", "edhe", "eshte", "i", "ishte", "jam",
+    "jane", "je", "jemi", "jo", "ka", "kane", "kemi", "kete", "keshtu", "kjo",
+    "ku", "kur", "kush", "ky", "me", "mbi", "mund", "nga", "ndaj", "ne", "nje",
+    "nuk", "ose", "pa", "per", "po", "por", "pra", "pse", "qe", "sa", "se",
+    "si", "tani", "te", "tek", "tha", "thote", "u",
+})
+
+
+def lexical_fingerprint(passages):
+    """
+    Fingerprint of the indexed passages and BM25 settings.
+
+    Args:
+        passages (pd.DataFrame): Passage table (utils.chunking.build_passages)
+
+    Returns:
+        str: Hex digest identifying the persisted index
+    """
+    return texts_fingerprint(
+        (f"{r}:{t}" for r, t in zip(passages["Row"], passages["Text"])),
+        LEXICAL_FORMAT,
+        BM25_K1,
+        BM25_B,
+        chunking_settings(),
+        sorted(SEARCH_STOPWORDS),
+    )
+
+
+def _index_path(fingerprint, index_dir=LEXICAL_INDEX_DIR):
+    return index_dir / f"{fingerprint}.npz"
+
+
+def _with_lookup(index):
+    index["lookup"] = {term: i for i, term in enumerate(index["terms"].tolist())}
+    return index
+
+
+def build_lexical_index(passages, k1=BM25_K1, b=BM25_B):
+    """
+    Build BM25 postings keyed by passage id.
+
+    Args:
+        passages (pd.DataFrame): Passage table with a 'Text' column
+        k1 (float): BM25 term-frequency saturation
+        b (float): BM25 length normalization
+
+    Returns:
+        dict: terms, term_offsets, doc_ids, weights, n_rows, lookup
+    """
+    ids, offsets = tokenize_corpus(passages["Text"], lang="search")
+    n_rows = len(offsets) - 1
+    rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(offsets))
+    keep = ~np.isin(ids, token_ids(SEARCH_STOPWORDS))
+    ids, rows = ids[keep], rows[keep]
+    lengths = np.bincount(rows, minlength=n_rows)
+    n_docs = max(int((lengths > 0).sum()), 1)
+    avgdl = max(float(lengths.sum()) / n_docs, 1.0)
+
+    # (doc, term) pairs with term frequencies
+    width = int(ids.max()) + 1 if len(ids) else 1
+    pairs, tf = np.unique(rows * width + ids, return_counts=True)
+    docs = (pairs // width).astype(np.int32)
+    vocab_ids, term_idx = np.unique(pairs % width, return_inverse=True)
+
+    doc_freq = np.bincount(term_idx, minlength=len(vocab_ids))
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    norm = k1 * (1.0 - b + b * lengths[docs] / avgdl)
+    weights = idf[term_idx] * tf * (k1 + 1.0) / (tf + norm)
+
+    order = np.argsort(term_idx, kind="stable")
+    term_offsets = np.zeros(len(vocab_ids) + 1, dtype=np.int64)
+    np.cumsum(doc_freq, out=term_offsets[1:])
+    return _with_lookup({
+        "terms": np.array(token_strings(vocab_ids), dtype=str),
+        "term_offsets": term_offsets,
+        "doc_ids": docs[order],
+        "weights": weights[order].astype(np.float32),
+        "n_rows": n_rows,
+    })
+
+
+def save_lexical_index(index, fingerprint, index_dir=LEXICAL_INDEX_DIR):
+    """
+    Write the postings atomically; indexes for older fingerprints are removed.
+
+    Args:
+        index (dict): Result of build_lexical_index
+        fingerprint (str): Corpus fingerprint
+        index_dir (Path): Directory with persisted indexes
+
+    Returns:
+        Path: Path of the written file
+    """
+    index_dir.mkdir(parents=True, exist_ok=True)
+    path = _index_path(fingerprint, index_dir)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            terms=index["terms"],
+            term_offsets=index["term_offsets"],
+            doc_ids=index["doc_ids"],
+            weights=index["weights"],
+            n_rows=np.int64(index["n_rows"]),
+        )
+    os.replace(tmp_path, path)
+    for old in index_dir.glob("*.npz"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+def load_lexical_index(fingerprint, index_dir=LEXICAL_INDEX_DIR):
+    """
+    Load persisted postings for a fingerprint.
+
+    Args:
+        fingerprint (str): Corpus fingerprint
+        index_dir (Path): Directory with persisted indexes
+
+    Returns:
+        dict or None: Index, or None if missing or unreadable
+    """
+    path = _index_path(fingerprint, index_dir)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            index = {key: data[key] for key in data.files}
+        index["n_rows"] = int(index["n_rows"])
+        return _with_lookup(index)
+    except Exception as e:
+        print(f"Lexical index unreadable, rebuilding: {e}")
+        return None
+
+
+def get_lexical_index(passages):
+    """
+    Load the BM25 index for a corpus, building and persisting it if needed.
+
+    Args:
+        passages (pd.DataFrame): Passage table (utils.chunking.build_passages)
+
+    Returns:
+        dict: Lexical index
+    """
+    fingerprint = lexical_fingerprint(passages)
+    index = load_lexical_index(fingerprint)
+    if index is None:
+        index = build_lexical_index(passages)
+        try:
+            save_lexical_index(index, fingerprint)
+        except OSError as e:
+            print(f"Could not persist lexical index: {e}")
+    return index
+
+
+def bm25_search(index, query, k=20, id_bitmap=None, min_score=0.0):
+    """
+    Rank passages by BM25 score for a query.
+
+    Args:
+        index (dict): Lexical index
+        query (str): Query text
+        k (int): Maximum number of results
+        id_bitmap (np.ndarray): Packed bitmap of allowed passage ids (optional)
+        min_score (float): Drop results with a lower score
+
+    Returns:
+        tuple: (np.ndarray passage ids, np.ndarray scores), best first
+    """
+    empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    words = search_terms(query) - SEARCH_STOPWORDS
+    terms = {index["lookup"].get(w) for w in words}
+    terms.discard(None)
+    if not terms or k <= 0:
+        return empty
+
+    rows = np.fromiter(terms, dtype=np.int64)
+    starts, ends = index["term_offsets"][rows], index["term_offsets"][rows + 1]
+    docs = np.concatenate([index["doc_ids"][s:e] for s, e in zip(starts, ends)])
+    weights = np.concatenate([index["weights"][s:e] for s, e in zip(starts, ends)])
+    scores = np.bincount(docs, weights=weights, minlength=index["n_rows"])
+
+    if id_bitmap is not None:
+        allowed = np.unpackbits(id_bitmap, count=index["n_rows"], bitorder="little")
+        scores[allowed == 0] = 0.0
+
+    candidates = np.flatnonzero((scores > 0) & (scores >= min_score))
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    order = np.lexsort((candidates, -scores[candidates]))
+    candidates = candidates[order]
+    return candidates.astype(np.int64), scores[candidates].astype(np.float32)
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse ranked lists of ids with reciprocal-rank fusion.
+
+    Args:
+        rankings (list): Ranked id lists (best first), one per retriever
+        k (int): RRF constant; larger values flatten the rank weights
+
+    Returns:
+        list: (id, fused score) pairs, best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, start=1):
+            fused[int(position)] = fused.get(int(position), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
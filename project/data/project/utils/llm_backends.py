@@ -0,0 +1,380 @@
+# ==========================================
+# LLM BACKENDS MODULE - DIELLA AI
+# ==========================================
+# Interchangeable text-generation backends for Q&A answers: the Groq cloud
+# API and a local Ollama-compatible HTTP server (air-gapped or
+# cost-sensitive deployments). Selected with LLM_BACKEND in config.py.
+# Every backend caps its concurrent requests with its own semaphore and
+# has its own timeouts, retries and circuit breaker.
+
+import json
+import threading
+
+import httpx
+from config import (
+    LLM_BACKEND, LLM_QUEUE_TIMEOUT,
+    GROQ_API_KEY, GROQ_MODEL, GROQ_MAX_CONCURRENCY,
+    OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT,
+    OLLAMA_MAX_RETRIES, OLLAMA_MAX_CONCURRENCY, OLLAMA_RETRY_BASE_DELAY, OLLAMA_RETRY_MAX_DELAY,
+    OLLAMA_BREAKER_FAILURES, OLLAMA_BREAKER_RESET,
+)
+from .resilience import CircuitBreaker, call_with_retries
+
+# Generation settings for Q&A answers (part of PROMPT_VERSION)
+TEMPERATURE = 0.7
+MAX_TOKENS = 500
+
+NO_SOURCES_MESSAGE = "Nuk u gjetën burime të përshtatshme."
+
+# Bump when the prompt or generation settings change (invalidates cached answers)
+PROMPT_VERSION = "1"
+
+
+def _build_messages(query, context_text):
+    """System and user messages for a RAG question."""
+    system_msg = (
+        "Ti je DIELLA AI — asistent ekspert që përgjigjet vetëm në shqip. "
+        "Përdor VETËM informacionin që ndodhet në KONTEKSTIN e dhënë më poshtë. "
+        "Përgjigju shkurt, qartë dhe jep referencat në formatin [n] ku n është numri i burimit. "
+        "Nëse informacioni nuk është i mjaftueshëm në burime, thuaj qartë se 'Nuk ka informacion të mjaftueshëm në burimet e dhëna'. "
+        "Mos imagjino informacion të ri jashtë kontekstit. Jep një përmbledhje 2-4 rreshtash."
+    )
+
+    user_msg = (
+        f"Pyetja e përdoruesit: \"{query}\"\n\n"
+        "KONTEKSTI (Burimet e Deklaratave të numëruara):\n"
+        f"{context_text}\n\n"
+        "Përgjigju në shqip, përdor vetëm këtë kontekst dhe cito burimin(ët) në tekst me [n]."
+    )
+
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": user_msg},
+    ]
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when no request slot of a backend frees up in time."""
+
+
+class _SlotStream:
+    """Iterator over streamed text that frees its request slot when done."""
+
+    def __init__(self, chunks, release):
+        self._chunks = chunks
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+
+    __del__ = close
+
+
+class LLMBackend:
+    """
+    Base class: subclasses implement _generate and _stream.
+    _stream must send the request before returning, so connection and
+    authentication errors surface when the stream is started.
+    """
+
+    name = "llm"
+    label = "LLM"
+
+    def __init__(self, model, max_concurrency, queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def cache_id(self):
+        """Identifies the backend and model in answer cache keys."""
+        return f"{self.name}:{self.model}"
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMBusyError(
+                f"{self.label} is busy ({self.max_concurrency} requests in progress)"
+            )
+
+    def generate(self, messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS):
+        """
+        Complete a chat.
+
+        Args:
+            messages (list): Chat messages ({role, content})
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum tokens to generate
+
+        Returns:
+            str: Generated text
+        """
+        self._acquire()
+        try:
+            return self._generate(messages, temperature, max_tokens)
+        finally:
+            self._slots.release()
+
+    def stream(self, messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS):
+        """
+        Start a streamed chat completion; the request slot is held until
+        the returned iterator is exhausted or closed.
+
+        Args:
+            messages (list): Chat messages ({role, content})
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum tokens to generate
+
+        Returns:
+            iterator: Text chunks
+        """
+        self._acquire()
+        try:
+            chunks = self._stream(messages, temperature, max_tokens)
+        except BaseException:
+            self._slots.release()
+            raise
+        return _SlotStream(iter(chunks), self._slots.release)
+
+    def _generate(self, messages, temperature, max_tokens):
+        raise NotImplementedError
+
+    def _stream(self, messages, temperature, max_tokens):
+        raise NotImplementedError
+
+
+class GroqBackend(LLMBackend):
+    """Groq cloud API (shared pooled client, retries and breaker)."""
+
+    name = "groq"
+    label = "Groq"
+
+    def __init__(self, api_key=GROQ_API_KEY, model=GROQ_MODEL, max_concurrency=GROQ_MAX_CONCURRENCY, **kwargs):
+        super().__init__(model, max_concurrency, **kwargs)
+        self.api_key = api_key
+
+    # The groq SDK is only imported once a Groq request is made, so an
+    # Ollama-only deployment does not need it
+    def _generate(self, messages, temperature, max_tokens):
+        from .groq_integration import _create
+
+        message = _create(
+            self.api_key,
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return message.choices[0].message.content.strip()
+
+    def _stream(self, messages, temperature, max_tokens):
+        from .groq_integration import _create, _iter_text
+
+        return _iter_text(_create(
+            self.api_key,
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        ))
+
+
+class OllamaError(RuntimeError):
+    """Error response from an Ollama-compatible server."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _ollama_transient(error):
+    if isinstance(error, httpx.TransportError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 429) or (status is not None and status >= 500)
+
+
+class OllamaBackend(LLMBackend):
+    """Local model behind an Ollama-compatible /api/chat endpoint."""
+
+    name = "ollama"
+    label = "Ollama"
+
+    def __init__(self, base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL,
+                 max_concurrency=OLLAMA_MAX_CONCURRENCY, connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout=OLLAMA_READ_TIMEOUT, retries=OLLAMA_MAX_RETRIES,
+                 retry_base_delay=OLLAMA_RETRY_BASE_DELAY, retry_max_delay=OLLAMA_RETRY_MAX_DELAY,
+                 breaker_failures=OLLAMA_BREAKER_FAILURES, breaker_reset=OLLAMA_BREAKER_RESET, **kwargs):
+        super().__init__(model, max_concurrency, **kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = CircuitBreaker("ollama", failure_threshold=breaker_failures, reset_timeout=breaker_reset)
+        self._client = httpx.Client(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+
+    def _payload(self, messages, temperature, max_tokens, stream):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "options": {"temperature": temperature, "num_predict": max_tokens},
+        }
+
+    @staticmethod
+    def _raise_for_status(response):
+        if response.status_code < 400:
+            return
+        try:
+            detail = response.json().get("error") or response.text
+        except ValueError:
+            detail = response.text
+        raise OllamaError(f"HTTP {response.status_code}: {detail}", response.status_code)
+
+    def _call(self, fn):
+        return call_with_retries(
+            fn,
+            _ollama_transient,
+            retries=self.retries,
+            base_delay=self.retry_base_delay,
+            max_delay=self.retry_max_delay,
+            breaker=self.breaker,
+        )
+
+    def _generate(self, messages, temperature, max_tokens):
+        def post():
+            response = self._client.post(
+                f"{self.base_url}/api/chat",
+                json=self._payload(messages, temperature, max_tokens, stream=False),
+            )
+            self._raise_for_status(response)
+            return response.json()
+
+        return self._call(post).get("message", {}).get("content", "").strip()
+
+    def _stream(self, messages, temperature, max_tokens):
+        def open_stream():
+            request = self._client.build_request(
+                "POST",
+                f"{self.base_url}/api/chat",
+                json=self._payload(messages, temperature, max_tokens, stream=True),
+            )
+            response = self._client.send(request, stream=True)
+            if response.status_code >= 400:
+                response.read()
+                response.close()
+                self._raise_for_status(response)
+            return response
+
+        return self._iter_lines(self._call(open_stream))
+
+    def _iter_lines(self, response):
+        """Text of newline-delimited JSON chunks until 'done'."""
+        try:
+            for line in response.iter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                text = chunk.get("message", {}).get("content")
+                if text:
+                    yield text
+                if chunk.get("done"):
+                    break
+        except Exception as e:
+            if _ollama_transient(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            response.close()
+
+
+_BACKENDS = {"groq": GroqBackend, "ollama": OllamaBackend}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_llm_backend(name=LLM_BACKEND):
+    """
+    Process-wide backend instance (its semaphore is shared by all sessions).
+
+    Args:
+        name (str): Backend name ("groq" or "ollama")
+
+    Returns:
+        tuple: (LLMBackend or None, error_message or None)
+    """
+    if name not in _BACKENDS:
+        return None, f"LLM_BACKEND i panjohur: '{name}' (zgjidhni: {', '.join(_BACKENDS)})."
+    if name == "groq" and (not GROQ_API_KEY or not str(GROQ_API_KEY).strip()):
+        return None, "Q&A nuk është i konfiguruar. Vendosni GROQ_API_KEY në .env."
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = _BACKENDS[name]()
+        return _instances[name], None
+
+
+def generate_qa_response(query, context_text, sources, backend):
+    """
+    Generate a Q&A answer with an LLM backend.
+
+    Args:
+        query (str): User query in Albanian
+        context_text (str): Context from documents
+        sources (list): List of source documents
+        backend (LLMBackend): Backend from get_llm_backend
+
+    Returns:
+        tuple: (response_text, sources, error_message or None); on an error
+        the response text is the error message
+    """
+    if not sources or not context_text:
+        return NO_SOURCES_MESSAGE, [], None
+    try:
+        return backend.generate(_build_messages(query, context_text)), sources, None
+    except Exception as e:
+        error_msg = f"Gabim gjatë komunikimit me {backend.label}: {str(e)}"
+        return error_msg, [], error_msg
+
+
+def stream_qa_response(query, context_text, sources, backend):
+    """
+    Start a streamed Q&A answer with an LLM backend. Errors before the
+    first chunk are returned here; errors while streaming are raised by
+    the iterator.
+
+    Args:
+        query (str): User query in Albanian
+        context_text (str): Context from documents
+        sources (list): List of source documents
+        backend (LLMBackend): Backend from get_llm_backend
+
+    Returns:
+        tuple: (iterator of text chunks, sources, error_message or None)
+    """
+    if not sources or not context_text:
+        return iter([NO_SOURCES_MESSAGE]), [], None
+    try:
+        return backend.stream(_build_messages(query, context_text)), sources, None
+    except Exception as e:
+        return iter(()), [], f"Gabim gjatë komunikimit me {backend.label}: {str(e)}"
@@ -0,0 +1,108 @@
+# ==========================================
+# METADATA FILTER MODULE - DIELLA AI
+# ==========================================
+# Precomputed speaker bitmaps and a sorted date index over statement row
+# positions. A sidebar filter becomes a packed bitmap of allowed statements;
+# expand_bitmap maps it onto passage ids (the ids stored in the FAISS and
+# BM25 indexes), which the searches check while they run.
+
+import numpy as np
+import pandas as pd
+
+
+def _pack(mask):
+    """Pack a boolean row mask into a FAISS-compatible bitmap (bit i = row i)."""
+    return np.packbits(mask, bitorder="little")
+
+
+def build_metadata_bitmaps(df):
+    """
+    Precompute per-speaker bitmaps and a sorted date index.
+
+    Args:
+        df (pd.DataFrame): Corpus with 'Speaker' and 'Date' columns
+
+    Returns:
+        dict: n_rows, speakers {name: packed bitmap}, date_values (sorted
+        datetime64[ns]) and date_positions (row positions in that order)
+    """
+    n_rows = len(df)
+    speakers = {}
+    if "Speaker" in df.columns and n_rows:
+        codes, names = pd.factorize(df["Speaker"].astype(str))
+        for code, name in enumerate(names):
+            speakers[name] = _pack(codes == code)
+
+    date_values = np.empty(0, dtype="datetime64[ns]")
+    date_positions = np.empty(0, dtype=np.int64)
+    if "Date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        dates = df["Date"].to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(dates))
+        order = np.argsort(dates[valid], kind="stable")
+        date_positions = valid[order]
+        date_values = dates[date_positions]
+
+    return {
+        "n_rows": n_rows,
+        "speakers": speakers,
+        "date_values": date_values,
+        "date_positions": date_positions,
+    }
+
+
+def filter_bitmap(bitmaps, speaker=None, date_from=None, date_to=None):
+    """
+    Bitmap of rows matching the sidebar filters (same semantics as the app:
+    exact speaker, date_from <= Date <= date_to).
+
+    Args:
+        bitmaps (dict): Result of build_metadata_bitmaps
+        speaker (str): Speaker name, or None for all speakers
+        date_from: Lower date bound (inclusive), or None
+        date_to: Upper date bound (inclusive), or None
+
+    Returns:
+        np.ndarray or None: Packed uint8 bitmap, or None if nothing is filtered
+    """
+    n_rows = bitmaps["n_rows"]
+    result = None
+
+    if speaker is not None:
+        result = bitmaps["speakers"].get(str(speaker))
+        if result is None:
+            return _pack(np.zeros(n_rows, dtype=bool))
+
+    if date_from is not None or date_to is not None:
+        values = bitmaps["date_values"]
+        lo = 0 if date_from is None else np.searchsorted(
+            values, pd.Timestamp(date_from).to_datetime64(), side="left"
+        )
+        hi = len(values) if date_to is None else np.searchsorted(
+            values, pd.Timestamp(date_to).to_datetime64(), side="right"
+        )
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[bitmaps["date_positions"][lo:hi]] = True
+        dates = _pack(mask)
+        result = dates if result is None else np.bitwise_and(result, dates)
+
+    return result
+
+
+def bitmap_count(bitmap):
+    """Number of rows allowed by a packed bitmap."""
+    return int(np.unpackbits(bitmap).sum())
+
+
+def expand_bitmap(bitmap, rows):
+    """
+    Map a bitmap over statements to one over passages.
+
+    Args:
+        bitmap (np.ndarray): Packed bitmap of allowed statement row positions
+        rows (np.ndarray): Statement row position of each passage
+
+    Returns:
+        np.ndarray: Packed bitmap of allowed passage ids
+    """
+    allowed = np.unpackbits(bitmap, bitorder="little")
+    return _pack(allowed[np.asarray(rows, dtype=np.int64)] == 1)
@@ -2,20 +2,32 @@
 # NLP ANALYSIS MODULE - DIELLA AI
 # ==========================================
 
-import re
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import joblib
 import pandas as pd
 import numpy as np
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import NMF
 from config import (
+    TOPIC_MODEL_PATH,
     SENTIMENT_POSITIVE_THRESHOLD,
     SENTIMENT_NEGATIVE_THRESHOLD,
+    SENTIMENT_WORKERS,
+    SENTIMENT_CHUNK_SIZE,
     NUM_TOPICS,
     NUM_TOP_WORDS,
     TFIDF_MAX_FEATURES,
     TFIDF_MIN_DF,
+    TOPIC_REFIT_DRIFT,
 )
+from .hashing import text_hash, texts_fingerprint
+from .sentiment_worker import init_sentiment_worker, score_sentiment_chunk
+from .tokenization import tokenize
 
 
 def calculate_ttr(text):
@@ -29,47 +41,91 @@ def calculate_ttr(text):
     Returns:
         float: TTR value between 0 and 1
     """
-    if pd.isna(text) or not text:
+    words = tokenize(text, lang="sq")
+    if len(words) == 0:
         return 0.0
 
-    # Tokenize supporting Unicode characters (exclude numbers and underscores)
-    words = re.findall(r"[^\W\d_]+", str(text).lower(), flags=re.UNICODE)
+    return len(np.unique(words)) / len(words)
 
-    if len(words) == 0:
-        return 0.0
 
-    unique_words = set(words)
-    ttr = len(unique_words) / len(words)
-    return ttr
+def _resolve_workers(n_workers):
+    if n_workers is None:
+        n_workers = SENTIMENT_WORKERS
+    if n_workers <= 0:
+        n_workers = os.cpu_count() or 1
+    return n_workers
+
+
+def score_sentiment(texts, n_workers=None, chunk_size=SENTIMENT_CHUNK_SIZE):
+    """
+    VADER compound scores for many texts.
+    The corpus is split into chunks that run on a process pool (one
+    analyzer per worker); results come back in input order. Small inputs
+    (a single chunk) or n_workers=1 run in-process.
+
+    Args:
+        texts (iterable): English texts
+        n_workers (int): Worker processes; None uses SENTIMENT_WORKERS, 0 = all cores
+        chunk_size (int): Texts per task
+
+    Returns:
+        np.ndarray: float64 compound scores
+    """
+    texts = [str(t) for t in texts]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    n_workers = min(_resolve_workers(n_workers), len(chunks))
+
+    if n_workers <= 1:
+        analyzer = SentimentIntensityAnalyzer()
+        scores = [analyzer.polarity_scores(t)["compound"] for t in texts]
+    else:
+        # Spawned workers: forking the app process (Streamlit and torch
+        # threads, held locks) can deadlock the children
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=init_sentiment_worker,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            scores = list(chain.from_iterable(pool.map(score_sentiment_chunk, chunks)))
+    return np.asarray(scores, dtype="float64")
 
 
-def add_sentiment(df):
+def label_sentiment(scores):
+    """
+    Map compound scores to Pozitiv / Negativ / Neutral labels.
+
+    Args:
+        scores (array-like): Compound scores
+
+    Returns:
+        np.ndarray: Labels
+    """
+    scores = np.asarray(scores, dtype="float64")
+    return np.select(
+        [scores > SENTIMENT_POSITIVE_THRESHOLD, scores < SENTIMENT_NEGATIVE_THRESHOLD],
+        ["Pozitiv", "Negativ"],
+        default="Neutral",
+    ).astype(object)
+
+
+def add_sentiment(df, n_workers=None):
     """
     Add sentiment analysis columns to dataframe.
     Uses VADER sentiment analyzer on the 'Speech' column (English text).
     Declarations are stored in both English (Speech) and Albanian (Speech_SQ);
     we use English here so VADER, which is built for English, gives reliable scores.
-    
+
     Args:
         df (pd.DataFrame): Input dataframe with 'Speech' column (English)
-        
+        n_workers (int): Worker processes; None uses SENTIMENT_WORKERS
+
     Returns:
         pd.DataFrame: Dataframe with 'SentimentScore' and 'SentimentLabel' columns
     """
     try:
-        analyzer = SentimentIntensityAnalyzer()
-        df["SentimentScore"] = df["Speech"].apply(
-            lambda x: analyzer.polarity_scores(str(x))["compound"]
-        )
-        df["SentimentLabel"] = df["SentimentScore"].apply(
-            lambda x: "Pozitiv"
-            if x > SENTIMENT_POSITIVE_THRESHOLD
-            else (
-                "Negativ"
-                if x < SENTIMENT_NEGATIVE_THRESHOLD
-                else "Neutral"
-            )
-        )
+        scores = score_sentiment(df["Speech"], n_workers=n_workers)
+        df["SentimentScore"] = scores
+        df["SentimentLabel"] = label_sentiment(scores)
     except Exception as e:
         print(f"Sentiment analysis error: {e}")
         df["SentimentScore"] = 0.0
@@ -78,66 +134,198 @@ def add_sentiment(df):
     return df
 
 
-def add_topics(df):
+def _topic_settings():
+    """Config values a persisted topic model must agree with."""
+    return {
+        "NUM_TOPICS": NUM_TOPICS,
+        "NUM_TOP_WORDS": NUM_TOP_WORDS,
+        "TFIDF_MAX_FEATURES": TFIDF_MAX_FEATURES,
+        "TFIDF_MIN_DF": TFIDF_MIN_DF,
+    }
+
+
+def fit_topic_model(speeches):
     """
-    Add topic modeling to dataframe using NMF.
-    
+    Fit TF-IDF + NMF on non-empty speeches.
+
     Args:
-        df (pd.DataFrame): Input dataframe with 'Speech' column
-        
+        speeches (pd.Series): English speeches ('Speech' column)
+
     Returns:
-        pd.DataFrame: Dataframe with 'Topic' and 'TopKeywords' columns
+        dict or None: Topic model (vectorizer, nmf, sparse TF-IDF matrix of
+        the fitted speeches, top words, fit hashes), or None if there are
+        fewer than two non-empty speeches
     """
     non_empty_speeches = (
-        df["Speech"].str.strip().replace("", np.nan).dropna()
+        speeches.fillna("").astype(str).str.strip().replace("", np.nan).dropna()
     )
 
     if len(non_empty_speeches) < 2:
-        df["Topic"] = -1
-        df["TopKeywords"] = ""
-        return df
+        return None
 
-    try:
-        # TF-IDF Vectorization
-        tfidf_vectorizer = TfidfVectorizer(
-            max_features=TFIDF_MAX_FEATURES,
-            min_df=TFIDF_MIN_DF,
-            stop_words="english",
-        )
-        tfidf = tfidf_vectorizer.fit_transform(non_empty_speeches)
-
-        # NMF Topic Modeling
-        n_components = min(NUM_TOPICS, tfidf.shape[0] - 1)
-        nmf_model = NMF(
-            n_components=n_components,
-            random_state=42,
-            max_iter=1000,
+    # TF-IDF Vectorization
+    tfidf_vectorizer = TfidfVectorizer(
+        max_features=TFIDF_MAX_FEATURES,
+        min_df=TFIDF_MIN_DF,
+        stop_words="english",
+    )
+    tfidf = tfidf_vectorizer.fit_transform(non_empty_speeches)
+
+    # NMF Topic Modeling
+    n_components = min(NUM_TOPICS, tfidf.shape[0] - 1)
+    nmf_model = NMF(
+        n_components=n_components,
+        random_state=42,
+        max_iter=1000,
+    )
+    nmf_model.fit(tfidf)
+
+    # Extract top words per topic
+    tfidf_feature_names = tfidf_vectorizer.get_feature_names_out()
+    top_words_per_topic = []
+
+    for topic_idx, topic in enumerate(nmf_model.components_):
+        top_indices = topic.argsort()[:-NUM_TOP_WORDS - 1:-1]
+        top_words_per_topic.append([tfidf_feature_names[i] for i in top_indices])
+
+    doc_hashes = [text_hash(s) for s in non_empty_speeches]
+    fit_hashes = sorted(set(doc_hashes))
+    return {
+        "vectorizer": tfidf_vectorizer,
+        "nmf": nmf_model,
+        "tfidf": tfidf.tocsr(),
+        "doc_hashes": doc_hashes,
+        "top_words": top_words_per_topic,
+        "settings": _topic_settings(),
+        "fit_hashes": frozenset(fit_hashes),
+        "model_id": texts_fingerprint(fit_hashes, _topic_settings()),
+    }
+
+
+def assign_topics(speeches, topic_model):
+    """
+    Assign each speech to its strongest topic of a fitted model.
+
+    Args:
+        speeches (pd.Series): English speeches
+        topic_model (dict): Model from fit_topic_model
+
+    Returns:
+        tuple: (np.ndarray topic ids, list of keyword labels)
+    """
+    if len(speeches) == 0:
+        return np.empty(0, dtype="int64"), []
+    topic_values = topic_model["nmf"].transform(
+        topic_model["vectorizer"].transform(
+            speeches.fillna("").astype(str)
         )
-        nmf_model.fit(tfidf)
+    )
+    topics = topic_values.argmax(axis=1).astype("int64")
+    labels = [", ".join(words) for words in topic_model["top_words"]]
+    keywords = [labels[t] if t < len(labels) else "" for t in topics]
+    return topics, keywords
+
+
+def topic_drift(topic_model, speeches):
+    """
+    Share of non-empty speeches the topic model was not fitted on.
+
+    Args:
+        topic_model (dict): Model from fit_topic_model
+        speeches (pd.Series): Current English speeches
+
+    Returns:
+        float: Value between 0 (all seen at fit time) and 1
+    """
+    texts = speeches.fillna("").astype(str).str.strip()
+    texts = texts[texts != ""]
+    if len(texts) == 0:
+        return 0.0
+    fit_hashes = topic_model["fit_hashes"]
+    unseen = sum(1 for s in texts if text_hash(s) not in fit_hashes)
+    return unseen / len(texts)
+
 
-        # Extract top words per topic
-        tfidf_feature_names = tfidf_vectorizer.get_feature_names_out()
-        top_words_per_topic = []
+def save_topic_model(topic_model, path=TOPIC_MODEL_PATH):
+    """Persist a fitted topic model atomically (joblib)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    joblib.dump(topic_model, tmp_path)
+    os.replace(tmp_path, path)
 
-        for topic_idx, topic in enumerate(nmf_model.components_):
-            top_indices = topic.argsort()[:-NUM_TOP_WORDS - 1:-1]
-            top_words = [tfidf_feature_names[i] for i in top_indices]
-            top_words_per_topic.append(", ".join(top_words))
+
+def load_topic_model(path=TOPIC_MODEL_PATH):
+    """
+    Load the persisted topic model if it matches the current config.
+
+    Returns:
+        dict or None: Topic model, or None if missing, unreadable or stale
+    """
+    if not path.exists():
+        return None
+    try:
+        topic_model = joblib.load(path)
+    except Exception as e:
+        print(f"Topic model unreadable, ignoring it: {e}")
+        return None
+    if topic_model.get("settings") != _topic_settings() or "tfidf" not in topic_model:
+        return None
+    return topic_model
+
+
+def get_topic_model(speeches, refit=False):
+    """
+    Shared TF-IDF/NMF topic model for the app and the evaluation.
+    Reuses the persisted model unless a refit is requested, the config
+    changed, or more than TOPIC_REFIT_DRIFT of the speeches are unseen;
+    a newly fitted model is persisted for the next caller.
+
+    Args:
+        speeches (pd.Series): English speeches ('Speech' column)
+        refit (bool): Force a new fit
+
+    Returns:
+        dict or None: Topic model from fit_topic_model
+    """
+    topic_model = None if refit else load_topic_model()
+    if topic_model is not None:
+        drift = topic_drift(topic_model, speeches)
+        if drift <= TOPIC_REFIT_DRIFT:
+            return topic_model
+        print(f"Topic drift {drift:.0%} > {TOPIC_REFIT_DRIFT:.0%}, refitting NMF")
+
+    topic_model = fit_topic_model(speeches)
+    if topic_model is not None:
+        try:
+            save_topic_model(topic_model)
+        except OSError as e:
+            print(f"Could not persist topic model: {e}")
+    return topic_model
+
+
+def add_topics(df, topic_model=None):
+    """
+    Add topic modeling to dataframe using NMF.
+
+    Args:
+        df (pd.DataFrame): Input dataframe with 'Speech' column
+        topic_model (dict): Fitted model to reuse; fitted on df if None
+
+    Returns:
+        pd.DataFrame: Dataframe with 'Topic' and 'TopKeywords' columns
+    """
+    try:
+        if topic_model is None:
+            topic_model = fit_topic_model(df["Speech"])
+        if topic_model is None:
+            df["Topic"] = -1
+            df["TopKeywords"] = ""
+            return df
 
         # Map topics to original dataframe
-        topic_values = nmf_model.transform(
-            tfidf_vectorizer.transform(
-                df["Speech"].fillna("").astype(str)
-            )
-        )
-        df["Topic"] = topic_values.argmax(axis=1)
-        df["TopKeywords"] = df["Topic"].apply(
-            lambda x: (
-                top_words_per_topic[x]
-                if x < len(top_words_per_topic)
-                else ""
-            )
-        )
+        topics, keywords = assign_topics(df["Speech"], topic_model)
+        df["Topic"] = topics
+        df["TopKeywords"] = keywords
     except Exception as e:
         print(f"Topic modeling error: {e}")
         df["Topic"] = -1
@@ -148,32 +336,11 @@ def add_topics(df):
 
 def get_nmf_artifacts_and_top_words(df, speech_col="Speech"):
     """
-    Fit NMF on the corpus and return vectorizer, model, and top words per topic.
-    Used for evaluation (e.g. topic coherence).
+    Return vectorizer, model, and top words per topic of the shared topic model.
+    Used for evaluation (e.g. topic coherence); does not refit when the
+    persisted model matches the corpus.
     """
-    import numpy as np
-    non_empty = (
-        df[speech_col].astype(str).str.strip().replace("", np.nan).dropna()
-    )
-    if len(non_empty) < 2:
+    topic_model = get_topic_model(df[speech_col])
+    if topic_model is None:
         return None, None, []
-
-    tfidf_vectorizer = TfidfVectorizer(
-        max_features=TFIDF_MAX_FEATURES,
-        min_df=TFIDF_MIN_DF,
-        stop_words="english",
-    )
-    tfidf = tfidf_vectorizer.fit_transform(non_empty)
-    n_components = min(NUM_TOPICS, tfidf.shape[0] - 1)
-    nmf_model = NMF(
-        n_components=n_components,
-        random_state=42,
-        max_iter=1000,
-    )
-    nmf_model.fit(tfidf)
-    feature_names = tfidf_vectorizer.get_feature_names_out()
-    top_words_per_topic = []
-    for topic in nmf_model.components_:
-        top_idx = topic.argsort()[:-NUM_TOP_WORDS - 1:-1]
-        top_words_per_topic.append([feature_names[i] for i in top_idx])
-    return tfidf_vectorizer, nmf_model, top_words_per_topic
\ No newline at end of file
+    return topic_model["vectorizer"], topic_model["nmf"], topic_model["top_words"]
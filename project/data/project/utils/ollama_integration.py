@@ -2,70 +2,168 @@
 # VECTOR STORE & CONTEXT BUILDING MODULE
 # ==========================================
 
+import numpy as np
 import pandas as pd
+from .chunking import build_passages, merge_spans
+from .lexical_index import bm25_search, reciprocal_rank_fusion
+from .metadata_filter import expand_bitmap
 from .vector_store import search_similar_documents
-from config import MAX_QA_DOCS, MAX_CHARS_CONTEXT
+from config import (
+    MAX_QA_DOCS,
+    MAX_CHARS_CONTEXT,
+    QA_MIN_SIMILARITY,
+    QA_SCORE_MARGIN,
+    QA_CANDIDATES,
+    QA_MIN_BM25,
+)
 
 
-def build_qa_context(query, model, index, df, max_docs=MAX_QA_DOCS, max_chars=MAX_CHARS_CONTEXT):
+def _fuse_results(query, dense_hits, lexical_index, max_docs, passage_bitmap):
+    """Combine dense and BM25 passage rankings with reciprocal-rank fusion."""
+    dense_ids = dense_hits["PassageId"].tolist() if not dense_hits.empty else []
+    lexical_ids, bm25_scores = bm25_search(
+        lexical_index, query, k=QA_CANDIDATES, id_bitmap=passage_bitmap, min_score=QA_MIN_BM25
+    )
+    fused = reciprocal_rank_fusion([dense_ids, lexical_ids])[:max_docs]
+
+    ids = [passage_id for passage_id, _ in fused]
+    cosine = dict(zip(dense_ids, dense_hits["Score"])) if dense_ids else {}
+    bm25 = dict(zip(lexical_ids.tolist(), bm25_scores.tolist()))
+    return pd.DataFrame({
+        "PassageId": pd.Series(ids, dtype="int64"),
+        "Score": [cosine.get(i, np.nan) for i in ids],
+        "BM25": [bm25.get(i, np.nan) for i in ids],
+    })
+
+
+def _excerpt(text, spans):
+    """Passages of one statement joined in text order, with '…' for gaps."""
+    excerpt = " … ".join(text[start:end] for start, end in spans)
+    if text[:spans[0][0]].strip():
+        excerpt = "… " + excerpt
+    if text[spans[-1][1]:].strip():
+        excerpt = excerpt + " …"
+    return excerpt
+
+
+def build_qa_context(
+    query,
+    model,
+    index,
+    df,
+    max_docs=MAX_QA_DOCS,
+    max_chars=MAX_CHARS_CONTEXT,
+    min_score=QA_MIN_SIMILARITY,
+    score_margin=QA_SCORE_MARGIN,
+    id_bitmap=None,
+    lexical_index=None,
+    passages=None,
+):
     """
-    Build context from vector search results for Q&A.
+    Build context from passage search results for Q&A.
+    Retrieval ranks passages (utils.chunking); passages of the same
+    statement are merged into one numbered source, so only the relevant
+    parts of long speeches reach the prompt. Only passages with cosine
+    similarity >= min_score and within score_margin of the best match are
+    used (adaptive k). With a lexical index the dense candidates are fused
+    with BM25 matches (reciprocal-rank fusion), which catches exact names,
+    places and codes.
     
     Args:
         query (str): Query in Albanian
         model: SentenceTransformer model
-        index: FAISS index
+        index: FAISS passage index
         df (pd.DataFrame): Original dataframe
-        max_docs (int): Maximum number of documents to include
+        max_docs (int): Maximum number of passages to include
         max_chars (int): Maximum characters for context
+        min_score (float): Minimum cosine similarity
+        score_margin (float): Maximum distance from the best score (None = no limit)
+        id_bitmap (np.ndarray): Packed bitmap of rows allowed by the sidebar
+            filters (utils.metadata_filter); None searches all statements
+        lexical_index (dict): BM25 passage index (utils.lexical_index); None = dense only
+        passages (pd.DataFrame): Passage table the indexes were built from
+            (built from df if None)
         
     Returns:
-        tuple: (context_text, sources_list)
+        tuple: (context_text, sources_list); each source has the statement
+        'row', the passage 'spans', a 'score' (cosine similarity, None for
+        lexical-only matches) and a 'bm25' score
     """
-    # Search similar documents
-    relevant_docs = search_similar_documents(
+    if passages is None:
+        passages = build_passages(df)
+
+    # Search similar passages
+    dense_hits = search_similar_documents(
         query,
         model,
         index,
         df,
-        k=max_docs,
+        k=QA_CANDIDATES if lexical_index is not None else max_docs,
+        min_score=min_score,
+        id_bitmap=id_bitmap,
+        passages=passages,
     )
 
-    if relevant_docs.empty:
+    # Adaptive k: drop matches much weaker than the best one
+    if not dense_hits.empty and score_margin is not None:
+        best = dense_hits["Score"].max()
+        dense_hits = dense_hits[dense_hits["Score"] >= best - score_margin]
+
+    if lexical_index is not None:
+        passage_bitmap = expand_bitmap(id_bitmap, passages["Row"]) if id_bitmap is not None else None
+        hits = _fuse_results(query, dense_hits, lexical_index, max_docs, passage_bitmap)
+    elif not dense_hits.empty:
+        hits = dense_hits[["PassageId", "Score"]].head(max_docs).assign(BM25=np.nan)
+    else:
+        hits = pd.DataFrame()
+
+    if hits.empty:
         return "", []
 
-    # Remove duplicates
-    relevant_docs = relevant_docs.drop_duplicates(subset=["Speech_SQ"])
+    # Group passages by statement, best-ranked statement first
+    hits = hits.join(passages[["Row", "Start", "End"]], on="PassageId")
 
     # Build numbered sources and context
     sources = []
     ctx_parts = []
     char_count = 0
+    seen_texts = set()
+
+    for row_position, group in hits.groupby("Row", sort=False):
+        row = df.iloc[int(row_position)]
+        speech_sq = str(row.get("Speech_SQ", ""))
+
+        # Remove duplicates
+        if not speech_sq.strip() or speech_sq.strip() in seen_texts:
+            continue
+        seen_texts.add(speech_sq.strip())
 
-    for i, (_, row) in enumerate(relevant_docs.iterrows(), start=1):
         date_str = (
             row["Date"].date()
             if pd.notna(row.get("Date"))
             else "-"
         )
-        speech_sq = str(row.get("Speech_SQ", "")).strip()
+        spans = merge_spans(zip(group["Start"], group["End"]), speech_sq)
+        excerpt = _excerpt(speech_sq, spans)
+        i = len(sources) + 1
 
-        if not speech_sq:
-            continue
+        part = f"[{i}] Deklaratë nga {row.get('Speaker', '-')} ({date_str}): {excerpt}"
+        if ctx_parts and char_count + len(part) > max_chars:
+            break
+        ctx_parts.append(part)
+        char_count += len(part)
 
         sources.append({
             "id": i,
+            "row": int(row_position),
+            "row_hash": row.get("RowHash"),
             "speaker": row.get("Speaker", "-"),
             "date": date_str,
-            "text": speech_sq,
+            "text": excerpt,
+            "spans": spans,
+            "score": round(float(group["Score"].max()), 3) if group["Score"].notna().any() else None,
+            "bm25": round(float(group["BM25"].max()), 2) if group["BM25"].notna().any() else None,
         })
 
-        part = f"[{i}] Deklaratë nga {row.get('Speaker', '-')} ({date_str}): {speech_sq}"
-        ctx_parts.append(part)
-
-        char_count += len(part)
-        if char_count > max_chars:
-            break
-
     context_text = "\n\n".join(ctx_parts)
-    return context_text, sources
\ No newline at end of file
+    return context_text, sources
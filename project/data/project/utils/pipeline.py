@@ -0,0 +1,284 @@
+# ==========================================
+# ENRICHMENT PIPELINE MODULE - DIELLA AI
+# ==========================================
+# Enrich-at-ingest: the corpus goes through fixed stages and the results
+# are published as serving artifacts, so the app never computes NLP
+# features itself (see SERVING_READ_ONLY).
+#   albanian   -> missing Speech_SQ machine-translated (batched, cached)
+#   features   -> WordCount, TTR, sentiment (batched, checkpointed per batch)
+#   topics     -> persisted TF-IDF/NMF model; only new rows transformed
+#   passages   -> Speech_SQ split into retrieval passages
+#   embeddings -> passages encoded (batched, embedding cache written per
+#                 batch) and the FAISS index persisted
+#   lexical    -> BM25 index persisted
+#   publish    -> corpus artifact, passage table, then the serving manifest
+# Rows already in the previous corpus artifact are reused at every stage,
+# and an interrupted run resumes from the last finished batch.
+
+import shutil
+import time
+
+import pandas as pd
+from config import (
+    PIPELINE_BATCH_SIZE, PIPELINE_CHECKPOINT_DIR, PIPELINE_EMBED_BATCH_SIZE,
+    TRANSLATION_ENABLED, TRANSLATION_BACKEND,
+)
+from .chunking import build_passages
+from .data_loader import (
+    TEXT_FEATURE_COLUMNS,
+    _reuse_table,
+    _same_settings,
+    add_row_hashes,
+    add_text_features,
+    add_topics,
+    artifact_fingerprint,
+    read_corpus,
+    read_corpus_artifact,
+    write_corpus_artifact,
+)
+from .hashing import text_hash
+from .lexical_index import build_lexical_index, lexical_fingerprint, load_lexical_index, save_lexical_index
+from .llm_backends import get_llm_backend
+from .serving import save_passages, write_serving_manifest
+from .translation import translate_texts
+from .vector_store import (
+    build_vector_index,
+    get_embedding_model,
+    load_vector_index,
+    save_vector_index,
+    vector_fingerprint,
+)
+
+
+def _settings_key(fingerprint):
+    """Checkpoints are only valid for the enrichment settings that wrote them."""
+    settings = {k: v for k, v in sorted(fingerprint.items()) if k not in ("source_hash", "topic_model_id")}
+    return text_hash(repr(settings), "pipeline")[:16]
+
+
+def _needs_translation(df):
+    return (df["Speech_SQ"].str.strip() == "") & (df["Speech"].str.strip() != "")
+
+
+def _retry_translations(df):
+    """
+    Try the missing translations of an up-to-date corpus again.
+
+    Returns:
+        bool: True if some of them can now be filled (the corpus must be
+        re-enriched); False if the backend is unavailable or nothing
+        succeeded (failed texts back off, so this costs no requests)
+    """
+    backend, err = get_llm_backend(TRANSLATION_BACKEND)
+    if err:
+        print(f"Translation skipped: {err}")
+        return False
+    translations, report = translate_texts(df.loc[_needs_translation(df), "Speech"].tolist(), backend)
+    print(f"Translation retry: {report}")
+    return any(t is not None for t in translations)
+
+
+def albanian_stage(df, translate=TRANSLATION_ENABLED):
+    """
+    Fill missing Speech_SQ with machine translations of Speech.
+
+    Args:
+        df (pd.DataFrame): Normalized corpus
+        translate (bool): Translate (otherwise only count the missing rows)
+
+    Returns:
+        tuple: (pd.DataFrame, stage report)
+    """
+    missing = _needs_translation(df)
+    report = {"missing": int(missing.sum())}
+    if translate and missing.any():
+        backend, err = get_llm_backend(TRANSLATION_BACKEND)
+        if err:
+            print(f"Translation skipped: {err}")
+        else:
+            translations, report["translation"] = translate_texts(df.loc[missing, "Speech"].tolist(), backend)
+            filled = pd.Series(translations, index=df.index[missing]).dropna()
+            df.loc[filled.index, "Speech_SQ"] = filled
+            report["missing"] -= len(filled)
+    if report["missing"]:
+        print(f"Albanian text: {report['missing']} rows without Speech_SQ (not searchable in Q&A)")
+    return df, report
+
+
+def _read_checkpoints(checkpoint_dir):
+    parts = []
+    for path in sorted(checkpoint_dir.glob("part-*.parquet")):
+        try:
+            parts.append(pd.read_parquet(path))
+        except Exception as e:
+            print(f"Ignoring unreadable checkpoint {path.name}: {e}")
+    return parts
+
+
+def features_stage(df, previous=None, batch_size=PIPELINE_BATCH_SIZE, checkpoint_dir=None):
+    """
+    Add TEXT_FEATURE_COLUMNS, computing only rows that are neither in the
+    previous artifact nor in a checkpoint from an interrupted run.
+
+    Args:
+        df (pd.DataFrame): Corpus with 'RowHash'
+        previous (pd.DataFrame): Previous enriched corpus with the same settings
+        batch_size (int): Rows per batch
+        checkpoint_dir (Path): Where finished batches are written (None = no checkpoints)
+
+    Returns:
+        tuple: (pd.DataFrame, stage report)
+    """
+    parts = []
+    reuse = _reuse_table(previous)
+    if reuse is not None:
+        parts.append(reuse[TEXT_FEATURE_COLUMNS].reset_index())
+    if checkpoint_dir is not None:
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        parts.extend(_read_checkpoints(checkpoint_dir))
+    known = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["RowHash"])
+    known_hashes = set(known["RowHash"])
+
+    todo = df.loc[~df["RowHash"].isin(known_hashes)].drop_duplicates(subset=["RowHash"])
+    batches = range(0, len(todo), batch_size)
+    for number, start in enumerate(batches, 1):
+        batch = add_text_features(todo.iloc[start:start + batch_size].copy())
+        batch = batch[["RowHash"] + TEXT_FEATURE_COLUMNS].reset_index(drop=True)
+        if checkpoint_dir is not None:
+            path = checkpoint_dir / f"part-{text_hash(''.join(batch['RowHash']), 'batch')[:16]}.parquet"
+            tmp_path = path.with_suffix(".tmp")
+            batch.to_parquet(tmp_path)
+            tmp_path.replace(path)
+        parts.append(batch)
+        print(f"Features: batch {number}/{len(batches)} ({len(batch)} rows)")
+
+    table = pd.concat(parts, ignore_index=True).drop_duplicates(subset=["RowHash"]).set_index("RowHash")
+    df = df.join(table[TEXT_FEATURE_COLUMNS], on="RowHash")
+    df["WordCount"] = df["WordCount"].astype("int64")
+    return df, {"computed": len(todo), "reused": len(df) - len(todo)}
+
+
+def topics_stage(df, previous=None, previous_topic_model_id=None, refit_topics=False):
+    """
+    Add Topic and TopKeywords (see data_loader.add_topics).
+
+    Returns:
+        tuple: (pd.DataFrame, topic model id or None, stage report)
+    """
+    df, topic_model_id = add_topics(df, previous, previous_topic_model_id, refit_topics)
+    return df, topic_model_id, {"topic_model_id": topic_model_id}
+
+
+def passages_stage(df):
+    """
+    Split Speech_SQ into retrieval passages.
+
+    Returns:
+        tuple: (passage table, stage report)
+    """
+    passages = build_passages(df)
+    return passages, {"passages": len(passages)}
+
+
+def embeddings_stage(df, passages, batch_size=PIPELINE_EMBED_BATCH_SIZE, force=False):
+    """
+    Encode passages and persist the FAISS index unless it already exists.
+
+    Returns:
+        tuple: (index fingerprint or None, stage report)
+    """
+    fingerprint = vector_fingerprint(df, passages)
+    if not force and load_vector_index(fingerprint) is not None:
+        return fingerprint, {"reused": True}
+    index = build_vector_index(get_embedding_model(), df, passages, batch_size)
+    if index is None:
+        return None, {"vectors": 0}
+    save_vector_index(index, fingerprint)
+    return fingerprint, {"vectors": int(index.ntotal)}
+
+
+def lexical_stage(passages, force=False):
+    """
+    Persist the BM25 index unless it already exists.
+
+    Returns:
+        tuple: (index fingerprint, stage report)
+    """
+    fingerprint = lexical_fingerprint(passages)
+    if not force and load_lexical_index(fingerprint) is not None:
+        return fingerprint, {"reused": True}
+    index = build_lexical_index(passages)
+    save_lexical_index(index, fingerprint)
+    return fingerprint, {"terms": len(index["terms"])}
+
+
+def _timed(stages, name, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    report = result[-1] if isinstance(result, tuple) else {}
+    stages[name] = {**report, "seconds": round(time.perf_counter() - started, 2)}
+    print(f"Stage {name}: {stages[name]}")
+    return result
+
+
+def run_pipeline(data_path, force=False, refit_topics=False, translate=TRANSLATION_ENABLED,
+                 batch_size=PIPELINE_BATCH_SIZE, embed_batch_size=PIPELINE_EMBED_BATCH_SIZE,
+                 checkpoint_dir=PIPELINE_CHECKPOINT_DIR):
+    """
+    Run every stage over the corpus and publish the serving artifacts.
+
+    Args:
+        data_path (str): Path to the corpus CSV or SQLite store
+        force (bool): Recompute everything (ignore the previous artifact and indexes)
+        refit_topics (bool): Force a full NMF refit
+        translate (bool): Machine-translate missing Speech_SQ
+        batch_size (int): Rows per text-feature batch
+        embed_batch_size (int): New passages per embedding batch
+        checkpoint_dir (Path): Root for per-batch checkpoints
+
+    Returns:
+        tuple: (manifest dict, error_message) or (None, error_message) if failed
+    """
+    stages = {}
+    current = artifact_fingerprint(data_path)
+    previous, stored = (None, {}) if force else read_corpus_artifact()
+    if previous is not None and not _same_settings(stored, current):
+        previous, stored = None, {}
+
+    up_to_date = (
+        previous is not None
+        and not refit_topics
+        and stored.get("source_hash") == current["source_hash"]
+    )
+    if up_to_date and translate and _needs_translation(previous).any():
+        # Re-enrich only when a translation that failed before now succeeds
+        up_to_date = not _retry_translations(previous)
+    if up_to_date:
+        print(f"Corpus artifact up to date ({len(previous)} rows).")
+        df, fingerprint = previous, stored
+    else:
+        df, err = read_corpus(data_path)
+        if err:
+            return None, err
+        feature_dir = checkpoint_dir / "features" / _settings_key(current)
+        df = add_row_hashes(_timed(stages, "albanian", albanian_stage, df, translate)[0])
+        df = _timed(stages, "features", features_stage, df, previous, batch_size, feature_dir)[0]
+        df, topic_model_id, _ = _timed(
+            stages, "topics", topics_stage, df, previous, stored.get("topic_model_id"), refit_topics or force
+        )
+        fingerprint = {**current, "topic_model_id": topic_model_id}
+
+    passages = _timed(stages, "passages", passages_stage, df)[0]
+    vector_fp = _timed(stages, "embeddings", embeddings_stage, df, passages, embed_batch_size, force)[0]
+    if vector_fp is None:
+        return None, "No Albanian statements to index."
+    lexical_fp = _timed(stages, "lexical", lexical_stage, passages, force)[0]
+
+    # Manifest last: readers see either the previous set or this one
+    if not up_to_date:
+        write_corpus_artifact(df, fingerprint)
+    save_passages(passages)
+    manifest = write_serving_manifest(fingerprint, len(df), len(passages), vector_fp, lexical_fp, stages)
+    shutil.rmtree(checkpoint_dir / "features", ignore_errors=True)
+    print(f"Published serving artifacts: {len(df)} rows, {len(passages)} passages")
+    return manifest, None
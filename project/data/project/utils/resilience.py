@@ -0,0 +1,173 @@
+# ==========================================
+# RESILIENCE MODULE - DIELLA AI
+# ==========================================
+# Bounded retries with full-jitter exponential backoff and a circuit
+# breaker for calls to remote services (LLM APIs). When a service keeps
+# failing, the breaker opens and calls fail immediately instead of blocking
+# the Streamlit script thread; after a cool-down one trial call is let
+# through to probe whether it has recovered. A rate limiter spaces
+# requests for batch jobs that must stay under a provider's quota.
+
+import random
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe consecutive-failure circuit breaker.
+
+    closed: calls pass; `failure_threshold` consecutive failures open it.
+    open: calls fail fast until `reset_timeout` seconds have passed.
+    half-open: a single trial call passes; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return
+            remaining = max(self.reset_timeout - (self._clock() - self._opened_at), 0.0)
+            raise CircuitOpenError(
+                f"circuit '{self.name}' is open after {self._failures} failures; "
+                f"next attempt in {remaining:.0f}s"
+            )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def reset(self):
+        self.record_success()
+
+
+class RateLimiter:
+    """
+    Thread-safe request-rate limit: request starts are spaced at least
+    60 / per_minute seconds apart across all threads.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request may start."""
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    """
+    Full-jitter backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)].
+
+    Args:
+        attempt (int): Retry number, starting at 0
+        base_delay (float): Delay scale in seconds
+        max_delay (float): Upper bound in seconds
+        rng: Random source with .uniform()
+
+    Returns:
+        float: Seconds to wait
+    """
+    return rng.uniform(0.0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn, is_transient, retries=2, base_delay=0.5, max_delay=4.0,
+                      breaker=None, retry_after=None, sleep=time.sleep):
+    """
+    Call fn(), retrying transient failures with jittered backoff.
+
+    Only transient errors count as breaker failures; other errors mean the
+    service answered (e.g. a 400) and are raised without retrying.
+
+    Args:
+        fn (callable): Call without arguments
+        is_transient (callable): exception -> bool, True if worth retrying
+        retries (int): Retries after the first attempt
+        base_delay (float): Backoff scale in seconds
+        max_delay (float): Maximum wait between attempts in seconds
+        breaker (CircuitBreaker): Optional breaker guarding the service
+        retry_after (callable): exception -> seconds requested by the
+            server (e.g. Retry-After header) or None
+        sleep (callable): Sleep function
+
+    Returns:
+        Result of fn()
+
+    Raises:
+        CircuitOpenError: If the breaker is open
+        Exception: The last error from fn()
+    """
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            transient = is_transient(e)
+            if breaker is not None:
+                if transient:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not transient or attempt >= retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            requested = retry_after(e) if retry_after else None
+            if requested is not None:
+                delay = min(max(delay, requested), max_delay)
+            sleep(delay)
+            attempt += 1
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,184 @@
+# ==========================================
+# RETRIEVAL SERVICE MODULE - DIELLA AI
+# ==========================================
+# Process-wide Q&A retrieval state (passage table, SentenceTransformer +
+# FAISS passage index, BM25 lexical index).
+# The app starts warming it in a background thread at boot; every browser
+# session then waits on the same instance instead of building its own.
+# Speaker/date bitmaps for filtered search are built once per corpus too.
+# Given a serving manifest (read-only serving), the published passage table
+# and indexes are loaded as they are and nothing is built.
+
+import threading
+
+from .chunking import build_passages
+from .hashing import texts_fingerprint
+from .lexical_index import get_lexical_index, load_lexical_index
+from .metadata_filter import build_metadata_bitmaps, filter_bitmap
+from .vector_store import build_vector_store, load_vector_store
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def corpus_fingerprint(df):
+    """
+    Cheap key for a loaded corpus (row content hashes when available).
+
+    Args:
+        df (pd.DataFrame): Loaded corpus
+
+    Returns:
+        str: Hex digest
+    """
+    if "RowHash" in df.columns:
+        return texts_fingerprint(df["RowHash"], len(df))
+    return texts_fingerprint(df["Speech_SQ"].fillna("").astype(str), len(df))
+
+
+def _warm(service, df, manifest=None):
+    try:
+        if manifest is None:
+            service["lexical"] = get_lexical_index(service["passages"])
+        else:
+            service["lexical"] = load_lexical_index(manifest["lexical_index"])
+    except Exception as e:
+        print(f"Lexical index unavailable: {e}")
+    try:
+        if manifest is None:
+            model, index = build_vector_store(df, service["passages"])
+        else:
+            model, index = load_vector_store(manifest["vector_index"])
+        service["model"], service["index"] = model, index
+        if model is None or index is None:
+            service["error"] = (
+                "Vector store could not be initialized."
+                if manifest is None
+                else "Published vector index is missing; run: python build_artifacts.py"
+            )
+    except Exception as e:
+        service["error"] = str(e)
+    finally:
+        service["ready"].set()
+
+
+def start_warmup(df, passages=None, manifest=None):
+    """
+    Start loading the retrieval service for a corpus in a background thread.
+    Calling it again for the same corpus is a no-op; services for other
+    corpora are released.
+
+    Args:
+        df (pd.DataFrame): Loaded corpus
+        passages (pd.DataFrame): Published passage table (built from df if
+            None, unless a manifest is given)
+        manifest (dict): Serving manifest; if given, only its persisted
+            passage table and indexes are used (read-only serving)
+
+    Returns:
+        str: Corpus fingerprint identifying the service
+    """
+    fingerprint = corpus_fingerprint(df)
+    with _services_lock:
+        if fingerprint not in _services:
+            _services.clear()
+            service = {
+                "ready": threading.Event(),
+                "model": None,
+                "index": None,
+                "lexical": None,
+                "error": None,
+                "bitmaps": build_metadata_bitmaps(df),
+                "passages": passages,
+            }
+            _services[fingerprint] = service
+            if passages is None and manifest is not None:
+                # The published indexes are keyed by the published passage
+                # ids; passages rebuilt here need not line up with them
+                service["error"] = "Published passage table is missing; run: python build_artifacts.py"
+                service["ready"].set()
+                return fingerprint
+            if passages is None:
+                service["passages"] = build_passages(df)
+            threading.Thread(
+                target=_warm,
+                args=(service, df, manifest),
+                name=f"qa-warmup-{fingerprint[:8]}",
+                daemon=True,
+            ).start()
+    return fingerprint
+
+
+def is_ready(fingerprint):
+    """True if the service for this fingerprint finished loading."""
+    service = _services.get(fingerprint)
+    return service is not None and service["ready"].is_set()
+
+
+def get_retrieval(fingerprint, timeout=None):
+    """
+    Wait for the retrieval service and return its model and index.
+
+    Args:
+        fingerprint (str): Value returned by start_warmup
+        timeout (float): Seconds to wait; None waits until ready
+
+    Returns:
+        tuple: (model, index, error_message); model/index are None on failure
+    """
+    service = _services.get(fingerprint)
+    if service is None:
+        return None, None, "Q&A service was not started."
+    if not service["ready"].wait(timeout):
+        return None, None, "Q&A service is still loading."
+    return service["model"], service["index"], service["error"]
+
+
+def get_filter_bitmap(fingerprint, speaker=None, date_from=None, date_to=None):
+    """
+    Bitmap of corpus rows allowed by the sidebar filters.
+
+    Args:
+        fingerprint (str): Value returned by start_warmup
+        speaker (str): Speaker name, or None for all speakers
+        date_from: Lower date bound (inclusive), or None
+        date_to: Upper date bound (inclusive), or None
+
+    Returns:
+        np.ndarray or None: Packed bitmap, or None to search all rows
+    """
+    service = _services.get(fingerprint)
+    if service is None:
+        return None
+    return filter_bitmap(service["bitmaps"], speaker, date_from, date_to)
+
+
+def get_lexical(fingerprint, timeout=None):
+    """
+    Wait for the retrieval service and return its BM25 index.
+
+    Args:
+        fingerprint (str): Value returned by start_warmup
+        timeout (float): Seconds to wait; None waits until ready
+
+    Returns:
+        dict or None: Lexical index, or None if unavailable
+    """
+    service = _services.get(fingerprint)
+    if service is None or not service["ready"].wait(timeout):
+        return None
+    return service["lexical"]
+
+
+def get_passages(fingerprint):
+    """
+    Passage table the service's indexes were built from.
+
+    Args:
+        fingerprint (str): Value returned by start_warmup
+
+    Returns:
+        pd.DataFrame or None: Passage table, or None if the service is unknown
+    """
+    service = _services.get(fingerprint)
+    return service["passages"] if service is not None else None
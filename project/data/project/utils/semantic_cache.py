@@ -0,0 +1,162 @@
+# ==========================================
+# SEMANTIC CACHE MODULE - DIELLA AI
+# ==========================================
+# Near-duplicate question cache in front of the RAG pipeline. Embeddings of
+# answered questions live in a small dedicated FAISS inner-product index;
+# a new question whose embedding is similar enough (same corpus, same
+# sidebar filters and LLM model) is served the stored answer without retrieval or an LLM
+# call. Query embeddings come from encode_queries, so the search that
+# follows a miss reuses the same vector.
+
+import threading
+import time
+
+import numpy as np
+from config import SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_TTL
+from .hashing import text_hash
+from .vector_store import encode_queries
+
+
+def cache_scope(id_bitmap, model, prompt_version):
+    """
+    Key for what an answer depends on besides the question and corpus.
+
+    Args:
+        id_bitmap (np.ndarray): Packed statement bitmap of the filters, or None
+        model (str): LLM model name
+        prompt_version (str): Version of the prompt template
+
+    Returns:
+        str: Hex digest
+    """
+    rows = "all" if id_bitmap is None else np.asarray(id_bitmap, dtype=np.uint8).tobytes().hex()
+    return text_hash(f"{rows}|{model}|{prompt_version}", "qa-scope")
+
+
+class SemanticQuestionCache:
+    """
+    Thread-safe cache of answered questions for one corpus fingerprint.
+    Entries expire after `ttl` seconds; the oldest are dropped beyond
+    `max_entries`.
+    """
+
+    def __init__(self, corpus_fingerprint, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 max_entries=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL):
+        self.corpus = corpus_fingerprint
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._index = None
+        self._entries = {}
+        self._scopes = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        expired = [i for i, e in self._entries.items() if now - e["created"] > self.ttl]
+        overflow = len(self._entries) - len(expired) - self.max_entries + 1
+        if overflow > 0:
+            dropped = set(expired)
+            alive = sorted(i for i in self._entries if i not in dropped)
+            expired += alive[:overflow]
+        if expired:
+            self._index.remove_ids(np.array(expired, dtype="int64"))
+            for i in expired:
+                scope = self._entries.pop(i)["scope"]
+                self._scopes[scope].discard(i)
+                if not self._scopes[scope]:
+                    del self._scopes[scope]
+
+    def lookup(self, model, question, scope=""):
+        """
+        Stored answer for a question similar to a past one.
+
+        Args:
+            model: SentenceTransformer model
+            question (str): New question
+            scope (str): cache_scope of the current filters and model
+
+        Returns:
+            dict or None: Entry (question, answer, sources, similarity) or None
+        """
+        import faiss
+
+        embedding = encode_queries(model, [question])
+        now = time.time()
+        with self._lock:
+            # Only live entries of this scope are searched, so answers cached
+            # under other filters or models can never crowd out a match
+            ids = [
+                i for i in self._scopes.get(scope, ())
+                if now - self._entries[i]["created"] <= self.ttl
+            ]
+            if not ids:
+                self.misses += 1
+                return None
+            ids = np.array(ids, dtype="int64")
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids)))
+            scores, found = self._index.search(embedding, 1, params=params)
+            if found[0][0] < 0 or scores[0][0] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {**self._entries[int(found[0][0])], "similarity": float(scores[0][0])}
+
+    def add(self, model, question, answer, sources, scope=""):
+        """
+        Remember an answered question.
+
+        Args:
+            model: SentenceTransformer model
+            question (str): Question text
+            answer (str): Generated answer
+            sources (list): Sources shown with the answer
+            scope (str): cache_scope the answer was generated under
+        """
+        import faiss
+
+        embedding = encode_queries(model, [question])
+        now = time.time()
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(embedding.shape[1]))
+            self._evict(now)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(embedding, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = {
+                "question": question,
+                "answer": answer,
+                "sources": sources,
+                "scope": scope,
+                "created": now,
+            }
+            self._scopes.setdefault(scope, set()).add(entry_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(corpus_fingerprint):
+    """
+    Process-wide semantic cache for a corpus; caches for older corpus
+    versions are dropped.
+
+    Args:
+        corpus_fingerprint (str): Corpus fingerprint (retrieval_service)
+
+    Returns:
+        SemanticQuestionCache: Cache
+    """
+    with _caches_lock:
+        cache = _caches.get(corpus_fingerprint)
+        if cache is None:
+            _caches.clear()
+            cache = _caches[corpus_fingerprint] = SemanticQuestionCache(corpus_fingerprint)
+        return cache
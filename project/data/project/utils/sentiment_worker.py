@@ -0,0 +1,22 @@
+# ==========================================
+# SENTIMENT WORKER MODULE - DIELLA AI
+# ==========================================
+# Task functions for the sentiment process pool (nlp_analysis.score_sentiment).
+# Workers are spawned and import only this module, so it stays free of the
+# heavy imports (sklearn, pandas) a worker does not need.
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+# Per-process analyzer (set by init_sentiment_worker)
+_worker_analyzer = None
+
+
+def init_sentiment_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def score_sentiment_chunk(texts):
+    """VADER compound scores for one chunk of texts."""
+    analyzer = _worker_analyzer or SentimentIntensityAnalyzer()
+    return [analyzer.polarity_scores(t)["compound"] for t in texts]
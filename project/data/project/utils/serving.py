@@ -0,0 +1,153 @@
+# ==========================================
+# SERVING ARTIFACTS MODULE - DIELLA AI
+# ==========================================
+# What the enrichment pipeline publishes and a read-only app loads: the
+# enriched corpus, its passage table and a manifest naming the corpus
+# fingerprint and the vector/lexical indexes built from it. The manifest is
+# written last, so a reader either sees a complete set or the previous one.
+
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from config import CORPUS_ARTIFACT_PATH, PASSAGES_ARTIFACT_PATH, SERVING_MANIFEST_PATH, SERVING_READ_ONLY
+from .data_loader import read_corpus_artifact
+
+# Bump when the manifest layout changes
+MANIFEST_FORMAT = 1
+
+
+def _write_atomic(path, write):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_passages(passages, path=PASSAGES_ARTIFACT_PATH):
+    """Write the passage table (index = passage id) atomically."""
+    _write_atomic(path, lambda tmp: passages.to_parquet(tmp, compression="zstd"))
+
+
+def write_serving_manifest(corpus_fingerprint, rows, passages, vector_index, lexical_index,
+                           stages=None, path=SERVING_MANIFEST_PATH):
+    """
+    Publish a complete set of serving artifacts.
+
+    Args:
+        corpus_fingerprint (dict): Fingerprint stored in the corpus artifact
+        rows (int): Corpus rows
+        passages (int): Passages
+        vector_index (str): Fingerprint of the persisted FAISS index
+        lexical_index (str): Fingerprint of the persisted BM25 index
+        stages (dict): Per-stage report of the pipeline run
+        path (Path): Manifest path
+
+    Returns:
+        dict: The manifest
+    """
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "built_at": time.time(),
+        "corpus": corpus_fingerprint,
+        "rows": rows,
+        "passages": passages,
+        "vector_index": vector_index,
+        "lexical_index": lexical_index,
+        "stages": stages or {},
+    }
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    _write_atomic(path, write)
+    return manifest
+
+
+def read_serving_manifest(path=SERVING_MANIFEST_PATH):
+    """
+    Manifest of the published artifacts.
+
+    Args:
+        path (Path): Manifest path
+
+    Returns:
+        dict or None: Manifest, or None if missing, unreadable or of another format
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Serving manifest unreadable: {e}")
+        return None
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else None
+
+
+def serving_read_only(setting=SERVING_READ_ONLY, manifest_path=SERVING_MANIFEST_PATH):
+    """
+    Whether the app must only load published artifacts.
+
+    Args:
+        setting (str): SERVING_READ_ONLY value ("auto", "1"/"true"/"yes" or "0")
+        manifest_path (Path): Manifest path
+
+    Returns:
+        bool: True when forced on, or "auto" and a manifest has been published
+    """
+    if setting == "auto":
+        return Path(manifest_path).exists()
+    return setting in ("1", "true", "yes")
+
+
+def load_serving_corpus(manifest_path=SERVING_MANIFEST_PATH, artifact_path=CORPUS_ARTIFACT_PATH):
+    """
+    Load the published enriched corpus without checking it against the
+    corpus source (no hashing, reading or enrichment of the source).
+
+    Args:
+        manifest_path (Path): Manifest path
+        artifact_path (Path): Corpus artifact path
+
+    Returns:
+        tuple: (pd.DataFrame, manifest, error_message) or (None, None, error_message)
+    """
+    manifest = read_serving_manifest(manifest_path)
+    if manifest is None:
+        return None, None, "No published serving artifacts; run: python build_artifacts.py"
+    df, stored = read_corpus_artifact(artifact_path)
+    if df is None:
+        return None, None, f"Corpus artifact missing or unreadable: {artifact_path}"
+    if stored != manifest["corpus"]:
+        return None, None, "Serving artifacts are incomplete (publish interrupted?); run: python build_artifacts.py"
+    return df, manifest, None
+
+
+def load_serving_passages(manifest, path=PASSAGES_ARTIFACT_PATH):
+    """
+    Load the published passage table.
+
+    Args:
+        manifest (dict): Manifest from load_serving_corpus
+        path (Path): Passage table path
+
+    Returns:
+        pd.DataFrame or None: Passage table, or None if missing, unreadable
+        or not the one the manifest describes
+    """
+    try:
+        passages = pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Passage table unreadable: {e}")
+        return None
+    if len(passages) != manifest["passages"]:
+        print("Passage table does not match the serving manifest")
+        return None
+    return passages
@@ -0,0 +1,238 @@
+# ==========================================
+# TOKENIZATION MODULE - DIELLA AI
+# ==========================================
+# One tokenizer for TTR, word counts, keywords and co-occurrence statistics.
+# Each statement is tokenized once per language; tokens are stored as compact
+# int32 ids into a process-wide vocabulary, and corpus-level metrics are
+# computed on flat id arrays (CSR layout: ids + row offsets).
+
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from .hashing import text_hash
+
+# Unicode letters only (excludes numbers and underscores)
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+", flags=re.UNICODE)
+# Lexical search also keeps numbers (procurement codes, years, amounts)
+SEARCH_TOKEN_PATTERN = re.compile(r"[^\W_]+", flags=re.UNICODE)
+
+# Tokenized statements kept per process before the cache is reset
+TOKEN_CACHE_SIZE = 200_000
+
+_vocab = {}
+_id_to_token = []
+_token_cache = {}
+_vocab_lock = threading.Lock()
+
+
+def _ids_for(tokens):
+    ids = np.empty(len(tokens), dtype=np.int32)
+    with _vocab_lock:
+        for i, tok in enumerate(tokens):
+            tid = _vocab.get(tok)
+            if tid is None:
+                tid = len(_id_to_token)
+                _vocab[tok] = tid
+                _id_to_token.append(tok)
+            ids[i] = tid
+    return ids
+
+
+def _cached_tokens(text, salt, split):
+    if text is None or (not isinstance(text, str) and pd.isna(text)) or not text:
+        return np.empty(0, dtype=np.int32)
+    key = text_hash(text, salt)
+    ids = _token_cache.get(key)
+    if ids is None:
+        if len(_token_cache) >= TOKEN_CACHE_SIZE:
+            _token_cache.clear()
+        ids = _ids_for(split(str(text)))
+        ids.setflags(write=False)
+        _token_cache[key] = ids
+    return ids
+
+
+def fold_diacritics(text):
+    """Strip diacritics (ë -> e, ç -> c) so text typed without them still matches."""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+    )
+
+
+def tokenize(text, lang="en"):
+    """
+    Token ids of a single text (lowercased Unicode words), cached per language.
+
+    Args:
+        text (str): Input text
+        lang (str): Language key, e.g. 'en' (Speech) or 'sq' (Speech_SQ)
+
+    Returns:
+        np.ndarray: int32 token ids
+    """
+    return _cached_tokens(text, lang, lambda t: TOKEN_PATTERN.findall(t.lower()))
+
+
+def _search_split(text):
+    return SEARCH_TOKEN_PATTERN.findall(fold_diacritics(text.lower()))
+
+
+def search_tokenize(text):
+    """
+    Token ids for lexical search: lowercased, diacritic-folded words and
+    numbers. Shares the vocabulary and cache with tokenize.
+
+    Args:
+        text (str): Input text
+
+    Returns:
+        np.ndarray: int32 token ids
+    """
+    return _cached_tokens(text, "search", _search_split)
+
+
+def search_terms(text):
+    """
+    Distinct lexical-search words of a query (same rules as
+    search_tokenize). The vocabulary and token cache are left untouched,
+    so arbitrary user queries do not grow them.
+
+    Args:
+        text (str): Query text
+
+    Returns:
+        set: Words
+    """
+    if not isinstance(text, str) or not text:
+        return set()
+    return set(_search_split(text))
+
+
+def tokenize_corpus(texts, lang="en"):
+    """
+    Tokenize many texts into a flat id array with row offsets.
+
+    Args:
+        texts (iterable): Texts
+        lang (str): Language key, or 'search' for search_tokenize
+
+    Returns:
+        tuple: (np.ndarray int32 ids, np.ndarray int64 offsets of length n+1)
+    """
+    if lang == "search":
+        arrays = [search_tokenize(t) for t in texts]
+    else:
+        arrays = [tokenize(t, lang) for t in texts]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    if arrays:
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+        ids = np.concatenate(arrays) if offsets[-1] else np.empty(0, dtype=np.int32)
+    else:
+        ids = np.empty(0, dtype=np.int32)
+    return ids, offsets
+
+
+def token_ids(words):
+    """Vocabulary ids for words (-1 for words never seen by the tokenizer)."""
+    return np.array([_vocab.get(str(w).lower(), -1) for w in words], dtype=np.int64)
+
+
+def token_strings(ids):
+    """Words for token ids."""
+    return [_id_to_token[i] for i in ids]
+
+
+def word_counts(offsets):
+    """Number of tokens per text."""
+    return np.diff(offsets)
+
+
+def type_token_ratios(ids, offsets):
+    """
+    Type-Token Ratio per text (unique tokens / total tokens), vectorized.
+
+    Args:
+        ids (np.ndarray): Flat token ids from tokenize_corpus
+        offsets (np.ndarray): Row offsets from tokenize_corpus
+
+    Returns:
+        np.ndarray: float64 TTR values (0.0 for empty texts)
+    """
+    lengths = np.diff(offsets)
+    ttr = np.zeros(len(lengths), dtype=np.float64)
+    if len(ids) == 0:
+        return ttr
+    width = int(ids.max()) + 1
+    rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+    pairs = np.unique(rows * width + ids)
+    unique_counts = np.bincount(pairs // width, minlength=len(lengths))
+    np.divide(unique_counts, lengths, out=ttr, where=lengths > 0)
+    return ttr
+
+
+def doc_term_matrix(ids, offsets, columns=None, binary=True):
+    """
+    Sparse document-term matrix from flat token ids.
+
+    Args:
+        ids (np.ndarray): Flat token ids
+        offsets (np.ndarray): Row offsets
+        columns (array-like): Token ids to keep, in column order (-1 = empty
+            column); all vocabulary ids if None
+        binary (bool): Presence (1) instead of counts
+
+    Returns:
+        scipy.sparse.csr_matrix: n_texts x n_columns matrix
+    """
+    n_rows = len(offsets) - 1
+    rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(offsets))
+    if columns is None:
+        n_cols = len(_id_to_token)
+        cols = ids.astype(np.int64)
+    else:
+        columns = np.asarray(columns, dtype=np.int64)
+        n_cols = len(columns)
+        lookup = np.full(max(len(_id_to_token), 1), -1, dtype=np.int64)
+        valid = columns >= 0
+        lookup[columns[valid]] = np.flatnonzero(valid)
+        cols = lookup[ids]
+        keep = cols >= 0
+        rows, cols = rows[keep], cols[keep]
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(n_rows, n_cols),
+    )
+    if binary:
+        matrix.data[:] = 1
+    return matrix
+
+
+def top_keywords(ids, top_n=8, stopwords=(), min_len=3):
+    """
+    Most frequent tokens of one text (ties keep first-occurrence order).
+
+    Args:
+        ids (np.ndarray): Token ids of the text
+        top_n (int): Number of keywords
+        stopwords (set): Words to skip
+        min_len (int): Minimum word length
+
+    Returns:
+        list: Keywords
+    """
+    if len(ids) == 0:
+        return []
+    uniq, first, counts = np.unique(ids, return_index=True, return_counts=True)
+    order = np.lexsort((first, -counts))
+    keywords = []
+    for tid in uniq[order]:
+        word = _id_to_token[tid]
+        if len(word) >= min_len and word not in stopwords:
+            keywords.append(word)
+            if len(keywords) == top_n:
+                break
+    return keywords
@@ -0,0 +1,343 @@
+# ==========================================
+# TRANSLATION MODULE - DIELLA AI
+# ==========================================
+# English -> Albanian machine translation for statements without Speech_SQ
+# (e.g. ingested articles). Several texts go into one LLM request as a JSON
+# array and come back as one; requests run concurrently under a rate limit.
+# Every translated text is cached in SQLite by content hash, backend model
+# and prompt version, so the same text is never translated twice. Texts
+# that failed are recorded too and only retried after a growing delay.
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from config import (
+    TRANSLATION_CACHE_PATH, TRANSLATION_BATCH_SIZE, TRANSLATION_BATCH_CHARS,
+    TRANSLATION_MAX_TOKENS, TRANSLATION_WORKERS, TRANSLATION_REQUESTS_PER_MINUTE,
+    TRANSLATION_RETRY_AFTER, TRANSLATION_RETRY_MAX,
+)
+from .hashing import text_hash
+from .resilience import RateLimiter
+
+# Bump when the prompt changes so cached translations are redone
+TRANSLATION_PROMPT_VERSION = "mt-v1"
+
+SYSTEM_PROMPT = (
+    "You translate English statements into Albanian. The user sends a JSON array "
+    "of strings. Reply with only a JSON array of the same length whose i-th element "
+    "is the Albanian translation of the i-th string. Keep names, numbers and line "
+    "breaks. Do not add explanations."
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    translation TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failures (
+    key TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    last_attempt REAL NOT NULL,
+    error TEXT
+);
+"""
+
+# SQLite limits bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+# Line breaks, or whitespace after a sentence end
+_BREAK = re.compile(r"(\n+|(?<=[.!?])\s+)")
+
+
+class TranslationCache:
+    """SQLite store of translations (and of failed texts) keyed by translation_key."""
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, retry_after=TRANSLATION_RETRY_AFTER,
+                 retry_max=TRANSLATION_RETRY_MAX):
+        self.path = path
+        self.retry_after = retry_after
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection; commits on success, always closed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _select(self, query, keys):
+        rows = []
+        keys = list(keys)
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                rows.extend(conn.execute(query.format(",".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+    def get_many(self, keys):
+        """
+        Cached translations for keys.
+
+        Args:
+            keys (list): Keys from translation_key
+
+        Returns:
+            dict: key -> translation for the keys that are cached
+        """
+        return dict(self._select("SELECT key, translation FROM translations WHERE key IN ({})", keys))
+
+    def put_many(self, items):
+        """Store translations (dict key -> translation) in one transaction."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, created) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            conn.executemany("DELETE FROM failures WHERE key = ?", [(key,) for key in items])
+
+    def record_failures(self, errors):
+        """Record failed keys (dict key -> error message) for a delayed retry."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO failures (key, attempts, last_attempt, error) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET attempts = attempts + 1, "
+                "last_attempt = excluded.last_attempt, error = excluded.error",
+                [(key, now, error) for key, error in errors.items()],
+            )
+
+    def backing_off(self, keys, now=None):
+        """
+        Keys that failed recently and are not due for a retry yet.
+
+        Args:
+            keys (list): Keys from translation_key
+            now (float): Current time (default: time.time())
+
+        Returns:
+            set: Keys to skip for now
+        """
+        now = time.time() if now is None else now
+        rows = self._select("SELECT key, attempts, last_attempt FROM failures WHERE key IN ({})", keys)
+        return {
+            key for key, attempts, last_attempt in rows
+            if now < last_attempt + min(self.retry_max, self.retry_after * 2 ** (attempts - 1))
+        }
+
+
+def translation_key(text, backend):
+    """Cache key of one text for a backend model and the current prompt."""
+    return text_hash(text, f"{backend.cache_id}|{TRANSLATION_PROMPT_VERSION}")
+
+
+def split_segments(text, max_chars=TRANSLATION_BATCH_CHARS):
+    """
+    Split a long text at line and sentence breaks into segments that fit
+    one request (a single longer sentence stays whole).
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Target maximum segment length
+
+    Returns:
+        list: (segment, separator) pairs; joining segment + separator for
+        all pairs gives the text back
+    """
+    if len(text) <= max_chars:
+        return [(text, "")]
+    parts = _BREAK.split(text)
+    segments = []
+    current = ""
+    for i in range(0, len(parts), 2):
+        piece = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        if current.strip() and len(current) + len(piece) > max_chars:
+            body = current.rstrip()
+            segments.append((body, current[len(body):]))
+            current = ""
+        current += piece + separator
+    body = current.rstrip()
+    segments.append((body, current[len(body):]))
+    return segments
+
+
+def make_batches(texts, batch_size=TRANSLATION_BATCH_SIZE, batch_chars=TRANSLATION_BATCH_CHARS):
+    """
+    Group texts into requests of at most batch_size texts and about
+    batch_chars characters.
+
+    Args:
+        texts (list): Texts to translate
+        batch_size (int): Maximum texts per request
+        batch_chars (int): Maximum characters per request
+
+    Returns:
+        list: Lists of texts
+    """
+    batches = []
+    current, chars = [], 0
+    for text in texts:
+        if current and (len(current) >= batch_size or chars + len(text) > batch_chars):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(text)
+        chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_translations(reply, n):
+    """
+    Translations from a model reply.
+
+    Args:
+        reply (str): Model output (a JSON array, possibly wrapped in prose or fences)
+        n (int): Number of texts sent
+
+    Returns:
+        list or None: n translations, or None if the reply does not match
+    """
+    start, end = reply.find("["), reply.rfind("]")
+    if start >= 0 and end > start:
+        try:
+            items = json.loads(reply[start:end + 1])
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            if len(items) == n and all(isinstance(i, str) for i in items):
+                return [i.strip() for i in items]
+            return None  # an array of the wrong shape is never a translation
+    # A single text may come back as plain text instead of an array
+    text = reply.strip().strip("`").strip()
+    if n == 1 and text and not text.startswith("["):
+        return [text]
+    return None
+
+
+def _translate_batch(batch, backend, limiter, counter):
+    """
+    Translate one batch. When the reply does not match, each half is
+    retried on its own, so one untranslatable text only fails itself.
+
+    Returns:
+        tuple: (dict text -> translation, dict text -> error message)
+    """
+    limiter.acquire()
+    with counter["lock"]:
+        counter["requests"] += 1
+    try:
+        reply = backend.generate(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(batch, ensure_ascii=False)},
+            ],
+            temperature=0.0,
+            max_tokens=TRANSLATION_MAX_TOKENS,
+        )
+    except Exception as e:
+        # Backend errors (already retried by the backend) fail the whole batch
+        return {}, {text: str(e) for text in batch}
+    translations = parse_translations(reply, len(batch))
+    if translations is not None:
+        return dict(zip(batch, translations)), {}
+    if len(batch) == 1:
+        return {}, {batch[0]: "reply is not a translation"}
+    middle = len(batch) // 2
+    done, failed = _translate_batch(batch[:middle], backend, limiter, counter)
+    more_done, more_failed = _translate_batch(batch[middle:], backend, limiter, counter)
+    done.update(more_done)
+    failed.update(more_failed)
+    return done, failed
+
+
+def translate_texts(texts, backend, cache=None, batch_size=TRANSLATION_BATCH_SIZE,
+                    batch_chars=TRANSLATION_BATCH_CHARS, workers=TRANSLATION_WORKERS,
+                    per_minute=TRANSLATION_REQUESTS_PER_MINUTE):
+    """
+    Translate English texts into Albanian.
+    Cached texts cost nothing; the rest are sent in batches, concurrently
+    (at most `workers` and the backend's own limit) and at most
+    `per_minute` requests per minute. Each finished batch is cached at
+    once, so an interrupted run keeps what it paid for.
+
+    Args:
+        texts (list): English texts
+        backend (LLMBackend): Backend from get_llm_backend
+        cache (TranslationCache): Translation cache (default: the on-disk cache)
+        batch_size (int): Maximum texts per request
+        batch_chars (int): Maximum characters per request
+        workers (int): Concurrent requests
+        per_minute (int): Request rate limit (0 = unlimited)
+
+    Returns:
+        tuple: (list of translations, None where a text could not be
+        translated; dict report with segments, cached, backing_off
+        (recent failures not retried yet), translated, failed and requests)
+    """
+    cache = cache or TranslationCache()
+    split = [split_segments(str(text), batch_chars) for text in texts]
+    unique = list(dict.fromkeys(s for segments in split for s, _ in segments if s.strip()))
+    keys = {s: translation_key(s, backend) for s in unique}
+    cached = cache.get_many(keys.values())
+    done = {s: cached[keys[s]] for s in unique if keys[s] in cached}
+
+    missing = [s for s in unique if s not in done]
+    backing_off = cache.backing_off(keys[s] for s in missing)
+    todo = [s for s in missing if keys[s] not in backing_off]
+    batches = make_batches(todo, batch_size, batch_chars)
+    limiter = RateLimiter(per_minute)
+    counter = {"requests": 0, "lock": threading.Lock()}
+    failed = {}
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, backend.max_concurrency, len(batches)))) as pool:
+            futures = {
+                pool.submit(_translate_batch, batch, backend, limiter, counter): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                result, errors = future.result()
+                if errors:
+                    print(f"Translation failed for {len(errors)} of {len(futures[future])} texts: "
+                          f"{next(iter(errors.values()))}")
+                    try:
+                        cache.record_failures({keys[s]: e for s, e in errors.items()})
+                    except sqlite3.Error as e:
+                        print(f"Could not record translation failures: {e}")
+                failed.update(errors)
+                done.update(result)
+                if result:
+                    try:
+                        cache.put_many({keys[s]: t for s, t in result.items()})
+                    except sqlite3.Error as e:
+                        print(f"Could not write translation cache: {e}")
+
+    translations = []
+    for segments in split:
+        if all(s in done for s, _ in segments if s.strip()):
+            translations.append("".join((done[s] if s.strip() else s) + sep for s, sep in segments))
+        else:
+            translations.append(None)
+    report = {
+        "segments": len(unique),
+        "cached": len(unique) - len(missing),
+        "backing_off": len(missing) - len(todo),
+        "translated": len(todo) - len(failed),
+        "failed": len(failed),
+        "requests": counter["requests"],
+    }
+    return translations, report
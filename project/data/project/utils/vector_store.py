@@ -2,52 +2,390 @@
 # VECTOR STORE MODULE - DIELLA AI
 # ==========================================
 
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import numpy as np
-from config import VECTOR_MODEL
+import pandas as pd
+from config import (
+    VECTOR_MODEL,
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_TYPE,
+    INDEX_AUTO_HNSW_MIN,
+    INDEX_AUTO_IVF_PQ_MIN,
+    IVF_NLIST,
+    IVF_NPROBE,
+    PQ_M,
+    PQ_NBITS,
+    PQ_REFINE_K_FACTOR,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+)
+from .chunking import build_passages, chunking_settings
+from .embedding_cache import encode_with_cache, format_cache_report
+from .hashing import texts_fingerprint
+from .metadata_filter import expand_bitmap
+
+# Bump when the index layout changes so persisted indexes are rebuilt
+INDEX_FORMAT = "idmap-cosine-passages-v4"
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# One SentenceTransformer per process, shared by every index and session
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """
+    Load the SentenceTransformer once per process.
+
+    Returns:
+        SentenceTransformer: Model named by VECTOR_MODEL
+    """
+    global _embedding_model
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _embedding_model = SentenceTransformer(VECTOR_MODEL)
+        return _embedding_model
+
+
+def _passages(df, passages=None):
+    """Passage table of the corpus (utils.chunking), built if not given."""
+    return passages if passages is not None else build_passages(df)
+
+
+def normalize_embeddings(embeddings):
+    """
+    Scale rows to unit length so inner product equals cosine similarity.
+
+    Args:
+        embeddings (np.ndarray): float matrix (n x dim)
+
+    Returns:
+        np.ndarray: float32 matrix with unit-norm rows (zero rows unchanged)
+    """
+    embeddings = np.asarray(embeddings, dtype="float32")
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.where(norms > 0, norms, 1.0)
+
+
+def _ivf_nlist(n):
+    """Number of IVF cells: IVF_NLIST or 4*sqrt(n), with >= 39 points per cell."""
+    nlist = IVF_NLIST or int(4 * np.sqrt(n))
+    return max(1, min(nlist, n // 39))
+
+
+def choose_index_type(n, index_type=None):
+    """
+    Index type for a corpus of n vectors.
+
+    Args:
+        n (int): Number of vectors
+        index_type (str): Forced type; None uses VECTOR_INDEX_TYPE
+
+    Returns:
+        str: One of INDEX_TYPES
+    """
+    index_type = (index_type or VECTOR_INDEX_TYPE or "auto").lower()
+    if index_type == "auto":
+        if n < INDEX_AUTO_HNSW_MIN:
+            return "flat"
+        return "hnsw" if n < INDEX_AUTO_IVF_PQ_MIN else "ivf_pq"
+    if index_type not in INDEX_TYPES:
+        print(f"Unknown VECTOR_INDEX_TYPE '{index_type}', using flat")
+        return "flat"
+    # IVF needs enough points to train its coarse quantizer and PQ codebooks
+    if index_type == "ivf_pq" and n < 39 * 2 ** PQ_NBITS:
+        index_type = "ivf_flat"
+    if index_type == "ivf_flat" and n < 39 * 2:
+        return "flat"
+    return index_type
+
+
+def index_spec(n, index_type=None):
+    """Build-time description of the index (part of the fingerprint)."""
+    kind = choose_index_type(n, index_type)
+    if kind == "hnsw":
+        return f"hnsw:M={HNSW_M},efC={HNSW_EF_CONSTRUCTION}"
+    if kind == "ivf_flat":
+        return f"ivf_flat:nlist={_ivf_nlist(n)}"
+    if kind == "ivf_pq":
+        return f"ivf_pq:nlist={_ivf_nlist(n)},m={PQ_M},nbits={PQ_NBITS},refine=sq8"
+    return "flat"
+
+
+def vector_fingerprint(df, passages=None):
+    """
+    Fingerprint of the indexed passages, embedding model and index layout.
+
+    Args:
+        df (pd.DataFrame): Dataframe with 'Speech_SQ' column
+        passages (pd.DataFrame): Passage table (built from df if None)
+
+    Returns:
+        str: Hex digest identifying the persisted index
+    """
+    passages = _passages(df, passages)
+    return texts_fingerprint(
+        (
+            f"{r}:{s}:{t}"
+            for r, s, t in zip(passages["Row"], passages["Start"], passages["Text"])
+        ),
+        VECTOR_MODEL,
+        INDEX_FORMAT,
+        chunking_settings(),
+        index_spec(len(passages)),
+    )
+
+
+def configure_search(index, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH, k_factor=PQ_REFINE_K_FACTOR):
+    """
+    Apply query-time parameters (IVF nprobe, HNSW efSearch, refine
+    k_factor) to an index.
+
+    Args:
+        index: FAISS index (optionally wrapped in IndexIDMap)
+        nprobe (int): IVF cells visited per query
+        ef_search (int): HNSW candidate list size
+        k_factor (int): Candidates per result re-scored on the refine index (IVF-PQ)
+
+    Returns:
+        The same index
+    """
+    import faiss
+
+    base = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = ef_search
+    if hasattr(base, "refine_index"):
+        base.k_factor = k_factor
+    return index
+
+
+def _search_params(index, id_bitmap):
+    """SearchParameters restricting a search to the ids set in id_bitmap."""
+    import faiss
+
+    base = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    selector = faiss.IDSelectorBitmap(len(id_bitmap) * 8, faiss.swig_ptr(id_bitmap))
+    # Typed parameters override the index's own settings, so carry them over
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None and hasattr(base, "refine_index"):
+        # IndexIDMap only translates the outer selector and IndexRefine does
+        # not pass it on, so the IVF index gets one over its own ids
+        inner = faiss.IDSelectorTranslated(index.id_map, selector)
+        return faiss.IndexRefineSearchParameters(
+            k_factor=base.k_factor,
+            base_index_params=faiss.SearchParametersIVF(sel=inner, nprobe=ivf.nprobe),
+        )
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    if hasattr(base, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def create_index(embeddings, ids, index_type=None):
+    """
+    Build an inner-product FAISS index of the chosen type over embeddings.
+
+    Args:
+        embeddings (np.ndarray): float32 matrix (n x dim), unit-normalized
+        ids (np.ndarray): int64 ids stored with each vector
+        index_type (str): Forced type; None uses VECTOR_INDEX_TYPE / auto
+
+    Returns:
+        faiss.IndexIDMap: Trained index with search parameters applied
+    """
+    import faiss
+
+    n, dim = embeddings.shape
+    kind = choose_index_type(n, index_type)
+    metric = faiss.METRIC_INNER_PRODUCT
+    if kind == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, HNSW_M, metric)
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind in ("ivf_flat", "ivf_pq"):
+        nlist = _ivf_nlist(n)
+        quantizer = faiss.IndexFlatIP(dim)
+        if kind == "ivf_pq":
+            base = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS, metric)
+            # PQ distances alone rank poorly; the top k * k_factor candidates
+            # are re-scored on 8-bit scalar-quantized copies of the vectors
+            # (a quarter of the float size, close to exact for unit vectors)
+            base = faiss.IndexRefine(base, faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric))
+        else:
+            base = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        # Train on a sample; a few hundred points per cell is plenty
+        sample = embeddings
+        max_train = max(nlist * 256, 2 ** PQ_NBITS * 64)
+        if n > max_train:
+            rng = np.random.default_rng(42)
+            sample = embeddings[rng.choice(n, max_train, replace=False)]
+        base.train(sample)
+    else:
+        base = faiss.IndexFlatIP(dim)
+
+    index = faiss.IndexIDMap(base)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    return configure_search(index)
+
+
+def _index_path(fingerprint, index_dir=VECTOR_INDEX_DIR):
+    return index_dir / f"{fingerprint}.faiss"
+
+
+def load_vector_index(fingerprint, index_dir=VECTOR_INDEX_DIR):
+    """
+    Load a persisted FAISS index memory-mapped and read-only.
+    Worker processes that load the same file share its pages.
+
+    Args:
+        fingerprint (str): Expected corpus/model fingerprint
+        index_dir (Path): Directory with persisted indexes
+
+    Returns:
+        faiss.Index or None: Index if a matching file exists
+    """
+    import faiss
+
+    path = _index_path(fingerprint, index_dir)
+    if not path.exists():
+        return None
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        return configure_search(faiss.read_index(str(path), flags))
+    except Exception as e:
+        print(f"Could not load persisted index {path.name}: {e}")
+        return None
+
+
+def save_vector_index(index, fingerprint, index_dir=VECTOR_INDEX_DIR):
+    """
+    Write a FAISS index (with its row-id mapping) to disk atomically.
+    Indexes for older fingerprints are removed; processes that still
+    have them mapped keep working until they reload.
 
+    Args:
+        index: FAISS index whose ids are passage ids
+        fingerprint (str): Corpus/model fingerprint
+        index_dir (Path): Directory with persisted indexes
 
-def build_vector_store(df):
+    Returns:
+        Path: Path of the written index file
     """
-    Build FAISS vector store from Albanian speeches.
-    
+    import faiss
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    path = _index_path(fingerprint, index_dir)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+    meta = {
+        "fingerprint": fingerprint,
+        "model": VECTOR_MODEL,
+        "format": INDEX_FORMAT,
+        "index": index_spec(int(index.ntotal)),
+        "ntotal": int(index.ntotal),
+        "dim": int(index.d),
+        "ids": "passage ids (utils.chunking.build_passages)",
+        "chunking": chunking_settings(),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(path.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    for old in index_dir.glob("*.faiss"):
+        if old != path:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+    return path
+
+
+def build_vector_index(model, df, passages=None, batch_size=None):
+    """
+    Encode Albanian passages and build a FAISS index keyed by passage id.
+    The index type (flat, IVF-Flat, IVF-PQ, HNSW) follows choose_index_type.
+
     Args:
+        model: SentenceTransformer model
         df (pd.DataFrame): Dataframe with 'Speech_SQ' column
-        
+        passages (pd.DataFrame): Passage table (built from df if None)
+        batch_size (int): New passages per checkpointed encoding batch
+
+    Returns:
+        faiss.Index or None: Index, or None if there is nothing to index
+    """
+    passages = _passages(df, passages)
+    texts = passages["Text"].tolist()
+    if len(texts) == 0:
+        return None
+
+    # Encode only texts missing from the on-disk embedding cache
+    embeddings, report = encode_with_cache(model, texts, VECTOR_MODEL, batch_size)
+    print(format_cache_report(report))
+
+    # Ensure float32, proper shape and unit length (cosine similarity)
+    embeddings = np.asarray(embeddings, dtype="float32")
+    if embeddings.ndim == 1:
+        embeddings = embeddings.reshape(1, -1)
+    embeddings = normalize_embeddings(embeddings)
+
+    # Build FAISS index (type chosen by size/config); ids are passage ids
+    return create_index(embeddings, passages.index.to_numpy(dtype="int64"))
+
+
+def build_vector_store(df, passages=None):
+    """
+    Load the SentenceTransformer and the FAISS passage index for Albanian speeches.
+    The index is read from disk when its fingerprint matches the corpus,
+    otherwise it is rebuilt and persisted.
+
+    Args:
+        df (pd.DataFrame): Dataframe with 'Speech_SQ' column
+        passages (pd.DataFrame): Passage table (built from df if None)
+
     Returns:
         tuple: (SentenceTransformer model, FAISS index) or (None, None) if failed
     """
     try:
-        from sentence_transformers import SentenceTransformer
-        import faiss
+        import sentence_transformers  # noqa: F401
+        import faiss  # noqa: F401
     except ImportError:
         print("Error: sentence-transformers or faiss not installed")
         return None, None
 
-    # Get texts
-    texts = df["Speech_SQ"].fillna("").astype(str).tolist()
-    if len(texts) == 0:
+    if len(df) == 0:
         return None, None
 
     try:
-        # Load model
-        model = SentenceTransformer(VECTOR_MODEL)
-
-        # Encode texts to embeddings (show_progress_bar=False për Streamlit që të mos ngatërrohet me spinner)
-        embeddings = model.encode(
-            texts,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-        )
+        # Load model (shared across calls in this process)
+        model = get_embedding_model()
 
-        # Ensure float32 and proper shape
-        embeddings = np.asarray(embeddings, dtype="float32")
-        if embeddings.ndim == 1:
-            embeddings = embeddings.reshape(1, -1)
-
-        # Build FAISS index
-        dim = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dim)
-        index.add(embeddings)
+        passages = _passages(df, passages)
+        fingerprint = vector_fingerprint(df, passages)
+        index = load_vector_index(fingerprint)
+        if index is None:
+            index = build_vector_index(model, df, passages)
+            if index is None:
+                return None, None
+            try:
+                save_vector_index(index, fingerprint)
+            except OSError as e:
+                print(f"Could not persist vector index: {e}")
 
         return model, index
 
@@ -56,46 +394,192 @@ def build_vector_store(df):
         return None, None
 
 
-def search_similar_documents(query_text, model, index, df, k=8):
+def load_vector_store(fingerprint):
     """
-    Search for similar documents using vector similarity.
-    
+    Load the SentenceTransformer and a persisted FAISS index; never builds
+    one (read-only serving).
+
+    Args:
+        fingerprint (str): Fingerprint of the published index
+
+    Returns:
+        tuple: (SentenceTransformer model, FAISS index) or (None, None) if
+        the index is missing
+    """
+    index = load_vector_index(fingerprint)
+    if index is None:
+        return None, None
+    return get_embedding_model(), index
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache of normalized query text -> embedding.
+    Entries expire after `ttl` seconds; the least recently used entry is
+    dropped once `max_size` is reached.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_query_cache = QueryEmbeddingCache()
+
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so equivalent queries share a cache entry."""
+    return " ".join(str(text).lower().split())
+
+
+def encode_queries(model, queries, cache=_query_cache):
+    """
+    Embed queries, reusing cached embeddings; misses are encoded in one batch.
+
     Args:
-        query_text (str): Query text in Albanian
         model: SentenceTransformer model
-        index: FAISS index
-        df (pd.DataFrame): Original dataframe
-        k (int): Number of results to return
-        
+        queries (list): Query texts
+        cache (QueryEmbeddingCache): Cache to use
+
     Returns:
-        pd.DataFrame: Dataframe with k most similar documents
+        np.ndarray: float32 matrix of unit-length rows, one per query
     """
-    if model is None or index is None:
-        return pd.DataFrame()
+    keys = [normalize_query(q) for q in queries]
+    vectors = [None] * len(keys)
+    missing = {}
+    for i, key in enumerate(keys):
+        cached = cache.get((VECTOR_MODEL, key))
+        if cached is None:
+            missing.setdefault(key, []).append(i)
+        else:
+            vectors[i] = cached
 
-    try:
-        # Encode query
-        q_embed = model.encode(
-            [query_text],
+    if missing:
+        encoded = model.encode(
+            list(missing.keys()),
+            show_progress_bar=False,
             convert_to_numpy=True,
         )
-        q_embed = np.asarray(q_embed, dtype="float32")
+        encoded = normalize_embeddings(np.asarray(encoded).reshape(len(missing), -1))
+        for (key, positions), vector in zip(missing.items(), encoded):
+            vector.setflags(write=False)
+            cache.put((VECTOR_MODEL, key), vector)
+            for i in positions:
+                vectors[i] = vector
+
+    return np.vstack(vectors).astype("float32", copy=False)
+
+
+def search_similar_documents_batch(
+    queries, model, index, df, k=8, min_score=None, id_bitmap=None, passages=None
+):
+    """
+    Search many queries at once (one encode batch, one FAISS search).
 
-        # Search
+    Args:
+        queries (list): Query texts in Albanian
+        model: SentenceTransformer model
+        index: FAISS passage index
+        df (pd.DataFrame): Original dataframe
+        k (int): Maximum number of passages per query
+        min_score (float): Drop results with a lower cosine similarity
+        id_bitmap (np.ndarray): Packed bitmap of allowed statement row
+            positions (see utils.metadata_filter); None searches everything
+        passages (pd.DataFrame): Passage table the index was built from
+            (built from df if None)
+
+    Returns:
+        list: One pd.DataFrame per query with one row per matching passage:
+        the statement's columns plus 'PassageId', 'PassageStart',
+        'PassageEnd', 'Passage' and 'Score' (cosine similarity, best first)
+    """
+    if model is None or index is None or len(queries) == 0:
+        return [pd.DataFrame() for _ in queries]
+
+    try:
+        passages = _passages(df, passages)
         k = min(k, int(index.ntotal))
+        params = None
+        if id_bitmap is not None:
+            passage_bitmap = expand_bitmap(id_bitmap, passages["Row"])
+            k = min(k, int(np.unpackbits(passage_bitmap).sum()))
+            params = _search_params(index, passage_bitmap)
         if k <= 0:
-            return pd.DataFrame()
+            return [pd.DataFrame() for _ in queries]
 
-        distances, indices = index.search(q_embed, k)
+        q_embed = encode_queries(model, queries)
+        distances, indices = index.search(q_embed, k, params=params)
 
-        # Get valid indices
-        valid_idx = [int(i) for i in indices[0] if i != -1]
-        if len(valid_idx) == 0:
-            return pd.DataFrame()
-
-        # Return matching rows
-        return df.iloc[valid_idx].copy()
+        results = []
+        for score_row, id_row in zip(distances, indices):
+            # Ids are passage ids; results come sorted by score
+            valid = (id_row >= 0) & (id_row < len(passages))
+            if min_score is not None:
+                valid &= score_row >= min_score
+            hits = passages.iloc[id_row[valid]]
+            rows = df.iloc[hits["Row"].to_numpy()].copy()
+            rows["PassageId"] = hits.index.to_numpy()
+            rows["PassageStart"] = hits["Start"].to_numpy()
+            rows["PassageEnd"] = hits["End"].to_numpy()
+            rows["Passage"] = hits["Text"].to_numpy()
+            rows["Score"] = score_row[valid]
+            results.append(rows)
+        return results
 
     except Exception as e:
         print(f"Error searching vector store: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return [pd.DataFrame() for _ in queries]
+
+
+def search_similar_documents(
+    query_text, model, index, df, k=8, min_score=None, id_bitmap=None, passages=None
+):
+    """
+    Search for similar passages using cosine similarity.
+
+    Args:
+        query_text (str): Query text in Albanian
+        model: SentenceTransformer model
+        index: FAISS passage index
+        df (pd.DataFrame): Original dataframe
+        k (int): Maximum number of passages to return
+        min_score (float): Drop results with a lower cosine similarity
+        id_bitmap (np.ndarray): Packed bitmap of allowed statement rows (optional)
+        passages (pd.DataFrame): Passage table (built from df if None)
+
+    Returns:
+        pd.DataFrame: Up to k most similar passages with their statement's
+        columns and a 'Score' column
+    """
+    return search_similar_documents_batch(
+        [query_text], model, index, df, k=k, min_score=min_score,
+        id_bitmap=id_bitmap, passages=passages,
+    )[0]